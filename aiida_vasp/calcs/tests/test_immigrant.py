@@ -45,7 +45,7 @@ def test_immigrant_additional(fresh_aiida_env, potcar_family, phonondb_run, loca
     assert node.exit_status == 0
 
     # We should not have any POTCAR here
-    expected_files = ['CONTCAR', 'DOSCAR', 'EIGENVAL', 'OUTCAR', 'vasprun.xml']
+    expected_files = ['CONTCAR', 'DOSCAR', 'EIGENVAL', 'OSZICAR', 'OUTCAR', 'vasprun.xml']
     retrieved_files = result['retrieved'].list_object_names()
     assert set(expected_files) == set(retrieved_files)
 
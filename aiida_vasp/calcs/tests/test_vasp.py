@@ -128,6 +128,26 @@ def test_prepare(vasp_calc, vasp_chgcar, vasp_wavecar, vasp_inputs, localhost_di
     assert 'WAVECAR' in [item[1] for item in calcinfo.local_copy_list]
 
 
+@ONLY_ONE_CALC
+def test_prepare_compressed(vasp_calc, vasp_inputs, localhost_dir):
+    """Check that the files to compress are compressed after VASP finished and retrieved with the suffix."""
+    from aiida.common import InputValidationError
+    from aiida.common.folders import Folder
+    inputs = vasp_inputs(parameters={'gga': 'PE', 'gga_compat': False})
+    inputs.settings = get_data_node('dict', dict={'COMPRESS_RETRIEVED_LIST': ['vasprun.xml', 'OUTCAR', 'CHGCAR']})
+    calc = vasp_calc(inputs=inputs)
+    calcinfo = calc.prepare_for_submission(Folder(str(localhost_dir.parent)))
+
+    assert {'vasprun.xml.gz', 'OUTCAR.gz', 'EIGENVAL'} <= set(calcinfo.retrieve_list)
+    assert not {'vasprun.xml', 'OUTCAR', 'CHGCAR.gz'} & set(calcinfo.retrieve_list)
+    assert calcinfo.append_text == 'gzip -f -k vasprun.xml OUTCAR 2> /dev/null || true'
+
+    inputs.settings = get_data_node('dict', dict={'COMPRESS_RETRIEVED_LIST': ['OUTCAR'], 'COMPRESSION_FORMAT': 'zip'})
+    calc = vasp_calc(inputs=inputs)
+    with pytest.raises(InputValidationError):
+        calc.prepare_for_submission(Folder(str(localhost_dir.parent)))
+
+
 @ONLY_ONE_CALC
 def test_verify_success(vasp_calc_and_ref):
     """Check that correct inputs are successfully verified."""
@@ -8,6 +8,9 @@ The calculation class that prepares a specific VASP calculation.
 # pylint: disable=abstract-method
 # explanation: pylint wrongly complains about (aiida) Node not implementing query
 import os
+import shlex
+
+from aiida.common import InputValidationError
 from aiida.plugins import DataFactory
 
 from aiida_vasp.parsers.file_parsers.incar import IncarParser
@@ -21,6 +24,12 @@ from aiida_vasp.utils.inheritance import update_docstring
 PARAMETER_CLS = DataFactory('dict')
 SINGLEFILE_CLS = DataFactory('singlefile')
 
+# The compression formats of retrieved files, with the command compressing them and the suffix it adds to their names.
+COMPRESSION_FORMATS = {'gzip': ('gzip', '.gz'), 'bzip2': ('bzip2', '.bz2'), 'xz': ('xz', '.xz')}
+# Appended to the help of the array outputs, of which the node class changes when they are compressed.
+COMPRESSED_ARRAY_HELP = (' With compress set in the array_storage parser setting, it is a vasp.array_bundle node, a subclass of '
+                         'ArrayData with the same array names.')
+
 _IMMIGRANT_EXTRA_KWARGS = """
 vasp.vasp specific kwargs:
 
@@ -35,13 +44,18 @@ class VaspCalculation(VaspCalcBase):
     General-purpose VASP calculation.
 
     ---------------------------------
-    By default retrieves only the 'OUTCAR', 'vasprun.xml', 'EIGENVAL', 'DOSCAR'
+    By default retrieves only the 'OUTCAR', 'OSZICAR', 'vasprun.xml', 'EIGENVAL', 'DOSCAR'
     and Wannier90 input / output files. These files are deleted after parsing.
     Additional retrieve files can be specified via the
     ``settings['ADDITIONAL_RETRIEVE_TEMPORARY_LIST']`` input. In addition, if you want to keep
     any files after parsing, put them in ``settings['ADDITIONAL_RETRIEVE_LIST']`` which is empty
     by default.
 
+    Large text outputs like vasprun.xml and OUTCAR can be compressed before they are retrieved by listing them
+    in ``settings['COMPRESS_RETRIEVED_LIST']``, with the format in ``settings['COMPRESSION_FORMAT']``, one of
+    'gzip' (default), 'bzip2' or 'xz'. They are stored with the suffix of the format added to their names and
+    are decompressed by the parser while it reads them. The uncompressed files are kept in the remote folder.
+
     Floating point precision for writing POSCAR files can be adjusted using
     ``settings['poscar_precision']``, default: 10
 
@@ -69,7 +83,7 @@ class VaspCalculation(VaspCalcBase):
     """
 
     _VASP_OUTPUT = 'vasp_output'
-    _ALWAYS_RETRIEVE_LIST = ['CONTCAR', 'OUTCAR', 'vasprun.xml', 'EIGENVAL', 'DOSCAR', 'wannier90*', _VASP_OUTPUT]
+    _ALWAYS_RETRIEVE_LIST = ['CONTCAR', 'OUTCAR', 'OSZICAR', 'vasprun.xml', 'EIGENVAL', 'DOSCAR', 'wannier90*', _VASP_OUTPUT]
     _query_type_string = 'vasp.vasp'
     _plugin_type_string = 'vasp.vasp'
 
@@ -110,17 +124,42 @@ class VaspCalculation(VaspCalcBase):
                     required=False,
                     help='The output file containing the plane wave coefficients.')
         spec.output('bands', valid_type=get_data_class('array.bands'), required=False, help='The output band structure.')
-        spec.output('forces', valid_type=get_data_class('array'), required=False, help='The output forces.')
-        spec.output('stress', valid_type=get_data_class('array'), required=False, help='The output stress.')
-        spec.output('dos', valid_type=get_data_class('array'), required=False, help='The output dos.')
-        spec.output('occupancies', valid_type=get_data_class('array'), required=False, help='The output band occupancies.')
-        spec.output('energies', valid_type=get_data_class('array'), required=False, help='The output total energies.')
-        spec.output('projectors', valid_type=get_data_class('array'), required=False, help='The output projectors of decomposition.')
-        spec.output('dielectrics', valid_type=get_data_class('array'), required=False, help='The output dielectric functions.')
-        spec.output('born_charges', valid_type=get_data_class('array'), required=False, help='The output Born effective charges.')
-        spec.output('hessian', valid_type=get_data_class('array'), required=False, help='The output Hessian matrix.')
-        spec.output('dynmat', valid_type=get_data_class('array'), required=False, help='The output dynamical matrix.')
+        spec.output('forces', valid_type=get_data_class('array'), required=False, help='The output forces.' + COMPRESSED_ARRAY_HELP)
+        spec.output('stress', valid_type=get_data_class('array'), required=False, help='The output stress.' + COMPRESSED_ARRAY_HELP)
+        spec.output('dos', valid_type=get_data_class('array'), required=False, help='The output dos.' + COMPRESSED_ARRAY_HELP)
+        spec.output('occupancies',
+                    valid_type=get_data_class('array'),
+                    required=False,
+                    help='The output band occupancies.' + COMPRESSED_ARRAY_HELP)
+        spec.output('energies',
+                    valid_type=get_data_class('array'),
+                    required=False,
+                    help='The output total energies.' + COMPRESSED_ARRAY_HELP)
+        spec.output('projectors',
+                    valid_type=get_data_class('array'),
+                    required=False,
+                    help='The output projectors of decomposition.' + COMPRESSED_ARRAY_HELP)
+        spec.output('dielectrics',
+                    valid_type=get_data_class('array'),
+                    required=False,
+                    help='The output dielectric functions.' + COMPRESSED_ARRAY_HELP)
+        spec.output('born_charges',
+                    valid_type=get_data_class('array'),
+                    required=False,
+                    help='The output Born effective charges.' + COMPRESSED_ARRAY_HELP)
+        spec.output('hessian',
+                    valid_type=get_data_class('array'),
+                    required=False,
+                    help='The output Hessian matrix.' + COMPRESSED_ARRAY_HELP)
+        spec.output('dynmat',
+                    valid_type=get_data_class('array'),
+                    required=False,
+                    help='The output dynamical matrix.' + COMPRESSED_ARRAY_HELP)
         spec.output('site_magnetization', valid_type=get_data_class('dict'), required=False, help='The output of the site magnetization')
+        spec.output('arrays',
+                    valid_type=get_data_class('vasp.array_bundle'),
+                    required=False,
+                    help='The output arrays, bundled in one node.')
         spec.exit_code(0, 'NO_ERROR', message='the sun is shining')
         spec.exit_code(350, 'ERROR_NO_RETRIEVED_FOLDER', message='the retrieved folder data node could not be accessed.')
         spec.exit_code(351,
@@ -138,6 +177,7 @@ class VaspCalculation(VaspCalcBase):
             message=
             'the vasprun.xml was truncated and recovery parsing failed to parse at least one of the requested quantities: {quantities}, '
             'very likely the VASP calculation did not run properly')
+        spec.exit_code(1004, 'ERROR_INVALID_PARSER_SETTINGS', message='the parser settings are not valid: {error}')
 
     def prepare_for_submission(self, tempfolder):
         """
@@ -179,9 +219,34 @@ class VaspCalculation(VaspCalcBase):
             provenance_exclude_list = []
         # Always include POTCAR in the exclude list (not added to the repository, regardless of store)
         calcinfo.provenance_exclude_list = list(set(provenance_exclude_list + ['POTCAR']))
+        try:
+            compress_list = self.inputs.settings.get_attribute('COMPRESS_RETRIEVED_LIST', default=[])
+            compression_format = self.inputs.settings.get_attribute('COMPRESSION_FORMAT', default='gzip')
+        except AttributeError:
+            compress_list = []
+            compression_format = 'gzip'
+        if compress_list:
+            self._compress_retrieved(calcinfo, compress_list, compression_format)
 
         return calcinfo
 
+    @staticmethod
+    def _compress_retrieved(calcinfo, compress_list, compression_format):
+        """Compress the retrieved files in compress_list after VASP finished and retrieve them under their compressed names."""
+        if compression_format not in COMPRESSION_FORMATS:
+            raise InputValidationError('The COMPRESSION_FORMAT {} is not one of {}.'.format(compression_format,
+                                                                                            ', '.join(sorted(COMPRESSION_FORMATS))))
+        command, suffix = COMPRESSION_FORMATS[compression_format]
+        file_names = [name for name in compress_list if name in calcinfo.retrieve_list + calcinfo.retrieve_temporary_list]
+        if not file_names:
+            return
+        calcinfo.retrieve_list = [name + suffix if name in file_names else name for name in calcinfo.retrieve_list]
+        calcinfo.retrieve_temporary_list = [name + suffix if name in file_names else name for name in calcinfo.retrieve_temporary_list]
+        # The originals are kept, so restarts from the remote folder still find them. Files VASP did not write are
+        # skipped, which must not fail the job.
+        compress_text = '{} -f -k {} 2> /dev/null || true'.format(command, ' '.join(shlex.quote(name) for name in file_names))
+        calcinfo.append_text = '\n'.join(text for text in [calcinfo.append_text, compress_text] if text)
+
     def verify_inputs(self):
         super(VaspCalculation, self).verify_inputs()
         if not hasattr(self, 'elements'):
@@ -0,0 +1,105 @@
+"""
+Commands for the parser.
+
+------------------------
+Commandline util for parsing existing VASP calculations again.
+"""
+import json
+import os
+import time
+
+import click
+import tabulate
+
+from aiida_vasp.utils.aiida_utils import cmp_load_verdi_data
+from aiida_vasp.commands import options
+
+VERDI_DATA = cmp_load_verdi_data()
+
+
+def load_json(ctx, param, value):  # pylint: disable=unused-argument
+    """
+    Load a JSON dictionary given on the command line.
+
+    This is a click parameter callback.
+    """
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError as error:
+        raise click.BadParameter('Not valid JSON: {}'.format(error))
+
+
+@VERDI_DATA.group('vasp-parser')
+def parser():
+    """Top level command for parsing VASP calculations."""
+
+
+@parser.command()
+@click.option('-N', '--nodes', type=int, multiple=True, help='Only reparse the calculations with these pks.')
+@click.option('-g', '--group', help='Only reparse the calculations in the group with this label.')
+@click.option('-F',
+              '--filters',
+              callback=load_json,
+              help='QueryBuilder filters on the calculation nodes as JSON, e.g. \'{"ctime": {">": "2021-01-01"}}\'.')
+@click.option('-s',
+              '--parser-settings',
+              callback=load_json,
+              help='Parser settings as JSON, updating the ones of each calculation, e.g. \'{"add_dos": true}\'.')
+@click.option('-w', '--workers', type=click.IntRange(min=1), default=os.cpu_count(), show_default=True, help='Number of worker processes.')
+@click.option('-c',
+              '--chunk-size',
+              type=click.IntRange(min=1),
+              default=50,
+              show_default=True,
+              help='Number of calculations handed to a worker at once.')
+@click.option('-o',
+              '--output-dir',
+              type=click.Path(file_okay=False),
+              help='Write the outputs to <uuid>.npz files in this directory, instead of storing them in the database.')
+@options.DRY_RUN(help='Only show how many calculations would be reparsed.')
+def reparse(nodes, group, filters, parser_settings, workers, chunk_size, output_dir, dry_run):  # pylint: disable=too-many-arguments
+    """
+    Parse finished VASP calculations again.
+
+    By default the new outputs are created by a calcfunction, that takes the outputs of the calculation as inputs
+    and is stored in the database.
+    """
+    from aiida_vasp.parsers.reparse import get_calculation_pks, reparse_calculations  # pylint: disable=import-outside-toplevel
+
+    pks = get_calculation_pks(filters=filters, group=group, pks=nodes)
+    click.echo('Found {} calculations to reparse.'.format(len(pks)))
+    if dry_run or not pks:
+        return
+
+    failures = _echo_progress(
+        reparse_calculations(pks, workers=workers, chunk_size=chunk_size, parser_settings=parser_settings, output_dir=output_dir), len(pks))
+    if failures:
+        _echo_failures(failures)
+
+
+def _echo_progress(chunk_results, num_calculations):
+    """
+    Show the progress after each reparsed chunk.
+
+    :param chunk_results: An iterable over the results of each chunk, see ``reparse_calculations``.
+    :return: The results of the calculations that failed.
+    """
+    failures = []
+    num_done = 0
+    start = time.perf_counter()
+    for results in chunk_results:
+        num_done += len(results)
+        failures.extend(result for result in results if result[1] != 0)
+        elapsed = time.perf_counter() - start
+        click.echo('Parsed {}/{} calculations ({:.2f}/s), {} failed.'.format(num_done, num_calculations, num_done / elapsed, len(failures)))
+    return failures
+
+
+def _echo_failures(failures):
+    """Show a table with the exit status and message of each failed calculation."""
+    table = [['PK', 'Exit status', 'Message']]
+    for calc_pk, exit_status, message, _ in sorted(failures):
+        table.append([calc_pk, 'exception' if exit_status is None else exit_status, message])
+    click.echo(tabulate.tabulate(table, headers='firstrow'))
@@ -0,0 +1,90 @@
+"""Unit tests for vasp-parser command family."""
+# pylint: disable=unused-import,unused-argument,redefined-outer-name,import-outside-toplevel,unused-wildcard-import,wildcard-import
+import json
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from aiida_vasp.commands.parser import parser
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.fixtures.calcs import calc_with_retrieved
+from aiida_vasp.utils.fixtures.testdata import data_path
+
+
+@pytest.fixture
+def finished_calcs(fresh_aiida_env, calc_with_retrieved):
+    """Two finished calculations of the basic run and an unfinished one."""
+    from plumpy import ProcessState
+    nodes = []
+    for _ in range(3):
+        node = calc_with_retrieved(data_path('basic_run'), {'parser_settings': {'add_structure': True}})
+        nodes.append(node)
+    for node in nodes[:2]:
+        node.set_process_state(ProcessState.FINISHED)
+    return nodes[:2]
+
+
+def run_cmd(command=None, args=None, **kwargs):
+    """Run verdi data vasp-parser <command> [args]."""
+    runner = CliRunner()
+    params = args or []
+    if command:
+        params.insert(0, command)
+    return runner.invoke(parser, params, **kwargs)
+
+
+def test_reparse_dry_run(finished_calcs):
+    """Only finished calculations are selected."""
+    result = run_cmd('reparse', ['--dry-run'])
+    assert not result.exception, result.output
+    assert 'Found 2 calculations' in result.output
+
+    result = run_cmd('reparse', ['--dry-run', '-N', str(finished_calcs[0].pk)])
+    assert 'Found 1 calculations' in result.output
+
+
+def test_reparse_provenance(finished_calcs):
+    """The new outputs are created by a stored calcfunction with the updated parser settings as input."""
+    from aiida.orm import CalcFunctionNode, QueryBuilder
+    result = run_cmd('reparse', ['-w', '1', '-c', '1', '-s', json.dumps({'add_kpoints': True})])
+    assert not result.exception, result.output
+    assert 'Parsed 2/2 calculations' in result.output
+    assert '0 failed' in result.output
+
+    for node in finished_calcs:
+        query = QueryBuilder()
+        query.append(type(node.outputs.retrieved), filters={'id': node.outputs.retrieved.pk}, tag='retrieved')
+        query.append(CalcFunctionNode, with_incoming='retrieved', project='*')
+        calcfunction_node, = query.one()
+        assert calcfunction_node.is_finished_ok
+        assert calcfunction_node.inputs.parser_settings.get_dict() == {'add_kpoints': True}
+        assert {'structure', 'kpoints', 'misc'} <= set(calcfunction_node.outputs)
+
+
+def test_reparse_npz(finished_calcs, tmpdir):
+    """The outputs are written to npz files instead of the database."""
+    output_dir = str(tmpdir.join('outputs'))
+    result = run_cmd('reparse', ['-w', '1', '-o', output_dir, '-s', json.dumps({'add_kpoints': True})])
+    assert not result.exception, result.output
+    assert '0 failed' in result.output
+
+    with np.load(str(tmpdir.join('outputs', finished_calcs[0].uuid + '.npz'))) as content:
+        assert content['kpoints/kpoints'].shape == content['kpoints/weights'].shape + (3,)
+        assert json.loads(str(content['structure/attributes']))['sites']
+        assert 'total_energies' in json.loads(str(content['misc/attributes']))
+
+
+def test_reparse_failure(finished_calcs):
+    """Failed calculations are reported."""
+    result = run_cmd('reparse', ['-w', '1', '-s', json.dumps({'vasprun_backend': 'nonexisting'})])
+    assert not result.exception, result.output
+    assert '2 failed' in result.output
+    assert str(finished_calcs[1].pk) in result.output
+    assert 'The backend nonexisting is not available' in result.output
+
+
+def test_invalid_json(finished_calcs):
+    result = run_cmd('reparse', ['-s', '{add_dos'])
+    assert result.exit_code != 0
+    assert 'Not valid JSON' in result.output
@@ -0,0 +1,119 @@
+"""
+Representation of bundled arrays.
+
+---------------------------------
+Array bundle data node (stores many named arrays in a single compressed file in the repository).
+"""
+# pylint: disable=abstract-method, attribute-defined-outside-init
+# explanation: pylint wrongly complains about (aiida) Node not implementing query. The pending arrays are set in
+# initialize instead of __init__, since AiiDA only calls initialize when a node is loaded from the database.
+import os
+import re
+import tempfile
+
+import numpy as np
+from aiida.common import exceptions
+from aiida.orm import ArrayData
+
+BUNDLE_NAME = 'arrays.npz'
+
+
+class ArrayBundleData(ArrayData):
+    """
+    Array bundle data node, holding many named arrays in one compressed ``.npz`` file.
+
+    The arrays are set as for ``ArrayData``, but they are kept in memory until the node is stored, when they
+    are written into a single repository object instead of one ``.npy`` file each. ``get_array`` only reads
+    and decompresses the requested array from the bundle. The arrays can be grouped by the quantity they
+    were parsed from, see ``set_quantity`` and ``get_quantity``.
+    """
+
+    def initialize(self):
+        super(ArrayBundleData, self).initialize()
+        self._pending_arrays = {}
+
+    def set_array(self, name, array):
+        """Set an array, which is written into the bundle when the node is stored."""
+        if self.is_stored:
+            raise exceptions.ModificationNotAllowed('The arrays of a stored node can not be modified.')
+        if not isinstance(array, np.ndarray):
+            raise TypeError('ArrayBundleData can only store numpy arrays. Convert the object to an array first')
+        if not name or re.sub('[0-9a-zA-Z_]', '', name):
+            raise ValueError('The name assigned to the array ({}) is not valid, '
+                             'it can only contain digits, letters and underscores'.format(name))
+        if array.dtype.hasobject:
+            raise TypeError('The array {} holds Python objects, which can not be stored without pickling.'.format(name))
+        self._pending_arrays[name] = array
+        self.set_attribute('{}{}'.format(self.array_prefix, name), list(array.shape))
+
+    def delete_array(self, name):
+        """Delete an array, which is only possible before the node is stored."""
+        if self.is_stored:
+            raise exceptions.ModificationNotAllowed('The arrays of a stored node can not be modified.')
+        if name not in self._pending_arrays:
+            raise KeyError('Array with name {} not found in {}'.format(name, self.__class__.__name__))
+        del self._pending_arrays[name]
+        self.delete_attribute('{}{}'.format(self.array_prefix, name))
+
+    def get_array(self, name):
+        """Return an array, only reading it from the bundle, and caching it, once the node is stored."""
+        if name in self._pending_arrays:
+            return self._pending_arrays[name]
+        if name not in self.get_arraynames():
+            raise KeyError('Array with name {} not found in {}<{}>'.format(name, self.__class__.__name__, self.pk))
+        if name not in self._cached_arrays:
+            with self.open(BUNDLE_NAME, mode='rb') as handle:
+                with np.load(handle, allow_pickle=False) as bundle:
+                    self._cached_arrays[name] = bundle[name]
+        return self._cached_arrays[name]
+
+    def set_quantity(self, quantity, arrays):
+        """
+        Set the arrays of a parsed quantity, e.g. the ``final`` forces of the ``forces`` quantity.
+
+        :param quantity: The name of the quantity, which the names of its arrays are prefixed with.
+        :param arrays: A dict of the arrays of the quantity by their names.
+        """
+        names = {}
+        for key, array in arrays.items():
+            names[key] = key if key.startswith(quantity) else '{}_{}'.format(quantity, key)
+            self.set_array(names[key], np.asarray(array))
+        self.set_attribute('quantities', dict(self.get_attribute('quantities', {}), **{quantity: names}))
+
+    def get_quantity_names(self):
+        """Return the names of the quantities in the bundle."""
+        return sorted(self.get_attribute('quantities', {}))
+
+    def get_quantity(self, quantity):
+        """Return the arrays of a quantity as a dict with the names they were set with."""
+        names = self.get_attribute('quantities', {})
+        if quantity not in names:
+            raise KeyError('No quantity {} is stored, the quantities are {}.'.format(quantity, self.get_quantity_names()))
+        return {key: self.get_array(name) for key, name in names[quantity].items()}
+
+    def store(self, *args, **kwargs):  # pylint: disable=arguments-differ, signature-differs
+        """Write the arrays into the bundle and store the node."""
+        if not self.is_stored and self._pending_arrays:
+            self._write_bundle()
+        super(ArrayBundleData, self).store(*args, **kwargs)
+        self._pending_arrays = {}
+        return self
+
+    def _write_bundle(self):
+        """Write the arrays into a compressed ``.npz`` file in the repository."""
+        handle, path = tempfile.mkstemp(suffix='.npz')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                np.savez_compressed(temp_file, **self._pending_arrays)
+            self.put_object_from_file(path, BUNDLE_NAME)
+        finally:
+            os.remove(path)
+
+    def _validate(self):
+        """Check that the bundle holds the arrays in the attributes."""
+        super(ArrayData, self)._validate()  # pylint: disable=bad-super-call
+        objects = self.list_object_names()
+        expected = [BUNDLE_NAME] if self.get_arraynames() else []
+        if objects != expected:
+            raise exceptions.ValidationError('repository files {} do not match the expected {}.'.format(objects, expected))
+        return True
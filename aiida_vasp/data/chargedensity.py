@@ -6,8 +6,93 @@ Charge density data node (stores CHGCAR files in the repository).
 """
 # pylint: disable=abstract-method
 # explanation: pylint wrongly complains about (aiida) Node not implementing query
+import mmap
+import os
+import tempfile
+
+import numpy as np
+from aiida.common import exceptions
 from aiida.orm import SinglefileData
 
+GRID_FOLDER = 'grids'
+
 
 class ChargedensityData(SinglefileData):
-    pass
+    """
+    Charge density data node, holding a CHGCAR, LOCPOT or ELFCAR file.
+
+    The grids of the file can be stored alongside it in the repository as binary numpy arrays, see ``set_grids``.
+    They are then accessed with ``get_grid`` as memory-mapped arrays, which are only read from disk as far as
+    they are used, e.g. a slice or a strided downsampling of a large grid.
+    """
+
+    def set_grids(self, grids):
+        """
+        Store grids alongside the file, which is only possible before the node is stored.
+
+        :param grids: A dict of 3D arrays by their names, e.g. as read by ``ChgcarParser.grids``. The .npy file of a grid
+            memory-mapped from it as a whole, as returned by the parser, is put into the repository as it is.
+        """
+        for name, grid in grids.items():
+            npy_path = _get_npy_path(grid)
+            if npy_path is not None:
+                self.put_object_from_file(npy_path, '{}/{}.npy'.format(GRID_FOLDER, name))
+                continue
+            handle, path = tempfile.mkstemp(suffix='.npy')
+            try:
+                with os.fdopen(handle, 'wb') as temp_file:
+                    # A grid read from a file is Fortran ordered, which is kept without a copy.
+                    np.save(temp_file, grid)
+                self.put_object_from_file(path, '{}/{}.npy'.format(GRID_FOLDER, name))
+            finally:
+                os.remove(path)
+        self.set_attribute('grids', {name: list(grid.shape) for name, grid in grids.items()})
+
+    def get_grid_names(self):
+        """Return the names of the stored grids."""
+        return sorted(self.get_attribute('grids', {}))
+
+    def get_grid(self, name='total', stride=1):
+        """
+        Return a stored grid as a read-only ``numpy.memmap``.
+
+        :param name: The name of the grid, e.g. ``total`` or ``magnetization``.
+        :param stride: Only take every ``stride`` th point along each axis, an int or a tuple for the three axes.
+        :return: A memory-mapped array, which can be sliced further without reading the whole grid.
+        """
+        if name not in self.get_attribute('grids', {}):
+            raise KeyError('No grid {} is stored, the grids are {}.'.format(name, self.get_grid_names()))
+        with self.open('{}/{}.npy'.format(GRID_FOLDER, name), mode='rb') as handle:
+            version = np.lib.format.read_magic(handle)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(handle)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(handle)
+            grid = np.memmap(handle, dtype=dtype, mode='r', shape=shape, order='F' if fortran_order else 'C', offset=handle.tell())
+        strides = stride if isinstance(stride, tuple) else (stride,) * grid.ndim
+        return grid[tuple(slice(None, None, step) for step in strides)]
+
+    def _validate(self):
+        """Allow the stored grids next to the file."""
+        if not self.get_attribute('grids', {}):
+            return super(ChargedensityData, self)._validate()
+        super(SinglefileData, self)._validate()  # pylint: disable=bad-super-call
+        objects = self.list_object_names()
+        if sorted(objects) != sorted([self.filename, GRID_FOLDER]):
+            raise exceptions.ValidationError('respository files {} do not match the `filename` attribute {} and the grids.'.format(
+                objects, self.filename))
+        return True
+
+
+def _get_npy_path(grid):
+    """Return the path of the .npy file a grid is memory-mapped from as a whole, e.g. by ``numpy.load``, or None."""
+    path = getattr(grid, 'filename', None)
+    # A slice of a memory-mapped array has the same file name, but is based on the array instead of the map.
+    if not isinstance(grid, np.memmap) or not isinstance(grid.base, mmap.mmap) or not path or not path.endswith('.npy'):
+        return None
+    try:
+        if grid.offset + grid.nbytes != os.path.getsize(path):
+            return None
+    except OSError:
+        return None
+    return path
@@ -0,0 +1,55 @@
+"""Test the array bundle data node."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import
+
+import numpy as np
+import pytest
+from aiida.common import exceptions
+from aiida.orm import load_node
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.aiida_utils import get_data_class
+from aiida_vasp.data.array_bundle import BUNDLE_NAME
+
+
+def test_bundle(fresh_aiida_env):
+    """The arrays are stored in a single repository object and read one at a time."""
+    forces = np.arange(24.).reshape(8, 3)
+    node = get_data_class('vasp.array_bundle')()
+    node.set_quantity('forces', {'final': forces})
+    node.set_quantity('dos', {'dos_total': np.ones(100, dtype=np.float32), 'energy': np.linspace(-10, 10, 100)})
+    node.set_array('symbols', np.array(['Si', 'Ge']))
+    assert node.get_array('forces_final') is forces
+    node.store()
+
+    assert node.list_object_names() == [BUNDLE_NAME]
+    assert sorted(node.get_arraynames()) == ['dos_energy', 'dos_total', 'forces_final', 'symbols']
+    assert node.get_shape('forces_final') == (8, 3)
+    assert node.get_quantity_names() == ['dos', 'forces']
+    assert np.array_equal(node.get_quantity('forces')['final'], forces)
+    dos = node.get_quantity('dos')
+    assert sorted(dos) == ['dos_total', 'energy']
+    assert dos['dos_total'].dtype == np.float32
+    assert node.get_array('symbols').tolist() == ['Si', 'Ge']
+
+    loaded = load_node(node.pk)
+    assert np.array_equal(loaded.get_array('dos_energy'), np.linspace(-10, 10, 100))
+    with pytest.raises(KeyError):
+        loaded.get_array('stress_final')
+    with pytest.raises(KeyError):
+        loaded.get_quantity('stress')
+    with pytest.raises(exceptions.ModificationNotAllowed):
+        loaded.set_array('stress_final', np.zeros((3, 3)))
+
+
+def test_invalid_arrays(fresh_aiida_env):
+    """Check that lists, arrays of objects and invalid names are rejected and that arrays can be deleted before storing."""
+    node = get_data_class('vasp.array_bundle')()
+    with pytest.raises(TypeError):
+        node.set_array('forces', [[0, 0, 0]])
+    with pytest.raises(TypeError):
+        node.set_array('forces', np.array([None]))
+    with pytest.raises(ValueError):
+        node.set_array('forces/final', np.zeros(3))
+    node.set_array('forces', np.zeros(3))
+    node.delete_array('forces')
+    assert node.store().get_arraynames() == []
@@ -0,0 +1,35 @@
+"""Test the charge density data node."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import
+
+import numpy as np
+import pytest
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.aiida_utils import get_data_class
+
+
+def test_grids(fresh_aiida_env, tmpdir):
+    """The stored grids are returned as memory-mapped arrays, which can be downsampled."""
+    path = tmpdir.join('CHGCAR')
+    path.write('A CHGCAR file.\n')
+    total = np.asfortranarray(np.arange(60.).reshape(3, 4, 5))
+    node = get_data_class('vasp.chargedensity')(file=str(path))
+    node.set_grids({'total': total, 'magnetization': -total})
+    node.store()
+
+    assert node.get_grid_names() == ['magnetization', 'total']
+    grid = node.get_grid()
+    assert isinstance(grid, np.memmap)
+    assert np.array_equal(grid, total)
+    assert np.array_equal(node.get_grid('magnetization', stride=2), -total[::2, ::2, ::2])
+    assert np.array_equal(node.get_grid(stride=(1, 2, 3))[1:], total[1:, ::2, ::3])
+    with pytest.raises(KeyError):
+        node.get_grid('magnetization_x')
+    assert node.get_content() == 'A CHGCAR file.\n'
+
+
+def test_without_grids(fresh_aiida_env, tmpdir):
+    path = tmpdir.join('CHGCAR')
+    path.write('A CHGCAR file.\n')
+    node = get_data_class('vasp.chargedensity')(file=str(path)).store()
+    assert node.get_grid_names() == []
@@ -0,0 +1,40 @@
+"""Test the wave function data node."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import
+
+import numpy as np
+import pytest
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.fixtures.synthetic import SyntheticRun
+from aiida_vasp.utils.aiida_utils import get_data_class
+
+
+@pytest.mark.parametrize('num_spins', [1, 2])
+def test_wavecar(fresh_aiida_env, tmpdir, num_spins):
+    """The header, the eigenvalues and the coefficients of single bands are read from the records."""
+    run = SyntheticRun(num_spins=num_spins, num_kpoints=4, num_bands=6)
+    path = str(tmpdir.join('WAVECAR'))
+    run.write_wavecar(path, num_plane_waves=30)
+    node = get_data_class('vasp.wavefun')(file=path).store()
+
+    header = node.get_header()
+    assert (header['num_spins'], header['num_kpoints'], header['num_bands']) == (num_spins, 4, 6)
+    assert header['dtype'] == np.complex64
+    np.testing.assert_allclose(header['cell'], run.cell)
+    np.testing.assert_allclose(node.get_kpoints(), run.kpoints)
+    assert node.get_num_plane_waves().tolist() == [30, 29, 28, 30]
+    np.testing.assert_allclose(node.get_eigenvalues(), run.eigenvalues)
+    np.testing.assert_allclose(node.get_occupations(), run.occupations)
+
+    coefficients = run.get_plane_wave_coefficients(30)
+    for spin, kpoint, band in [(0, 0, 0), (num_spins - 1, 2, 5), (0, 3, 1)]:
+        assert np.array_equal(node.get_coefficients(spin, kpoint, band), coefficients[kpoint][spin, band])
+    with pytest.raises(IndexError):
+        node.get_coefficients(0, 4, 0)
+
+
+def test_not_wavecar(fresh_aiida_env, tmpdir):
+    path = tmpdir.join('WAVECAR')
+    path.write_binary(np.array([16, 1, 12345], dtype=float).tobytes())
+    with pytest.raises(ValueError):
+        get_data_class('vasp.wavefun')(file=str(path)).get_header()
@@ -6,8 +6,96 @@ Wave function data node (stores WAVECAR and WAVEDER files in the repository).
 """
 # pylint: disable=abstract-method
 # explanation: pylint wrongly complains about (aiida) Node not implementing query
+import numpy as np
 from aiida.orm import SinglefileData
 
+# The precision of the plane wave coefficients by the tag in the first record of WAVECAR, for VASP 5 and 6.
+PRECISION_TAGS = {45200: np.complex64, 45210: np.complex128, 53300: np.complex64, 53310: np.complex128}
+
 
 class WavefunData(SinglefileData):
-    pass
+    """
+    Wave function data node, holding a WAVECAR or WAVEDER file.
+
+    The records of a WAVECAR file are read from a memory map of the file, so the eigenvalues, the occupations
+    and the plane wave coefficients of a single band are read without reading the rest of the file. The spin,
+    k-point and band indices start at 0.
+    """
+
+    def get_header(self):
+        """
+        Read the header of the WAVECAR file.
+
+        :return: A dict with the ``num_spins``, ``num_kpoints``, ``num_bands``, the ``encut``, the ``cell``,
+            the numpy ``dtype`` of the plane wave coefficients and the ``record_length`` in bytes.
+        """
+        records = self._get_records()
+        record_length, num_spins, tag = _read_record(records, 0, 0, 3)
+        if int(tag) not in PRECISION_TAGS:
+            raise ValueError('Not a WAVECAR file with a known precision, the tag is {}.'.format(tag))
+        values = _read_record(records, int(record_length), 1, 12)
+        return {
+            'num_spins': int(num_spins),
+            'num_kpoints': int(values[0]),
+            'num_bands': int(values[1]),
+            'encut': values[2],
+            'cell': values[3:].reshape(3, 3),
+            'dtype': np.dtype(PRECISION_TAGS[int(tag)]),
+            'record_length': int(record_length),
+        }
+
+    def get_kpoints(self):
+        """Return the k-points in fractional coordinates, as an array of shape ``(num_kpoints, 3)``."""
+        return self._get_kpoint_records()[0, :, 1:4]
+
+    def get_num_plane_waves(self):
+        """Return the number of plane wave coefficients of each k-point."""
+        return self._get_kpoint_records()[0, :, 0].astype(int)
+
+    def get_eigenvalues(self):
+        """Return the eigenvalues, as an array of shape ``(num_spins, num_kpoints, num_bands)``."""
+        return self._get_kpoint_records()[..., 4::3]
+
+    def get_occupations(self):
+        """Return the occupations, as an array of shape ``(num_spins, num_kpoints, num_bands)``."""
+        return self._get_kpoint_records()[..., 6::3]
+
+    def get_coefficients(self, spin, kpoint, band):
+        """Return the plane wave coefficients of a band, only reading its record from the file."""
+        header = self.get_header()
+        num_spins, num_kpoints, num_bands = header['num_spins'], header['num_kpoints'], header['num_bands']
+        if not (0 <= spin < num_spins and 0 <= kpoint < num_kpoints and 0 <= band < num_bands):
+            raise IndexError('The WAVECAR file has {} spins, {} k-points and {} bands, not ({}, {}, {}).'.format(
+                num_spins, num_kpoints, num_bands, spin, kpoint, band))
+        records = self._get_records()
+        kpoint_index = _get_kpoint_index(spin, kpoint, num_kpoints, num_bands)
+        num_plane_waves = int(_read_record(records, header['record_length'], kpoint_index, 1)[0])
+        return _read_record(records, header['record_length'], kpoint_index + 1 + band, num_plane_waves, header['dtype'])
+
+    def _get_records(self):
+        """Return a memory map of the file, the records are read from it on access."""
+        with self.open(mode='rb') as handle:
+            return np.memmap(handle, dtype=np.uint8, mode='r')
+
+    def _get_kpoint_records(self):
+        """Read the number of plane waves, the k-point and the eigenvalues and occupations of each spin and k-point."""
+        header = self.get_header()
+        num_spins, num_kpoints, num_bands = header['num_spins'], header['num_kpoints'], header['num_bands']
+        records = self._get_records()
+        values = np.empty((num_spins, num_kpoints, 4 + 3 * num_bands))
+        for spin in range(num_spins):
+            for kpoint in range(num_kpoints):
+                kpoint_index = _get_kpoint_index(spin, kpoint, num_kpoints, num_bands)
+                values[spin, kpoint] = _read_record(records, header['record_length'], kpoint_index, 4 + 3 * num_bands)
+        return values
+
+
+def _get_kpoint_index(spin, kpoint, num_kpoints, num_bands):
+    """Return the index of the record of a k-point, which is followed by one record for each band."""
+    return 2 + (spin * num_kpoints + kpoint) * (num_bands + 1)
+
+
+def _read_record(records, record_length, index, count, dtype=np.float64):
+    """Read the first values of a record."""
+    start = index * record_length
+    return np.array(records[start:start + count * np.dtype(dtype).itemsize].view(dtype))
@@ -8,6 +8,8 @@ import os
 from aiida.parsers.parser import Parser
 from aiida.common.exceptions import NotExistent
 
+from aiida_vasp.parsers.file_parsers.parser import split_compression_suffix
+
 
 class BaseParser(Parser):
     """Does common tasks all parsers carry out and provides convenience methods."""
@@ -48,6 +50,12 @@ class BaseParser(Parser):
                 for retrieved_file in os.listdir(self._retrieved_temporary):
                     retrieved[retrieved_file] = {'path': self._retrieved_temporary, 'status': 'temporary'}
 
+        # Files retrieved compressed are known by their original names, the file parsers decompress them while reading.
+        for file_name in list(retrieved):
+            original_name, suffix = split_compression_suffix(file_name)
+            if suffix is not None and original_name not in retrieved:
+                retrieved[original_name] = dict(retrieved.pop(file_name), name=file_name)
+
         # Check if there are other files than the AiiDA generated scheduler files in retrieved and
         # if there are any files in the retrieved_temporary. If not, return an error.
         aiida_required_files = [self.node.get_attribute('scheduler_stderr'), self.node.get_attribute('scheduler_stdout')]
@@ -86,14 +94,17 @@ class BaseParser(Parser):
         """
         Convenient access to retrieved and retrieved_temporary files.
 
+        A file retrieved compressed is accessed by its original name, the path is the one of the compressed file.
+
         :param fname: name of the file
         :return: absolute path to the retrieved file
         """
 
         try:
+            stored_name = self._retrieved_content[fname].get('name', fname)
             if self._retrieved_content[fname]['status'] == 'permanent':
                 try:
-                    with self.retrieved.open(fname) as file_obj:
+                    with self.retrieved.open(stored_name) as file_obj:
                         ofname = file_obj.name
                     return ofname
                 except OSError:
@@ -101,7 +112,7 @@ class BaseParser(Parser):
                     return None
             else:
                 path = self._retrieved_content[fname]['path']
-                file_path = os.path.join(path, fname)
+                file_path = os.path.join(path, stored_name)
                 try:
                     with open(file_path, 'r') as file_obj:
                         ofname = file_path
@@ -111,3 +122,22 @@ class BaseParser(Parser):
                     return None
         except KeyError:
             return None
+
+    def _open_file(self, fname, mode='rb'):
+        """
+        Open a retrieved or retrieved_temporary file as a stream, without extracting its path first.
+
+        :param fname: name of the file, for a file retrieved compressed its original name
+        :return: a context manager giving a readable stream of the file, or None if there is no such file
+        """
+
+        if fname not in self._retrieved_content:
+            return None
+        stored_name = self._retrieved_content[fname].get('name', fname)
+        try:
+            if self._retrieved_content[fname]['status'] == 'permanent':
+                return self.retrieved.open(stored_name, mode=mode)
+            return open(os.path.join(self._retrieved_content[fname]['path'], stored_name), mode)
+        except OSError:
+            self.logger.warning(fname + ' could not be opened')
+            return None
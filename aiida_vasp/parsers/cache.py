@@ -0,0 +1,199 @@
+"""
+Parser cache.
+
+-------------
+An on-disk cache of parsed quantities, keyed by the content of the parsed files.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+import parsevasp
+
+import aiida_vasp
+
+# Default maximum size of the cache in MB.
+DEFAULT_MAX_SIZE = 1024
+HASH_BLOCK_SIZE = 1 << 20
+SUFFIX = '.npz'
+# The name of the entry holding the structure of a quantity, the arrays are stored as ``array_<index>``.
+STRUCTURE = 'structure'
+# Types stored as they are in the structure of a quantity.
+PLAIN_TYPES = (type(None), bool, int, float, str)
+# Parser settings that select what is parsed or how, but do not change the parsed quantities.
+IGNORED_SETTINGS = ['profile', 'parallel', 'cache', 'cache_max_size', 'array_storage', 'choose_cheapest_file', 'quantity_files']
+
+
+def get_default_cache_dir():
+    """Return the default cache directory, inside the AiiDA configuration folder."""
+    from aiida.manage.configuration.settings import AIIDA_CONFIG_FOLDER  # pylint: disable=import-outside-toplevel
+    return os.path.join(AIIDA_CONFIG_FOLDER, 'vasp_parser_cache')
+
+
+def file_hash(path):
+    """Return the sha256 hex digest of the content of a file."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as handler:
+        for block in iter(lambda: handler.read(HASH_BLOCK_SIZE), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def encode_quantity(quantity, arrays):
+    """
+    Return the structure of a quantity with basic types only, collecting its numpy arrays in arrays.
+
+    Each dict is stored as {'dict': [[key, value], ...]}, so the keys can be of any cacheable type, a tuple
+    as {'tuple': [...]}, an array as {'array': name} and a numpy scalar as {'scalar': name}.
+
+    :raises TypeError: If the quantity contains other types, e.g. AiiDA nodes or arrays of objects.
+    """
+    if isinstance(quantity, (np.ndarray, np.generic)):
+        array = np.asarray(quantity)
+        if array.dtype.hasobject:
+            raise TypeError('Arrays of objects can not be cached.')
+        name = 'array_{}'.format(len(arrays))
+        arrays[name] = array
+        return {'array' if isinstance(quantity, np.ndarray) else 'scalar': name}
+    if type(quantity) in PLAIN_TYPES:  # pylint: disable=unidiomatic-typecheck
+        return quantity
+    if isinstance(quantity, list):
+        return [encode_quantity(item, arrays) for item in quantity]
+    if isinstance(quantity, tuple):
+        return {'tuple': [encode_quantity(item, arrays) for item in quantity]}
+    if isinstance(quantity, dict):
+        return {'dict': [[encode_quantity(key, arrays), encode_quantity(value, arrays)] for key, value in quantity.items()]}
+    raise TypeError('Quantities of type {} can not be cached.'.format(type(quantity).__name__))
+
+
+def decode_quantity(structure, arrays):
+    """Return the quantity from its structure and arrays, see ``encode_quantity``."""
+    if isinstance(structure, list):
+        return [decode_quantity(item, arrays) for item in structure]
+    if not isinstance(structure, dict):
+        return structure
+    if 'dict' in structure:
+        return {decode_quantity(key, arrays): decode_quantity(value, arrays) for key, value in structure['dict']}
+    if 'tuple' in structure:
+        return tuple(decode_quantity(item, arrays) for item in structure['tuple'])
+    if 'array' in structure:
+        return arrays[structure['array']]
+    return arrays[structure['scalar']][()]
+
+
+class QuantityCache(object):  # pylint: disable=useless-object-inheritance
+    """
+    Parsed quantities stored on disk, so that a file is not parsed again when the same calculation is reparsed.
+
+    Each quantity is stored in its own file, named by a hash of the content of the parsed file, the file parser class,
+    the versions of aiida-vasp and parsevasp, the parser settings that may change the result, the INCAR parameters
+    given to the file parsers and the quantity key. Reparsing with other output nodes requested therefore reuses the
+    quantities that were already parsed. Only quantities made of numpy arrays, dicts, lists, tuples and scalars are
+    stored, the arrays as ``.npy`` entries of an ``.npz`` file and the rest as JSON, so nothing is unpickled when
+    loading an entry. Other quantities, e.g. the nodes of CHGCAR and WAVECAR, are always parsed. When the cache grows
+    beyond ``max_size`` MB, the least recently used entries are removed by ``evict``.
+
+    :param directory: The cache directory, created if it does not exist.
+    :param max_size: The maximum size of the cache in MB.
+    :param settings: The ``ParserSettings`` or a dict with the parser settings. The ``add_<node_name>`` settings and the
+        ``IGNORED_SETTINGS`` are not part of the keys.
+    :param incar: The INCAR parameters given to the file parsers, e.g. the run status from OSZICAR depends on NSW.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE, settings=None, incar=None):
+        self._directory = directory
+        self._max_size = max_size * 1024 * 1024
+        relevant_settings = {
+            key: value for key, value in (settings or {}).items() if not key.startswith('add_') and key not in IGNORED_SETTINGS
+        }
+        self._inputs = json.dumps([relevant_settings, incar], sort_keys=True, default=str)
+        self._file_hashes = {}
+        self._stored = False
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def get_key(self, file_path, parser_class, quantity_key):
+        """Return the key of a quantity parsed by parser_class from the file at file_path."""
+        if file_path not in self._file_hashes:
+            self._file_hashes[file_path] = file_hash(file_path)
+        key = [
+            self._file_hashes[file_path], parser_class.__module__ + '.' + parser_class.__name__, aiida_vasp.__version__,
+            parsevasp.__version__, self._inputs, quantity_key
+        ]
+        return hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Load a quantity from the cache.
+
+        :return: A tuple (found, quantity).
+        """
+        path = self._get_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as content:
+                arrays = {name: content[name] for name in content.files if name != STRUCTURE}
+                quantity = decode_quantity(json.loads(str(content[STRUCTURE])), arrays)
+        except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+            return False, None
+        try:
+            # Mark the entry as recently used.
+            os.utime(path)
+        except OSError:
+            pass
+        return True, quantity
+
+    def put(self, key, quantity):
+        """Store a quantity in the cache, quantities of other types than the ones listed in ``encode_quantity`` are not stored."""
+        arrays = {}
+        try:
+            structure = json.dumps(encode_quantity(quantity, arrays))
+        except TypeError:
+            return
+        # Write to a temporary file first, so other processes never read a partially written entry.
+        temp_path = None
+        try:
+            handle, temp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+            with os.fdopen(handle, 'wb') as handler:
+                np.savez(handler, **{STRUCTURE: np.array(structure)}, **arrays)
+            os.replace(temp_path, self._get_path(key))
+        except OSError:
+            # A full disk or a cache directory that became unavailable must not fail the parsing.
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return
+        self._stored = True
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits into the maximum size, if anything was stored."""
+        if not self._stored:
+            return
+        self._stored = False
+        entries = []
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(SUFFIX):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+
+    def _get_path(self, key):
+        return os.path.join(self._directory, key + SUFFIX)
@@ -4,24 +4,58 @@ CHGCAR parser.
 --------------
 The file parser that handles the parsing of CHGCAR files.
 """
+# pylint: disable=protected-access
+import os
+import sys
+import tempfile
+import weakref
+from itertools import islice
+
+import numpy as np
 
 from aiida_vasp.parsers.file_parsers.parser import BaseFileParser
 from aiida_vasp.parsers.node_composer import NodeComposer, get_node_composer_inputs_from_file_parser
 
+# The names of the grids by their number, e.g. the density and the magnetization density of a spin polarized run.
+GRID_NAMES = {
+    1: ['total'],
+    2: ['total', 'magnetization'],
+    4: ['total', 'magnetization_x', 'magnetization_y', 'magnetization_z'],
+}
+# The number of lines of a grid converted at once, which limits the memory needed for the text.
+CHUNK_LINES = 100000
+
 
 class ChgcarParser(BaseFileParser):
-    """Add CHGCAR as a single file node."""
+    """
+    Add CHGCAR as a single file node, and read its grids.
+
+    The grids are read from files in the layout of CHGCAR, which is shared by LOCPOT, ELFCAR, CHG and PARCHG.
+    The header with the structure, and the augmentation occupancies and magnetic moments written after
+    each grid are skipped. Each grid is returned as an array of shape ``(NGXF, NGYF, NGZF)``, in the units
+    of the file, e.g. the density multiplied by the volume of the cell for CHGCAR. The grids are written
+    chunk by chunk to temporary ``.npy`` files and returned memory-mapped, so a grid is never held in memory
+    as a whole. The temporary file of a grid is removed when the grid is garbage collected.
+    """
 
     PARSABLE_ITEMS = {
         'chgcar': {
             'inputs': [],
             'name': 'chgcar',
-            'prerequisites': []
+            'prerequisites': [],
+            'cacheable': False,
+        },
+        'grids': {
+            'inputs': [],
+            'name': 'grids',
+            'prerequisites': [],
+            'cacheable': False,
         },
     }
 
     def __init__(self, *args, **kwargs):
         super(ChgcarParser, self).__init__(*args, **kwargs)
+        self._exit_codes = kwargs.get('exit_codes', None)
         self._chgcar = None
 
     def _parse_file(self, inputs):
@@ -37,9 +71,95 @@ class ChgcarParser(BaseFileParser):
 
         return result
 
+    def _parse_quantity(self, quantity_key):
+        if quantity_key == 'grids':
+            return self.grids
+        return super(ChgcarParser, self)._parse_quantity(quantity_key)
+
     @property
     def chgcar(self):
         if self._chgcar is None:
-            inputs = get_node_composer_inputs_from_file_parser(file_parser=self)
+            inputs = get_node_composer_inputs_from_file_parser(file_parser=self, quantity_keys=['chgcar'])
             self._chgcar = NodeComposer.compose('vasp.chargedensity', inputs)
         return self._chgcar
+
+    @property
+    def grids(self):
+        """Read the grids, a dict with the names in ``GRID_NAMES`` as keys."""
+        grids = []
+        with self._data_obj.open() as handler:
+            # The header ends with an empty line after the positions, the first line is the comment.
+            handler.readline()
+            for line in handler:
+                if not line.strip():
+                    break
+            shape_line = handler.readline()
+            try:
+                shape = tuple(int(size) for size in shape_line.split())
+            except ValueError:
+                shape = ()
+            while len(shape) == 3:
+                grids.append(_read_grid(handler, shape, _get_temporary_npy_file()))
+                if grids[-1] is None:
+                    break
+                # Skip the augmentation occupancies and magnetic moments up to the shape of the next grid.
+                for line in handler:
+                    if line.split() == shape_line.split():
+                        break
+                else:
+                    break
+        if len(grids) not in GRID_NAMES or grids[-1] is None:
+            if self._exit_codes is not None:
+                self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+        return dict(zip(GRID_NAMES[len(grids)], grids))
+
+
+def _get_temporary_npy_file():
+    """Return the path of a new temporary .npy file."""
+    handle, path = tempfile.mkstemp(suffix='.npy')
+    os.close(handle)
+    return path
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _read_grid(handler, shape, path):
+    """
+    Read a grid, which is written with x running fastest, into a Fortran ordered .npy file of the given shape.
+
+    :return: The grid memory-mapped read-only from the file at path, which is removed when the grid is garbage collected,
+        or None if the grid is incomplete, the file is then removed right away.
+    """
+    size = int(np.prod(shape))
+    first_line = np.fromstring(handler.readline(), sep=' ')
+    if not first_line.size or first_line.size > size:
+        _remove_file(path)
+        return None
+    grid = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape, fortran_order=True)
+    # A flat view of the Fortran ordered grid, in the order the values are written.
+    values = grid.reshape(size, order='F')
+    values[:first_line.size] = first_line
+    # The remaining lines hold the same number of values as the first one.
+    num_lines = -(-(size - first_line.size) // first_line.size)
+    position = first_line.size
+    while num_lines > 0:
+        chunk = np.fromstring(''.join(islice(handler, min(num_lines, CHUNK_LINES))), sep=' ')
+        if not chunk.size or position + chunk.size > size:
+            break
+        values[position:position + chunk.size] = chunk
+        position += chunk.size
+        num_lines -= CHUNK_LINES
+    grid.flush()
+    del grid, values
+    if position != size:
+        _remove_file(path)
+        return None
+    grid = np.load(path, mmap_mode='r')
+    weakref.finalize(grid, _remove_file, path)
+    return grid
@@ -10,22 +10,25 @@ import numpy as np
 from aiida_vasp.parsers.node_composer import NodeComposer, get_node_composer_inputs_from_file_parser
 from aiida_vasp.parsers.file_parsers.parser import BaseFileParser
 
+ORBITALS_D = ['s', 'py', 'px', 'pz', 'dxy', 'dyz', 'dz2', 'dxz', 'x2-y2']
+ORBITALS_F = ORBITALS_D + ['fy3x2', 'fxyz', 'fyz2', 'fz3', 'fxz2', 'fzx2', 'fx3']
+
+
+def _orbital_dtype(orbitals, num_components):
+    """Return the dtype of a pdos row with one column per orbital and spin (or non-collinear) component."""
+    shape = (num_components,) if num_components > 1 else ()
+    return np.dtype([('energy', float)] + [(orbital, float, shape) for orbital in orbitals])
+
+
 # Map from number of columns in DOSCAR to dtype.
 DTYPES = {
-    3:
-        np.dtype([('energy', float), ('total', float), ('integrated', float)]),
-    5:
-        np.dtype([('energy', float), ('total', float, (2,)), ('integrated', float, (2,))]),
-    10:
-        np.dtype([('energy', float), ('s', float), ('py', float), ('px', float), ('pz', float), ('dxy', float), ('dyz', float),
-                  ('dz2', float), ('dxz', float), ('x2-y2', float)]),
-    19:
-        np.dtype([('energy', float), ('s', float, (2,)), ('py', float, (2,)), ('px', float, (2,)), ('pz', float, (2,)),
-                  ('dxy', float, (2,)), ('dyz', float, (2,)), ('dz2', float, (2,)), ('dxz', float, (2,)), ('x2-y2', float, (2,))]),
-    37:
-        np.dtype([('energy', float), ('s', float, (4,)), ('py', float, (4,)), ('px', float, (4,)), ('pz', float, (4,)),
-                  ('dxy', float, (4,)), ('dyz', float, (4,)), ('dz2', float, (4,)), ('dxz', float, (4,)), ('x2-y2', float, (4,))])
+    3: np.dtype([('energy', float), ('total', float), ('integrated', float)]),
+    5: np.dtype([('energy', float), ('total', float, (2,)), ('integrated', float, (2,))]),
 }
+# lm-decomposed pdos up to d and f orbitals, for non spin polarized, spin polarized and non-collinear runs.
+for _orbitals in (ORBITALS_D, ORBITALS_F):
+    for _num_components in (1, 2, 4):
+        DTYPES[1 + len(_orbitals) * _num_components] = _orbital_dtype(_orbitals, _num_components)
 
 
 class DosParser(BaseFileParser):
@@ -67,7 +70,7 @@ class DosParser(BaseFileParser):
     def _read_doscar(self):
         """Read a VASP DOSCAR file and extract metadata and a density of states data array."""
 
-        with open(self._data_obj.path) as dos:
+        with self._data_obj.open() as dos:
             num_ions, num_atoms, p00, p01 = self.line(dos, int)
             line_0 = self.line(dos, float)
             line_1 = self.line(dos, float)
@@ -76,37 +79,22 @@ class DosParser(BaseFileParser):
             line_2 = self.line(dos, float)
             emax, emin, ndos, efermi, weight = line_2
             ndos = int(ndos)
-            raw = self.splitlines(dos)
+            first_row = dos.readline()
+            # All the numbers following the header are read into a single buffer in one pass.
+            data = np.fromstring(first_row + dos.read(), sep=' ')
 
         # Get the number of columns for the tdos section.
-        count = len(raw[ndos - 1])
-
-        num_spin = 1
-        if count == 5:
-            num_spin = 2
-        if count == 9:
-            num_spin = 4
-
-        tdos_raw = np.array(raw[:ndos])
-        tdos = np.zeros((tdos_raw.shape[0]), DTYPES[count])
-        tdos['energy'] = tdos_raw[:, 0]
-        for i, name in enumerate(DTYPES[count].names[1:]):
-            tdos[name] = np.squeeze(tdos_raw[:, i + 1:i + 1 + num_spin], axis=1)
-
-        pdos = []
-        if line_2 in raw:
-            for _ in range(num_ions):
-                start = raw.index(line_2) + 1
-                pdos += [raw[start:start + ndos]]
-
-            # Get the number of columns for the pdos section.
-            count = len(pdos[-1][-1])
-            pdos_raw = np.array(pdos)
-
-            pdos = np.zeros((pdos_raw.shape[0], pdos_raw.shape[1]), DTYPES[count])
-            pdos['energy'] = pdos_raw[:, :, 0]
-            for i, name in enumerate(DTYPES[count].names[1:]):
-                pdos[name] = np.squeeze(pdos_raw[:, :, i + 1:i + 1 + num_spin], axis=2)
+        count = len(first_row.split())
+        tdos = _block_view(data, DTYPES[count], 0, (ndos,), (count,))
+
+        # Each ion block repeats the header line before its ndos rows.
+        pdos = np.zeros((0, ndos), DTYPES[count])
+        offset = ndos * count
+        if num_ions and data.size > offset:
+            block_size = (data.size - offset) // num_ions
+            count = (block_size - len(line_2)) // ndos
+            if count in DTYPES and block_size * num_ions == data.size - offset:
+                pdos = _block_view(data, DTYPES[count], offset + len(line_2), (num_ions, ndos), (block_size, count))
 
         header = {}
         header[0] = line_0
@@ -132,3 +120,12 @@ class DosParser(BaseFileParser):
             inputs = get_node_composer_inputs_from_file_parser(self, quantity_keys=['doscar-dos'])
             self._dos = NodeComposer.compose('array', inputs)
         return self._dos
+
+
+def _block_view(data, dtype, offset, shape, strides):
+    """Return a structured view into the flat DOSCAR buffer, with the offset and strides given in numbers."""
+    return np.ndarray(shape,
+                      dtype=dtype,
+                      buffer=data,
+                      offset=offset * data.itemsize,
+                      strides=[stride * data.itemsize for stride in strides])
@@ -5,8 +5,6 @@ EIGENVAL parser.
 The file parser that handles the parsing of EIGENVAL files.
 """
 
-import re
-
 import numpy as np
 
 from aiida_vasp.parsers.file_parsers.parser import BaseFileParser
@@ -21,6 +19,11 @@ class EigParser(BaseFileParser):
             'name': 'eigenvalues',
             'prerequisites': [],
         },
+        'eigenval-occupancies': {
+            'inputs': [],
+            'name': 'occupancies',
+            'prerequisites': [],
+        },
         'eigenval-kpoints': {
             'inputs': ['structure'],
             'name': 'kpoints',
@@ -38,10 +41,11 @@ class EigParser(BaseFileParser):
         result = inputs.get('settings', {})
         result = {}
 
-        header, kpoints, bands = self._read_eigenval()
+        header, kpoints, bands, occupations = self._read_eigenval()
         result['header'] = header
         result['eigenval-eigenvalues'] = bands
-        result['eigenval-kpoints'] = kpoints
+        result['eigenval-occupancies'] = occupations
+        result['eigenval-kpoints'] = {'mode': 'explicit', 'points': kpoints[:, :3], 'weights': kpoints[:, 3], 'cartesian': False}
 
         return result
 
@@ -49,25 +53,25 @@ class EigParser(BaseFileParser):
     def _read_eigenval(self):
         """Parse a VASP EIGENVAL file and extract metadata and a band structure data array."""
 
-        with open(self._data_obj.path) as eig:
+        with self._data_obj.open() as eig:
             line_0 = self.line(eig, int)  # read header
             line_1 = self.line(eig, float)  # "
             line_2 = self.line(eig, float)  # "
             coord_type = self.line(eig)  # "
             name = self.line(eig)  # read name line (can be empty)
             param_0, num_kp, num_bands = self.line(eig, int)  # read: ? #kp #bands
-            data = eig.read()  # rest is data
+            data = np.fromstring(eig.read(), sep=' ')  # rest is data, read in one pass
         num_ions, num_atoms, p00, num_spins = line_0
-        data = re.split(self.empty_line, data)  # list of data blocks
-        data = [[line.split() for line in block.splitlines()] for block in data]
-        kpoints = np.zeros((num_kp, 4))
-        bands = np.zeros((num_spins, num_kp, num_bands))
-        for k, field in enumerate(data):  # iterate over data blocks
-            kpbs = [x for x in field if x]  # throw away empty lines
-            kpi = [float(x) for x in kpbs.pop(0)]  # first line of block is kpoints -> pop
-            kpoints[k] = kpi
-            for point in kpbs:  # rest are band energies
-                bands[:, k, int(point[0]) - 1] = point[1:num_spins + 1]  # place energy value in bands[kp, nb] (BandstrucureData format)
+        # Each k-point block holds the k-point and its weight, followed by one row per band with the band index,
+        # the energy of each spin and, for newer VASP versions, the occupation of each spin.
+        num_columns = (data.size // num_kp - 4) // num_bands
+        blocks = data[:num_kp * (4 + num_bands * num_columns)].reshape(num_kp, -1)
+        kpoints = blocks[:, :4]
+        rows = blocks[:, 4:].reshape(num_kp, num_bands, num_columns)
+        bands = rows[:, :, 1:1 + num_spins].transpose(2, 0, 1)  # bands[spin, kp, nb] (BandstrucureData format)
+        occupations = None
+        if num_columns == 1 + 2 * num_spins:
+            occupations = rows[:, :, 1 + num_spins:].transpose(2, 0, 1)
         header = {}  # build header dict
         header[0] = line_0
         header[1] = line_1
@@ -82,4 +86,4 @@ class EigParser(BaseFileParser):
         header['n_bands'] = num_bands
         header['n_kp'] = num_kp
 
-        return header, kpoints, bands
+        return header, kpoints, bands, occupations
@@ -5,7 +5,9 @@ KPOINTS parser.
 The file parser that handles the parsing of KPOINTS files.
 """
 # pylint: disable=no-self-use
+from itertools import islice
 
+import numpy as np
 from parsevasp.kpoints import Kpoints, Kpoint
 from aiida_vasp.parsers.file_parsers.parser import BaseFileParser
 from aiida_vasp.parsers.node_composer import NodeComposer, get_node_composer_inputs_from_file_parser
@@ -101,8 +103,12 @@ class KpointsParser(BaseFileParser):
         if isinstance(self._data_obj, get_data_class('array.kpoints')):
             return {'kpoints-kpoints': self._data_obj}
 
+        explicit_kpoints = self._read_explicit_kpoints()
+        if explicit_kpoints is not None:
+            return {'kpoints-kpoints': explicit_kpoints}
+
         try:
-            parsed_kpoints = Kpoints(file_path=self._data_obj.path, logger=self._logger)
+            parsed_kpoints = Kpoints(file_path=self._data_obj.local_path, logger=self._logger)
         except SystemExit:
             self._logger.warning('Parsevasp exitited abnormally. Returning None.')
             return {'kpoints-kpoints': None}
@@ -114,6 +120,28 @@ class KpointsParser(BaseFileParser):
 
         return result
 
+    def _read_explicit_kpoints(self):
+        """
+        Read an explicit list of k-points, e.g. IBZKPT, into the arrays of the points and the weights.
+
+        Returns None for the automatic and line modes and for lists with more than the coordinates and
+        the weight on each line, which are read by parsevasp instead.
+        """
+        with self._data_obj.open() as handler:
+            handler.readline()
+            try:
+                num_kpoints = int(handler.readline().split()[0])
+            except (IndexError, ValueError):
+                return None
+            style = handler.readline().strip()
+            if num_kpoints <= 0 or not style or style[0] in 'lL':
+                return None
+            values = np.fromstring(''.join(islice(handler, num_kpoints)), sep=' ')
+        if values.size != 4 * num_kpoints:
+            return None
+        values = values.reshape(num_kpoints, 4)
+        return {'mode': 'explicit', 'points': values[:, :3], 'weights': values[:, 3], 'cartesian': style[0] in 'cCkK'}
+
     @property
     def kpoints(self):
         if self._kpoints is None:
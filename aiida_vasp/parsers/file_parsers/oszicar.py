@@ -0,0 +1,183 @@
+"""
+OSZICAR parser.
+
+---------------
+The file parser that handles the parsing of OSZICAR files.
+"""
+# pylint: disable=protected-access
+import re
+import sys
+
+import numpy as np
+
+from aiida_vasp.parsers.file_parsers.parser import BaseFileParser
+
+DEFAULT_OPTIONS = {'energy_type': ['energy_extrapolated'], 'electronic_step_energies': False}
+# Defaults of VASP for the INCAR tags the run status depends on.
+DEFAULT_INCAR = {'nelm': 60, 'nsw': 0}
+# The total energy types that are written for each ionic step, by the label they are written with.
+IONIC_ENERGIES = {'energy_free': 'F', 'energy_extrapolated': 'E0'}
+# The total energy types that are written for each electronic step, the column E holds the free energy.
+ELECTRONIC_ENERGIES = ['energy_free']
+
+ELECTRONIC_STEP = re.compile(r'^\s*[A-Z]{2,3}\s*:\s*\d+\s+(\S+)')
+IONIC_STEP = re.compile(r'^\s*\d+\s+(?:F|T)=')
+IONIC_VALUE = re.compile(r'(\w+)=\s*(\S+)')
+# The first lines of the sections written after the ionic steps, whose electronic steps are not part of an ionic step.
+OTHER_SECTION = re.compile(r'^\s*Linear response')
+
+
+class OszicarParser(BaseFileParser):
+    """
+    Parser for the energies of the electronic and ionic steps in OSZICAR.
+
+    OSZICAR is a small file, which makes it a cheap alternative to vasprun.xml when only the total energies
+    or the run status are needed. The free energy is available for every electronic step, but only the
+    free and the extrapolated energy of each ionic step, with eight significant digits.
+
+    The run status requires the NELM and NSW tags of the calculation, given as the ``incar`` keyword.
+    Electronic steps after the last ionic step mark a run that was killed, unless they belong to
+    a following section, e.g. the linear response steps for ``LEPSILON``. A run killed after an ionic
+    step, or while writing the other output files, can not be told apart from a finished one. The run
+    status is therefore only taken from OSZICAR when it is pinned to it with ``quantity_files``.
+    """
+
+    PARSABLE_ITEMS = {
+        'oszicar-energies': {
+            'inputs': [],
+            'name': 'energies',
+            'prerequisites': [],
+        },
+        'oszicar-total_energies': {
+            'inputs': [],
+            'name': 'total_energies',
+            'prerequisites': [],
+        },
+        'oszicar-run_status': {
+            'inputs': [],
+            'name': 'run_status',
+            'prerequisites': [],
+            # A run killed after an ionic step or while writing the other files looks finished in OSZICAR.
+            'pinned_only': True,
+        },
+    }
+
+    def __init__(self, *args, **kwargs):
+        super(OszicarParser, self).__init__(*args, **kwargs)
+        self._settings = kwargs.get('settings', None)
+        self._exit_codes = kwargs.get('exit_codes', None)
+        self._incar = kwargs.get('incar', None)
+
+    def _parse_file(self, inputs):
+        """Parse all quantities of OSZICAR."""
+        return {quantity_key: self._evaluate(quantity_key) for quantity_key in self._parsable_items}
+
+    def _parse_quantity(self, quantity_key):
+        return getattr(self, quantity_key.split('-')[-1])
+
+    def _get_setting(self, key):
+        if self._settings is None:
+            return DEFAULT_OPTIONS[key]
+        return self._settings.get(key, DEFAULT_OPTIONS[key])
+
+    def _set_error(self, quantity):
+        if self._exit_codes is not None:
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=quantity)
+
+    @property
+    def steps(self):
+        """
+        Read the energies of the electronic and ionic steps.
+
+        :return: A dict with the electronic step energies, the number of electronic steps and the values written
+            for each ionic step by their label, and whether the last electronic steps are not followed by an ionic step.
+        """
+        electronic_energies = []
+        electronic_steps = []
+        ionic_values = []
+        num_pending = 0
+        in_other_section = False
+        with self._data_obj.open() as handler:
+            for line in handler:
+                if IONIC_STEP.match(line):
+                    values = dict(IONIC_VALUE.findall(line.replace('d E =', 'dE=')))
+                    ionic_values.append({key: float(value) for key, value in values.items() if key in IONIC_ENERGIES.values()})
+                    electronic_steps.append(num_pending)
+                    num_pending = 0
+                    in_other_section = False
+                    continue
+                match = ELECTRONIC_STEP.match(line)
+                if match:
+                    if not in_other_section:
+                        electronic_energies.append(float(match.group(1)))
+                        num_pending += 1
+                elif OTHER_SECTION.match(line):
+                    # Other lines, e.g. of the line search for IBRION=1/2, are written between the ionic steps.
+                    in_other_section = True
+        # The steps of an ionic step that was not completed are discarded.
+        num_completed = len(electronic_energies) - num_pending
+        return {
+            'electronic_energies': np.array(electronic_energies[:num_completed]),
+            'electronic_steps': np.array(electronic_steps, dtype=int),
+            'ionic_values': ionic_values,
+            'unfinished': num_pending > 0,
+        }
+
+    @property
+    def energies(self):
+        """Fetch the total energies, in the layout of ``VasprunParser.energies``."""
+        steps = self._evaluate('steps')
+        nosc = not self._get_setting('electronic_step_energies')
+        if not steps['ionic_values']:
+            self._set_error(sys._getframe().f_code.co_name)
+            return None
+        electronic_steps = steps['electronic_steps']
+        energies = {}
+        for etype in self._get_setting('energy_type'):
+            label = IONIC_ENERGIES.get(etype)
+            if label is None or (not nosc and etype not in ELECTRONIC_ENERGIES):
+                # Only available in vasprun.xml.
+                self._set_error(sys._getframe().f_code.co_name)
+                return None
+            final = np.array([values[label] for values in steps['ionic_values']])
+            if etype in ELECTRONIC_ENERGIES and electronic_steps.all():
+                scstep_energies = steps['electronic_energies']
+                if nosc:
+                    scstep_energies = scstep_energies[np.cumsum(electronic_steps) - 1]
+            else:
+                scstep_energies = final
+            energies[etype + '_final'] = final
+            energies[etype] = scstep_energies
+        energies['electronic_steps'] = np.ones(electronic_steps.shape, dtype=int) if nosc else electronic_steps
+        return energies
+
+    @property
+    def total_energies(self):
+        """Fetch the total energies after the last ionic step."""
+        energies = self._evaluate('energies')
+        if energies is None:
+            self._set_error(sys._getframe().f_code.co_name)
+            return None
+        return {etype: energies[etype][-1] for etype in self._get_setting('energy_type')}
+
+    @property
+    def run_status(self):
+        """Fetch run_status information, see ``VasprunParser.run_status``."""
+        if self._incar is None:
+            self._set_error(sys._getframe().f_code.co_name)
+            return None
+        nelm = self._incar.get('nelm', DEFAULT_INCAR['nelm'])
+        nsw = self._incar.get('nsw', DEFAULT_INCAR['nsw'])
+        steps = self._evaluate('steps')
+        sc_steps = steps['electronic_steps']
+        info = {'finished': not steps['unfinished']}
+        if not sc_steps.size:
+            info['electronic_converged'] = False
+            info['ionic_converged'] = False
+        else:
+            info['electronic_converged'] = bool(sc_steps[-1] < nelm) and info['finished']
+            info['ionic_converged'] = len(sc_steps) <= nsw and info['finished']
+        # Override if nsw is 0 - no ionic steps are performed
+        if nsw < 1:
+            info['ionic_converged'] = None
+        return info
@@ -77,19 +77,21 @@ class OutcarParser(BaseFileParser):
         self._settings = kwargs.get('settings', None)
         if 'file_path' in kwargs:
             self._init_outcar(kwargs['file_path'])
+        if 'file_handler' in kwargs:
+            self._init_outcar(handler=kwargs['file_handler'])
         if 'data' in kwargs:
             self._init_outcar(kwargs['data'].get_file_abs_path())
 
-    def _init_outcar(self, path):
-        """Init with a filepath."""
+    def _init_outcar(self, path=None, handler=None):
+        """Init with a filepath or a stream."""
         self._parsed_data = {}
         self._parsable_items = self.__class__.PARSABLE_ITEMS
-        self._data_obj = SingleFile(path=path)
+        self._data_obj = SingleFile(path=path, handler=handler)
 
         # Since OUTCAR can be fairly large, we will parse it only
         # once and store the parsevasp Outcar object.
         try:
-            self._outcar = Outcar(file_path=path, logger=self._logger)
+            self._outcar = Outcar(file_path=self._data_obj.local_path, logger=self._logger)
         except SystemExit:
             self._logger.warning('Parsevasp exited abruptly. Returning None.')
             self._outcar = None
@@ -106,20 +108,21 @@ class OutcarParser(BaseFileParser):
             quantities_to_parse = self._settings.quantity_names_to_parse
 
         result = {}
-
-        if self._outcar is None:
-            # parsevasp threw an exception, which means OUTCAR could not be parsed.
-            for quantity in quantities_to_parse:
-                if quantity in self.parsable_items:
-                    result[quantity] = None
-            return result
-
         for quantity in quantities_to_parse:
             if quantity in self.parsable_items:
-                result[quantity] = getattr(self, quantity)
+                result[quantity] = self._evaluate(quantity)
 
         return result
 
+    def _parse_quantity(self, quantity_key):
+        """Evaluate a single quantity."""
+
+        if self._outcar is None:
+            # parsevasp threw an exception, which means OUTCAR could not be parsed.
+            return None
+
+        return getattr(self, quantity_key)
+
     @property
     def run_stats(self):
         """Fetch the run statistics"""
@@ -128,7 +131,7 @@ class OutcarParser(BaseFileParser):
     @property
     def symmetries(self):
         """Fetch the symmetries, but only the point group (if it exists)."""
-        extended = self.symmetries_extended
+        extended = self._evaluate('symmetries_extended')
         sym = {
             'point_group': extended['point_group'],
             'primitive_translations': extended['primitive_translations'],
@@ -153,7 +156,7 @@ class OutcarParser(BaseFileParser):
     @property
     def magnetization(self):
         """Fetch the full cell magnetization."""
-        return self._outcar.get_magnetization()['full_cell']
+        return self._evaluate('site_magnetization')['full_cell']
 
     @property
     def site_magnetization(self):
@@ -231,7 +234,7 @@ class LegacyOutcarParser(BaseFileParser):
         energy_free = []
         energy_zero = []
         symmetries = {}
-        with open(self._data_obj.path, 'r') as outcar_file_object:
+        with self._data_obj.open() as outcar_file_object:
             for line in outcar_file_object:
                 # volume
                 if line.rfind('volume of cell :') > -1:
@@ -0,0 +1,401 @@
+"""
+Streaming OUTCAR parser.
+
+------------------------
+Alternative backend for OUTCAR files of long runs, which only reads the parts of the file
+the requested quantities are taken from, instead of loading all lines into memory.
+"""
+# pylint: disable=protected-access
+import copy
+import re
+import mmap
+
+import numpy as np
+
+from parsevasp.outcar import Outcar
+from aiida_vasp.parsers.file_parsers.parser import SingleFile
+from aiida_vasp.parsers.file_parsers.outcar import OutcarParser
+
+# The sections of OUTCAR each quantity is read from.
+QUANTITY_SECTIONS = {
+    'symmetries': ['symmetry'],
+    'symmetries_extended': ['symmetry'],
+    'elastic_moduli': ['elastic_moduli'],
+    'magnetization': ['magnetization'],
+    'site_magnetization': ['magnetization'],
+    'run_stats': ['run_stats'],
+}
+
+# With these IBRION, or with LEPSILON, the symmetry is analysed again for each displaced configuration,
+# otherwise the analysis is complete when the first ionic step starts.
+FINITE_DIFFERENCES_IBRION = [5, 6, 7, 8]
+
+# Size of the chunks the file is scanned in.
+CHUNK_SIZE = 1 << 23
+
+# Number of lines at the end of the file the run statistics are read from, as in parsevasp.
+RUN_STATS_LINES = 50
+
+# Size of the blocks the end of the file is read in.
+TAIL_SIZE = 1 << 15
+
+ORBITALS = {0: 's', 1: 'p', 2: 'd', 3: 'f'}
+
+
+class LineRule(object):  # pylint: disable=useless-object-inheritance
+    """
+    A handler for the lines starting with a given prefix, which is a regular expression if ``regex`` is True.
+
+    The handler is called with the matching line and the following lines, either a fixed number of them or,
+    if ``until`` is given, all lines up to the one ``until`` matches. It may return True to stop the scan.
+    """
+
+    def __init__(self, prefix, handler, num_lines=1, until=None, regex=False):
+        self.prefix = prefix
+        self.handler = handler
+        self.num_lines = num_lines
+        self.until = until
+        self.expression = prefix if regex else re.escape(prefix)
+
+    def block_end(self, buffer, start, eof):
+        """Return the end of the block of lines starting at start, or -1 if it continues after the buffer."""
+        end = start
+        for _ in range(self.num_lines):
+            end = buffer.find(b'\n', end) + 1
+            if not end:
+                return len(buffer) if eof else -1
+        if self.until is not None:
+            match = self.until.search(buffer, end)
+            if match is None:
+                return len(buffer) if eof else -1
+            end = match.end()
+        return end
+
+
+class OutcarScanner(object):  # pylint: disable=useless-object-inheritance
+    """
+    Read the quantities of an OUTCAR with as few passes over the file as possible.
+
+    The sections are read on demand with ``read``. Sections whose every occurrence is needed, like the symmetry,
+    are read with a single forward scan. All their line prefixes are combined into one compiled pattern, so only
+    the matching lines reach Python, and the scan stops as soon as the section is complete. Sections of which
+    only the last occurrence is needed are located from the end of the file.
+
+    The file is read from its path if it is stored uncompressed on disk, which allows locating the last
+    occurrences from the end of the file with mmap. Otherwise it is read from the stream returned by open_file,
+    e.g. a compressed file that is decompressed while it is read. The last occurrences are then kept while
+    scanning the whole file once.
+
+    The results are provided with the same getters and layout as parsevasp's Outcar.
+
+    :param path: The path of the uncompressed OUTCAR.
+    :param sections: The sections to read right away.
+    :param open_file: A callable returning a context manager that gives a seekable binary stream of the file, which
+        is read instead of the path if it is not given.
+    """
+
+    def __init__(self, path=None, sections=None, open_file=None):
+        self._path = path
+        self._open_file = open_file
+        self._sections_read = set()
+        self._config = ''
+        self._ibrion = None
+        self._lepsilon = False
+        self._data = {
+            'elastic_moduli': {
+                'non-symmetrized': None,
+                'symmetrized': None,
+                'total': None
+            },
+            'symmetry': {
+                'original_cell_type': {
+                    'static': [],
+                    'dynamic': []
+                },
+                'symmetrized_cell_type': {
+                    'static': [],
+                    'dynamic': []
+                },
+                'num_space_group_operations': {
+                    'static': [],
+                    'dynamic': []
+                },
+                'site_symmetry_at_origin': {
+                    'static': [],
+                    'dynamic': []
+                },
+                'primitive_translations': [],
+                'point_group': {
+                    'static': [],
+                    'dynamic': []
+                }
+            },
+            'magnetization': {
+                'sphere': {projection: {
+                    'site_moment': {},
+                    'total_magnetization': {}
+                } for projection in ['x', 'y', 'z']},
+                'full_cell': {},
+            },
+            'run_stats': {},
+        }
+        if sections:
+            self.read(sections)
+
+    @property
+    def sections_read(self):
+        return self._sections_read
+
+    def read(self, sections):
+        """Read the given sections, unless they have been read already."""
+        sections = [section for section in sections if section not in self._sections_read]
+        if not sections:
+            return
+        with open(self._path, 'rb') if self._path is not None else self._open_file() as handler:
+            for section in sections:
+                getattr(self, '_read_' + section)(handler)
+                self._sections_read.add(section)
+
+    def get_symmetry(self):
+        return self._data['symmetry']
+
+    def get_elastic_moduli(self):
+        return self._data['elastic_moduli']
+
+    def get_magnetization(self):
+        return self._data['magnetization']
+
+    def get_run_stats(self):
+        return self._data['run_stats']
+
+    def _read_symmetry(self, handler):
+        """Read all symmetry analyses, until the first ionic step for runs without finite differences."""
+        symmetry = self._data['symmetry']
+
+        def _set_config(config):
+
+            def _handler(_lines):
+                self._config = config
+
+            return _handler
+
+        def _configured(function):
+
+            def _handler(lines):
+                if self._config:
+                    function(self._config, lines)
+
+            return _handler
+
+        def _original_cell(config, lines):
+            if lines[1].strip():
+                symmetry['original_cell_type'][config].append('primitive cell')
+
+        def _primitive_cells(config, lines):
+            symmetry['original_cell_type'][config].append('{} primitive cells'.format(lines[0].split()[0]))
+
+        def _point_symmetry(config, lines):
+            symmetry['site_symmetry_at_origin'][config].append(lines[0].split()[7])
+            next_line = lines[1].split()
+            # Point group only available in recent versions
+            symmetry['point_group'][config].append(next_line[10] if next_line else None)
+            self._config = ''
+
+        def _ibrion(lines):
+            self._ibrion = int(lines[0].split()[2])
+
+        def _lepsilon(lines):
+            self._lepsilon = lines[0].split('=')[1].split()[0] == 'T'
+
+        def _ionic_step(_lines):
+            return self._ibrion is not None and self._ibrion not in FINITE_DIFFERENCES_IBRION and not self._lepsilon
+
+        rules = [
+            LineRule(b'Analysis of symmetry for initial positions (statically)', _set_config('static')),
+            LineRule(b'Analysis of symmetry for dynamics', _set_config('dynamic')),
+            LineRule(b'Subroutine PRICEL returns', _configured(_original_cell), num_lines=2),
+            LineRule(b'\\d+ primitive cells build up your supercell', _configured(_primitive_cells), regex=True),
+            LineRule(b'Routine SETGRP: Setting up the symmetry group for a',
+                     _configured(lambda config, lines: symmetry['symmetrized_cell_type'][config].append(lines[1].strip().lower())),
+                     num_lines=2),
+            LineRule(b'Subroutine GETGRP returns',
+                     _configured(lambda config, lines: symmetry['num_space_group_operations'][config].append(int(lines[0].split()[4])))),
+            LineRule(b'The \\w+ configuration has the point symmetry', _configured(_point_symmetry), num_lines=2, regex=True),
+            LineRule(b'Subroutine INISYM returns',
+                     lambda lines: symmetry['primitive_translations'].append(int(lines[2].split()[2])),
+                     num_lines=3),
+            LineRule(b'IBRION =', _ibrion),
+            LineRule(b'LEPSILON=', _lepsilon),
+            LineRule(b'-+ Iteration', _ionic_step, regex=True),
+        ]
+        self._scan(handler, rules)
+
+    def _read_elastic_moduli(self, handler):
+        """Read the last elastic moduli tensors."""
+        elastic_moduli = self._data['elastic_moduli']
+
+        def _tensor(key):
+
+            def _handler(lines):
+                elastic_moduli[key] = np.asarray([[float(item) for item in line.split()[1:]] for line in lines[3:9]])
+                return True
+
+            return _handler
+
+        self._scan_last(handler, [
+            LineRule(b'ELASTIC MODULI  (kBar)', _tensor('non_symmetrized'), num_lines=9),
+            LineRule(b'SYMMETRIZED ELASTIC MODULI', _tensor('symmetrized'), num_lines=9),
+            LineRule(b'TOTAL ELASTIC MODULI', _tensor('total'), num_lines=9),
+        ])
+
+    def _read_magnetization(self, handler):
+        """Read the last site projected magnetization and the last magnetization of the full cell."""
+        magnetization = self._data['magnetization']
+
+        def _site_moments(projection):
+
+            def _handler(lines):
+                moments = magnetization['sphere'][projection]
+                for line in lines[4:]:
+                    items = line.split()
+                    if not items:
+                        # Without a total line, the total is the moment of the single site.
+                        moments['total_magnetization'] = moments['site_moment'][list(moments['site_moment'].keys())[0]]
+                        break
+                    if line.strip().startswith('tot'):
+                        moments['total_magnetization'] = _orbital_moments(items)
+                        break
+                    if not line.strip().startswith('-'):
+                        moments['site_moment'][int(items[0])] = _orbital_moments(items)
+                return True
+
+            return _handler
+
+        def _full_cell(lines):
+            magnetization['full_cell'] = [float(value) for value in lines[0].split()[5:]]
+            return True
+
+        # The table ends with the total line, or a blank line if it has a single site.
+        table_end = re.compile(b'^[ \\t]*(tot[^\\n]*)?\\n', re.M)
+        rules = [
+            LineRule('magnetization ({})'.format(projection).encode(), _site_moments(projection), num_lines=4, until=table_end)
+            for projection in ['x', 'y', 'z']
+        ]
+        self._scan_last(handler, rules + [LineRule(b'number of electron', _full_cell)])
+
+    def _read_run_stats(self, handler):
+        """Read the run statistics from the end of the file, or keep the last lines while reading a stream."""
+        tail = b''
+        if self._path is None:
+            handler.seek(0)
+            for chunk in iter(lambda: handler.read(CHUNK_SIZE), b''):
+                tail = b'\n'.join((tail + chunk).split(b'\n')[-(RUN_STATS_LINES + 1):])
+        else:
+            position = handler.seek(0, 2)
+            while position > 0 and tail.count(b'\n') <= RUN_STATS_LINES:
+                step = min(position, TAIL_SIZE)
+                position -= step
+                handler.seek(position)
+                tail = handler.read(step) + tail
+        lines = tail.decode(errors='replace').splitlines(True)[-RUN_STATS_LINES:]
+        self._data['run_stats'] = Outcar._parse_timings_memory(lines)
+
+    @staticmethod
+    def _scan(handler, rules, start=0):
+        """Dispatch the blocks of lines matching the rules to their handlers, from start until a handler stops the scan."""
+        pattern = re.compile(b'^[ \\t]*(?:' + b'|'.join([b'(' + rule.expression + b')' for rule in rules]) + b')', re.M)
+        handler.seek(start)
+        buffer = b''
+        eof = False
+        while not eof:
+            chunk = handler.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer += chunk
+            limit = len(buffer) if eof else buffer.rfind(b'\n') + 1
+            position = limit
+            for match in pattern.finditer(buffer, 0, limit):
+                rule = rules[match.lastindex - 1]
+                end = rule.block_end(buffer, match.start(), eof)
+                if end < 0:
+                    # The block continues in the next chunk, so it is handled from there.
+                    position = match.start()
+                    break
+                lines = buffer[match.start():end].decode(errors='replace').split('\n')
+                if rule.handler(lines):
+                    return
+            buffer = buffer[position:]
+
+    def _scan_last(self, handler, rules):
+        """Hand the last block of lines matching each rule, which must have a literal prefix, to its handler."""
+        if self._path is None:
+            # Without random access, keep the last block of each rule while scanning the stream once.
+            last_blocks = [None] * len(rules)
+            self._scan(handler, [_keep_last_block(rule, last_blocks, index) for index, rule in enumerate(rules)])
+            for rule, lines in zip(rules, last_blocks):
+                if lines is not None:
+                    rule.handler(lines)
+            return
+        for rule in rules:
+            self._scan_last_mapped(handler, rule)
+
+    @classmethod
+    def _scan_last_mapped(cls, handler, rule):
+        """Hand the last block of lines matching rule to its handler, located from the end of the file with mmap."""
+        pattern = re.compile(b'^[ \\t]*' + rule.expression, re.M)
+        size = handler.seek(0, 2)
+        if not size:
+            return
+        with mmap.mmap(handler.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            end = size
+            while True:
+                index = content.rfind(rule.prefix, 0, end)
+                if index < 0:
+                    return
+                line_start = content.rfind(b'\n', 0, index) + 1
+                if pattern.match(content, line_start):
+                    break
+                end = index
+        cls._scan(handler, [rule], start=line_start)
+
+
+def _keep_last_block(rule, last_blocks, index):
+    """Return a copy of rule, whose handler stores the block of lines as last_blocks[index] instead."""
+    keeping_rule = copy.copy(rule)
+
+    def _handler(lines):
+        last_blocks[index] = lines
+
+    keeping_rule.handler = _handler
+    return keeping_rule
+
+
+def _orbital_moments(items):
+    """Return the moments of the orbitals and the total from a line of the magnetization table."""
+    moments = {ORBITALS[index]: float(value) for index, value in enumerate(items[1:-1])}
+    moments['tot'] = float(items[-1])
+    return moments
+
+
+class StreamingOutcarParser(OutcarParser):
+    """
+    Parse OUTCAR by reading only the sections the requested quantities are taken from.
+
+    Provides the same quantities as the OutcarParser. Each section of the file is read when the
+    first quantity depending on it is requested.
+    """
+
+    def _init_outcar(self, path=None, handler=None):
+        """Init with a filepath or a stream."""
+        self._parsed_data = {}
+        self._parsable_items = self.__class__.PARSABLE_ITEMS
+        self._data_obj = SingleFile(path=path, handler=handler)
+        self._outcar = OutcarScanner(self._data_obj.mappable_path, open_file=lambda: self._data_obj.open('rb'))
+
+    def _parse_quantity(self, quantity_key):
+        """Read the sections the quantity depends on and evaluate it."""
+        try:
+            self._outcar.read(QUANTITY_SECTIONS.get(quantity_key, []))
+        except (IOError, OSError, ValueError, IndexError) as error:
+            self._logger.warning('The OUTCAR could not be read: {error}. Returning None.'.format(error=error))
+            return None
+        return super(StreamingOutcarParser, self)._parse_quantity(quantity_key)
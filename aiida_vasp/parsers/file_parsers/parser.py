@@ -5,10 +5,99 @@ Base classes for the VASP file parsers.
 Contains the base classes for the VASP file parsers.
 """
 # pylint: disable=import-outside-toplevel
+import bz2
+import gzip
+import io
+import lzma
+import os
 import re
+import shutil
+import struct
+import tempfile
+from contextlib import contextmanager
 from aiida.common import AIIDA_LOGGER as aiidalogger
 from aiida_vasp.utils.delegates import delegate_method_kwargs
 
+# The functions opening files stored compressed, by the suffix added to their names.
+DECOMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+
+def split_compression_suffix(file_name):
+    """Return the original name of a file and the suffix of its compression, which is None if it is not compressed."""
+    for suffix in DECOMPRESSORS:
+        if file_name.endswith(suffix):
+            return file_name[:-len(suffix)], suffix
+    return file_name, None
+
+
+def open_file(path, mode='r'):
+    """Open a file for reading, a compressed file is decompressed while it is read."""
+    _, suffix = split_compression_suffix(str(path))
+    if suffix is None:
+        return open(path, mode)
+    return DECOMPRESSORS[suffix](path, mode if 'b' in mode else mode + 't')
+
+
+def get_uncompressed_size(handler, suffix=None):
+    """
+    Return the size of a file after decompression.
+
+    The size is taken from the trailer of a gzip file and from the index of a xz file, other compressed files
+    are decompressed to find it.
+
+    :param handler: A seekable binary stream of the file as it is stored.
+    :param suffix: The suffix of the compression of the file, None if it is not compressed.
+    """
+    if suffix == '.gz':
+        compressed_size = handler.seek(0, os.SEEK_END)
+        handler.seek(-4, os.SEEK_END)
+        size = struct.unpack('<I', handler.read(4))[0]
+        # The trailer holds the size modulo 2**32, the compressed file is the smaller one.
+        while size < compressed_size:
+            size += 2**32
+        return size
+    if suffix == '.xz':
+        size = _get_xz_size(handler)
+        if size is not None:
+            return size
+    if suffix is None:
+        return handler.seek(0, os.SEEK_END)
+    handler.seek(0)
+    with DECOMPRESSORS[suffix](handler, 'rb') as stream:
+        return stream.seek(0, os.SEEK_END)
+
+
+def _get_xz_size(handler):
+    """Return the sum of the uncompressed sizes in the index of the last stream of a xz file, None if it can not be read."""
+    handler.seek(-12, os.SEEK_END)
+    footer = handler.read(12)
+    if len(footer) < 12 or footer[10:] != b'YZ':
+        return None
+    index_size = (struct.unpack('<I', footer[4:8])[0] + 1) * 4
+    handler.seek(-12 - index_size, os.SEEK_END)
+    index = handler.read(index_size)
+    if index[:1] != b'\x00':
+        return None
+    # The index holds the number of blocks followed by the compressed and uncompressed size of each block.
+    integers = _read_multibyte_integers(index[1:])
+    try:
+        num_blocks = next(integers)
+        sizes = [next(integers) for _ in range(2 * num_blocks)]
+    except StopIteration:
+        return None
+    return sum(sizes[1::2])
+
+
+def _read_multibyte_integers(data):
+    """Yield the variable length integers of the xz format, seven bits per byte with the lowest ones first."""
+    value, shift = 0, 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            yield value
+            value, shift = 0, 0
+
 
 class BaseParser(object):  # pylint: disable=useless-object-inheritance
     """Common codebase for all parser utilities."""
@@ -47,19 +136,22 @@ class BaseFileParser(BaseParser):
           as the required information on how to extract those.
         - _parsed_data: a dictionary containing all the parsed data from this file.
         - get_quantity(): Method to be called by the VaspParser
-          which will either fill the _parsed_data in case that it is empty by calling _parse_file
-          or return the requested data from the _parsed_data. If another quantity is required as
-          prerequisite it will be requested from the VaspParser.
+          which will evaluate the requested quantity on first access by calling _parse_quantity
+          and store it in _parsed_data, or return the requested data from the _parsed_data. If another
+          quantity is required as prerequisite it will be requested from the VaspParser.
 
           This method will be subscribed to the VaspParsers get_quantity delegate during initialisation.
           When the VaspParser calls his delegate this method will be called and return the requested
           quantity.
-        _ _parse_file: an abstract method to be implemented by the actual file parser, which will
+        - _parse_file: an abstract method to be implemented by the actual file parser, which will
           parse the file and fill the _parsed_data dictionary.
+        - _parse_quantity: evaluates a single quantity. By default this parses the whole file once with
+          _parse_file. File parsers that can evaluate their quantities individually should override it.
 
         :param calc_parser_cls: Python class, optional, class of the calling CalculationParser instance
 
         :keyword file_path: Initialise with a path to a file. The file will be parsed by the FileParser
+        :keyword file_handler: Initialise with a readable binary stream of a file, e.g. opened from a repository.
         :keyword data: Initialise with an aiida data object. This may be SingleFileData, KpointsData or StructureData.
 
     Additional keyword arguments might be defined by the inheriting classes.
@@ -78,8 +170,11 @@ class BaseFileParser(BaseParser):
         self._exit_code = None
         self._parsable_items = self.PARSABLE_ITEMS
         self._parsed_data = {}
+        self._file_parsed = False
         if 'file_path' in kwargs:
             self._data_obj = SingleFile(path=kwargs['file_path'])
+        elif 'file_handler' in kwargs:
+            self._data_obj = SingleFile(handler=kwargs['file_handler'])
         elif 'data' in kwargs:
             self._data_obj = SingleFile(data=kwargs['data'])
         else:
@@ -97,15 +192,42 @@ class BaseFileParser(BaseParser):
         """
         Public method to get the required quantity from the _parsed_data dictionary if that exists.
 
-        Otherwise parse the file. This method will be registered to the VaspParsers get_quantities
-        delegate during __init__.
+        Otherwise evaluate the quantity. Results are memoized, also when they are None, so that each
+        quantity is evaluated at most once per file parser instance. This method will be registered
+        to the VaspParsers get_quantities delegate during __init__.
         """
 
         if quantity_key not in self._parsable_items:
             return None
 
-        if self._parsed_data.get(quantity_key) is None:
-            self._parsed_data = self._parse_file({})
+        return self._evaluate(quantity_key)
+
+    def _evaluate(self, name):
+        """
+        Evaluate a quantity, or an intermediate result other quantities depend on, and memoize it.
+
+        Quantities that depend on other quantities should fetch those through this method, so
+        that they reuse the already evaluated data instead of querying the file again.
+        """
+
+        if name not in self._parsed_data:
+            self._parsed_data[name] = self._parse_quantity(name)
+
+        return self._parsed_data[name]
+
+    def _parse_quantity(self, quantity_key):
+        """
+        Evaluate a single quantity.
+
+        The default implementation parses the whole file with _parse_file on the first request and
+        memoizes everything it returns. File parsers which can evaluate quantities individually should
+        override this to only do the work required for quantity_key.
+        """
+
+        if not self._file_parsed:
+            self._file_parsed = True
+            for key, value in self._parse_file({}).items():
+                self._parsed_data.setdefault(key, value)
 
         return self._parsed_data.get(quantity_key)
 
@@ -166,6 +288,9 @@ class SingleFile(object):  # pylint: disable=useless-object-inheritance
     """
     Datastructure for a singleFile file providing a write method.
 
+    The file is given by a path, a SingleFileData or a readable binary stream. A stream is read from its start
+    each time the file is opened, if it is not seekable it can only be read once.
+
     This should get replaced, as soon as parsevasp has a dedicated class.
     """
 
@@ -173,6 +298,9 @@ class SingleFile(object):  # pylint: disable=useless-object-inheritance
         super(SingleFile, self).__init__()
         self._path = None
         self._data = None
+        self._handler = None
+        self._handler_read = False
+        self._decompressed = None
         self.init_with_kwargs(**kwargs)
 
     @delegate_method_kwargs(prefix='_init_with_')
@@ -186,14 +314,89 @@ class SingleFile(object):  # pylint: disable=useless-object-inheritance
         """Initialise with SingleFileData."""
         self._data = data
 
+    def _init_with_handler(self, handler):
+        """Initialise with a readable binary stream."""
+        self._handler = handler
+
     @property
     def path(self):
+        """Return the path of the file, for a stream the path of the file it reads if there is one."""
+        if self._path is None and self._handler is not None:
+            name = getattr(self._handler, 'name', None)
+            if isinstance(name, str) and os.path.isfile(name):
+                return name
+        return self._path
+
+    @property
+    def mappable_path(self):
+        """Return the path of the file if it is stored uncompressed on disk, which allows random access with mmap, else None."""
+        path = self.path
+        if path is not None and split_compression_suffix(str(path))[1] is None:
+            return path
+        return None
+
+    @property
+    def local_path(self):
+        """
+        Return the path of the uncompressed file, for readers that need a path.
+
+        A compressed file, or a stream that does not read from a file, is copied once to a temporary file,
+        which is removed together with this object. Readers that can read a stream should use ``open`` instead.
+        """
+        path = self.mappable_path
+        if path is not None:
+            return path
+        if self.path is None and self._handler is None:
+            return None
+        if self._decompressed is None:
+            original_name, _ = split_compression_suffix(os.path.basename(str(self._get_name())))
+            self._decompressed = tempfile.NamedTemporaryFile(suffix='-' + original_name)
+            with self.open('rb') as handler:
+                shutil.copyfileobj(handler, self._decompressed)
+            self._decompressed.flush()
+        return self._decompressed.name
+
+    def open(self, mode='r'):
+        """Open the file for reading, a compressed file is decompressed while it is read."""
+        if self._handler is not None:
+            return self._open_handler(mode)
+        if self._path is None and self._data is not None:
+            return self._data.open(mode=mode)
+        return open_file(self._path, mode)
+
+    @contextmanager
+    def _open_handler(self, mode):
+        """Read the stream from its start, it is left open for later reads."""
+        if self._handler.seekable():
+            self._handler.seek(0)
+        elif self._handler_read:
+            raise IOError('The stream of {} is not seekable and was already read.'.format(self._get_name()))
+        self._handler_read = True
+        _, suffix = split_compression_suffix(str(self._get_name()))
+        # Closing the decompressor or the text wrapper must not close the stream.
+        stream = DECOMPRESSORS[suffix](self._handler, 'rb') if suffix is not None else self._handler
+        try:
+            if 'b' in mode:
+                yield stream
+            else:
+                text_stream = io.TextIOWrapper(stream)
+                try:
+                    yield text_stream
+                finally:
+                    text_stream.detach()
+        finally:
+            if suffix is not None:
+                stream.close()
+
+    def _get_name(self):
+        """Return the name of the file, a stream without a name is named after its type."""
+        if self._handler is not None:
+            return getattr(self._handler, 'name', type(self._handler).__name__)
         return self._path
 
     def write(self, dst):
         """Copy file to destination."""
         if self._path is not None:
-            import shutil
             shutil.copyfile(self._path, dst)
             return
 
@@ -95,7 +95,7 @@ class PoscarParser(BaseFileParser):
 
         # pass file path to parsevasp and try to load file
         try:
-            poscar = Poscar(file_path=self._data_obj.path, prec=self._precision, conserve_order=True, logger=self._logger)
+            poscar = Poscar(file_path=self._data_obj.local_path, prec=self._precision, conserve_order=True, logger=self._logger)
         except SystemExit:
             self._logger.warning('Parsevasp exited abnormally. ' 'Returning None.')
             return {'poscar-structure': None}
@@ -158,25 +158,21 @@ def parsevasp_to_aiida(poscar):
     # generate Aiida StructureData and add results from the loaded file
     result = {}
 
-    for site in poscar_dict['sites']:
-        specie = site['specie']
-        # user can specify whatever they want for the elements, but
-        # the symbols entries in Aiida only support the entries defined
-        # in aiida.common.constants.elements{}
-
-        # strip trailing _ in case user specifies potential
+    # user can specify whatever they want for the elements, but the symbols
+    # entries in Aiida only support the entries defined in
+    # aiida.common.constants.elements{}, so invert it once
+    known_symbols = fetch_symbols_from_elements(elements)
+    kind_names = [site['specie'] for site in poscar_dict['sites']]
+    species_symbols = {}
+    for specie in set(kind_names):
+        # strip trailing _ in case user specifies potential, set to X if
+        # the leading entry is not a known element
         symbol = specie.split('_')[0].capitalize()
-        # check if leading entry is part of
-        # aiida.common.constants.elements{}, otherwise set to X, but first
-        # invert
-        symbols = fetch_symbols_from_elements(elements)
-        try:
-            symbols[symbol]
-        except KeyError:
-            symbol = 'X'
+        species_symbols[specie] = symbol if symbol in known_symbols else 'X'
 
-        site['symbol'] = symbol
-        site['kind_name'] = specie
+    poscar_dict['positions'] = np.array([site['position'] for site in poscar_dict['sites']], dtype=float).reshape(-1, 3)
+    poscar_dict['symbols'] = [species_symbols[specie] for specie in kind_names]
+    poscar_dict['kind_names'] = kind_names
 
     result['poscar-structure'] = poscar_dict
 
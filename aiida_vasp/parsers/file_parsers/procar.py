@@ -0,0 +1,115 @@
+"""
+PROCAR parser.
+
+--------------
+The file parser that handles the parsing of PROCAR files.
+"""
+# pylint: disable=protected-access
+import re
+import sys
+
+import numpy as np
+
+from aiida_vasp.parsers.file_parsers.parser import BaseFileParser
+from aiida_vasp.utils.projectors import get_orbital_names, reduce_projectors
+
+PREAMBLE = re.compile(r'# of k-points:\s*(\d+)\s+# of bands:\s*(\d+)\s+# of ions:\s*(\d+)')
+# The rows of the ions after an 'ion' header, for each band first the projections, then the phase factors, if any.
+ION_BLOCK = re.compile(r'^ion[^\n]*\n((?:[ \t]*\d+[ \t][^\n]*\n)+)', re.MULTILINE)
+ORBITALS = re.compile(r'^ion([^\n]*)tot[ \t]*$', re.MULTILINE)
+# Words within the rows of the phase factors, e.g. 'charge' for VASP 5.4.4.
+WORD = re.compile(r'(?<![\d.])[a-zA-Z]+')
+
+
+class ProcarParser(BaseFileParser):
+    """
+    Parser for the projections of the bands on the orbitals of each ion in PROCAR.
+
+    The projections are returned in the layout of ``VasprunParser.projectors``, with the phase factors of
+    ``LORBIT = 12`` as a complex array, both in the layout of VASP 5.4.4 and the one of earlier versions.
+    For non-collinear runs only the total projections are read, not the ones on the magnetization.
+
+    The ions and orbitals can be selected, and the projections stored as a sparse array, with the
+    ``projectors_ions``, ``projectors_orbitals`` and ``projectors_threshold`` parser settings,
+    see ``aiida_vasp.utils.projectors.reduce_projectors``.
+    """
+
+    PARSABLE_ITEMS = {
+        'procar-projectors': {
+            'inputs': [],
+            'name': 'projectors',
+            'prerequisites': [],
+        },
+    }
+
+    def __init__(self, *args, **kwargs):
+        super(ProcarParser, self).__init__(*args, **kwargs)
+        self._settings = kwargs.get('settings', None)
+        self._exit_codes = kwargs.get('exit_codes', None)
+
+    def _parse_file(self, inputs):
+        """Parse the projections from PROCAR."""
+        return {'procar-projectors': self.projectors}
+
+    @property
+    def projectors(self):
+        """Fetch the projections, and the phase factors if they are written."""
+        with self._data_obj.open() as handler:
+            content = handler.read()
+        preambles = PREAMBLE.findall(content)
+        orbitals = ORBITALS.search(content)
+        if not preambles or orbitals is None:
+            self._set_error(sys._getframe().f_code.co_name)
+            return None
+        num_kpoints, num_bands, num_ions = [int(size) for size in preambles[0]]
+        orbitals = get_orbital_names(orbitals.group(1).split())
+        # The spin components are written one after the other, each with its own preamble.
+        shape = (len(preambles), num_kpoints, num_bands, num_ions)
+        blocks = ION_BLOCK.findall(content)
+        del content
+        num_blocks = np.prod(shape[:-1])
+        if len(blocks) not in (num_blocks, 2 * num_blocks):
+            # The file is truncated.
+            self._set_error(sys._getframe().f_code.co_name)
+            return None
+
+        # Each row holds the index of the ion, the projections on the orbitals and their total.
+        projectors = np.fromstring(''.join(blocks[::len(blocks) // num_blocks]), sep=' ')
+        projectors = projectors.reshape(shape + (len(orbitals) + 2,))[..., 1:-1]
+        phase_factors = None
+        if len(blocks) == 2 * num_blocks:
+            phase_factors = self._get_phase_factors(blocks[1::2], shape, len(orbitals))
+        del blocks
+
+        try:
+            return reduce_projectors(_to_vasprun_layout(projectors), orbitals, self._settings, _to_vasprun_layout(phase_factors))
+        except ValueError as error:
+            self._logger.warning(str(error))
+            self._set_error(sys._getframe().f_code.co_name)
+            return None
+
+    @staticmethod
+    def _get_phase_factors(blocks, shape, num_orbitals):
+        """Read the phase factors, which are written as one row per ion with the pairs of real and imaginary parts since VASP 5.4.4."""
+        rows_per_ion = blocks[0].count('\n') // shape[-1]
+        values = np.fromstring(WORD.sub(' ', ''.join(blocks)), sep=' ')
+        if rows_per_ion == 2:
+            # A row with the real and one with the imaginary parts, each starting with the index of the ion.
+            values = values.reshape(shape + (2, num_orbitals + 1))[..., 1:]
+            return values[..., 0, :] + 1j * values[..., 1, :]
+        values = values.reshape(shape + (-1,))[..., 1:1 + 2 * num_orbitals]
+        return values[..., 0::2] + 1j * values[..., 1::2]
+
+    def _set_error(self, quantity):
+        if self._exit_codes is not None:
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=quantity)
+
+
+def _to_vasprun_layout(array):
+    """Move the ions before the k-points, and drop the spin axis if there is only one spin component."""
+    if array is None:
+        return None
+    array = np.ascontiguousarray(np.moveaxis(array, 3, 1))
+    if array.shape[0] == 1:
+        return array[0]
+    return array
@@ -42,14 +42,16 @@ class StreamParser(BaseFileParser):
         self._settings = kwargs.get('settings', None)
         if 'file_path' in kwargs:
             self._init_stream(kwargs['file_path'])
+        if 'file_handler' in kwargs:
+            self._init_stream(handler=kwargs['file_handler'])
         if 'data' in kwargs:
             self._init_stream(kwargs['data'].get_file_abs_path())
 
-    def _init_stream(self, path):
-        """Init with a file path."""
+    def _init_stream(self, path=None, handler=None):
+        """Init with a file path or a stream."""
         self._parsed_data = {}
         self._parsable_items = self.__class__.PARSABLE_ITEMS
-        self._data_obj = SingleFile(path=path)
+        self._data_obj = SingleFile(path=path, handler=handler)
 
         # Since the VASP output can be fairly large, we will parse it only
         # once and store the parsevasp Stream object.
@@ -60,7 +62,7 @@ class StreamParser(BaseFileParser):
             stream_config = self._settings.get('stream_config', None)
             history = self._settings.get('stream_history', False)
         try:
-            self._stream = Stream(file_path=path, logger=self._logger, history=history, config=stream_config)
+            self._stream = Stream(file_path=self._data_obj.local_path, logger=self._logger, history=history, config=stream_config)
         except SystemExit:
             self._logger.warning('Parsevasp exited abruptly when parsing the standard stream. Returning None.')
             self._stream = None
@@ -78,20 +80,21 @@ class StreamParser(BaseFileParser):
             quantities_to_parse = self._settings.quantity_names_to_parse
 
         result = {}
-
-        if self._stream is None:
-            # parsevasp threw an exception, which means the standard stream could not be parsed.
-            for quantity in quantities_to_parse:
-                if quantity in self._parsable_items:
-                    result[quantity] = None
-            return result
-
         for quantity in quantities_to_parse:
             if quantity in self._parsable_items:
-                result[quantity] = getattr(self, quantity)
+                result[quantity] = self._evaluate(quantity)
 
         return result
 
+    def _parse_quantity(self, quantity_key):
+        """Evaluate a single quantity."""
+
+        if self._stream is None:
+            # parsevasp threw an exception, which means the standard stream could not be parsed.
+            return None
+
+        return getattr(self, quantity_key)
+
     @property
     def notifications(self):
         """Fetch the notifications from parsevasp."""
@@ -14,3 +14,114 @@ def test_base_file_parser():
     assert parser._parsed_data == {}
     with pytest.raises(Exception):
         parser._parse_file(inputs)
+
+
+class ExampleFileParser(BaseFileParser):
+    """Example FileParser class counting how often the file is parsed."""
+
+    PARSABLE_ITEMS = {
+        'quantity': {
+            'inputs': [],
+            'name': 'quantity',
+            'prerequisites': []
+        },
+        'empty_quantity': {
+            'inputs': [],
+            'name': 'empty_quantity',
+            'prerequisites': []
+        },
+    }
+
+    def __init__(self, *args, **kwargs):
+        super(ExampleFileParser, self).__init__(*args, **kwargs)
+        self.parse_count = 0
+
+    def _parse_file(self, inputs):
+        self.parse_count += 1
+        return {'quantity': 1.0, 'empty_quantity': None}
+
+
+def test_quantities_memoized():
+    """Test that quantities, including those evaluating to None, are only evaluated once."""
+    parser = ExampleFileParser()
+    assert parser.get_quantity('empty_quantity') is None
+    assert parser.get_quantity('quantity') == 1.0
+    assert parser.get_quantity('empty_quantity') is None
+    assert parser.get_quantity('non_existing_quantity') is None
+    assert parser.parse_count == 1
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.bz2', '.xz'])
+def test_compressed_file(tmpdir, suffix):
+    """Test that a compressed file is decompressed while reading it and for readers that need a path."""
+    import os
+    from aiida_vasp.parsers.file_parsers.parser import DECOMPRESSORS, SingleFile
+    content = 'first line\nsecond line\n'
+    path = str(tmpdir.join('OUTCAR' + suffix))
+    with DECOMPRESSORS[suffix](path, 'wt') as handler:
+        handler.write(content)
+    single_file = SingleFile(path=path)
+    with single_file.open() as handler:
+        assert handler.read() == content
+    local_path = single_file.local_path
+    assert local_path.endswith('OUTCAR')
+    with open(local_path) as handler:
+        assert handler.read() == content
+    del single_file
+    assert not os.path.exists(local_path)
+
+
+@pytest.mark.parametrize('suffix', [None, '.gz', '.bz2', '.xz'])
+def test_uncompressed_size(tmpdir, suffix):
+    """Test that the size of a compressed file is the one after decompression."""
+    from aiida_vasp.parsers.file_parsers.parser import DECOMPRESSORS, get_uncompressed_size
+    content = b'first line\nsecond line\n' * 1000
+    path = str(tmpdir.join('OUTCAR' + (suffix or '')))
+    with (DECOMPRESSORS[suffix] if suffix else open)(path, 'wb') as handler:
+        handler.write(content)
+    with open(path, 'rb') as handler:
+        assert get_uncompressed_size(handler, suffix) == len(content)
+
+
+def test_file_handler(tmpdir):
+    """Test that a stream is read from its start each time and is not closed by the readers."""
+    import gzip
+    import io
+    from aiida_vasp.parsers.file_parsers.parser import SingleFile
+    content = 'first line\nsecond line\n'
+    path = tmpdir.join('OUTCAR')
+    path.write(content)
+    with open(str(path), 'rb') as handler:
+        single_file = SingleFile(handler=handler)
+        for _ in range(2):
+            with single_file.open() as text_handler:
+                assert text_handler.read() == content
+        assert not handler.closed
+        # A stream of a file on disk is read by its path, without a copy.
+        assert single_file.local_path == str(path)
+
+    compressed = io.BytesIO(gzip.compress(content.encode()))
+    compressed.name = 'OUTCAR.gz'
+    single_file = SingleFile(handler=compressed)
+    with single_file.open() as text_handler:
+        assert text_handler.readline() == 'first line\n'
+    assert not compressed.closed
+    with open(single_file.local_path) as handler:
+        assert handler.read() == content
+
+
+def test_file_handler_not_seekable():
+    """Test that a stream which is not seekable can only be read once."""
+    import io
+    from aiida_vasp.parsers.file_parsers.parser import SingleFile
+
+    class Unseekable(io.BytesIO):
+
+        def seekable(self):
+            return False
+
+    single_file = SingleFile(handler=Unseekable(b'content\n'))
+    with single_file.open('rb') as handler:
+        assert handler.read() == b'content\n'
+    with pytest.raises(IOError):
+        single_file.open('rb').__enter__()
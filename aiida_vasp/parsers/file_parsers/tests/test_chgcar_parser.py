@@ -1,6 +1,8 @@
 """Test the CHGCAR parser."""
 # pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import
 
+import os
+
 import pytest
 
 from aiida_vasp.utils.fixtures import *
@@ -17,3 +19,84 @@ def test_parse_chgcar(fresh_aiida_env):
     content = result.get_content()
     assert result.filename == file_name
     assert content == 'This is a test CHGCAR file.\n'
+
+
+def test_grids(tmpdir):
+    """The grid agrees with the one of the synthetic run, also when read in chunks."""
+    import numpy as np
+    from aiida_vasp.parsers.file_parsers import chgcar
+    from aiida_vasp.utils.fixtures.synthetic import SyntheticRun
+    run = SyntheticRun(grid=(6, 4, 5))
+    path = str(tmpdir.join('CHGCAR'))
+    run.write_chgcar(path)
+    grids = ChgcarParser(file_path=path).get_quantity('grids')
+    assert list(grids) == ['total']
+    # The synthetic density has z running slowest.
+    np.testing.assert_allclose(grids['total'], run.charge_density.transpose(), rtol=1e-10)
+    # The grid is memory-mapped from a temporary file, which is removed with the grid.
+    assert isinstance(grids['total'], np.memmap)
+    grid_path = grids['total'].filename
+    del grids
+    assert not os.path.exists(grid_path)
+
+    chgcar.CHUNK_LINES, chunk_lines = 5, chgcar.CHUNK_LINES
+    try:
+        grids = ChgcarParser(file_path=path).get_quantity('grids')
+    finally:
+        chgcar.CHUNK_LINES = chunk_lines
+    np.testing.assert_allclose(grids['total'], run.charge_density.transpose(), rtol=1e-10)
+
+
+def test_spin_grids(tmpdir, fresh_aiida_env):
+    """The augmentation occupancies and the magnetic moments between the grids are skipped."""
+    import numpy as np
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    from aiida_vasp.parsers.node_composer import NodeComposer
+    path = tmpdir.join('CHGCAR')
+    path.write(SPIN_CHGCAR)
+    grids = ChgcarParser(file_path=str(path)).get_quantity('grids')
+    assert sorted(grids) == ['magnetization', 'total']
+    assert grids['total'].shape == (2, 2, 3)
+    assert grids['total'][1, 0, 0] == 2.0
+    assert grids['total'][0, 1, 2] == 11.0
+    assert grids['magnetization'][:, 0, 0].tolist() == [-1.0, 0.5]
+    node = NodeComposer.compose('vasp.chargedensity', {'chgcar': str(path), 'grids': grids}).store()
+    assert node.get_grid('magnetization', stride=2)[:, 0, 0].tolist() == [-1.0]
+
+    # The magnetization is not complete.
+    path.write(SPIN_CHGCAR[:SPIN_CHGCAR.rindex('augmentation occupancies   1') - 20])
+    parser = ChgcarParser(file_path=str(path), exit_codes=VaspCalculation.exit_codes)
+    assert parser.get_quantity('grids') is None
+    assert parser.exit_code.status == VaspCalculation.exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.status
+    assert ChgcarParser(file_path=data_path('chgcar', 'CHGCAR')).get_quantity('grids') is None
+
+
+SPIN_CHGCAR = """Si2
+    1.00000000000000
+     3.000000    0.000000    0.000000
+     0.000000    3.000000    0.000000
+     0.000000    0.000000    3.000000
+   Si
+     2
+Direct
+  0.000000  0.000000  0.000000
+  0.250000  0.250000  0.250000
+
+    2    2    3
+ 0.10000000000E+01 0.20000000000E+01 0.30000000000E+01 0.40000000000E+01 0.50000000000E+01
+ 0.60000000000E+01 0.70000000000E+01 0.80000000000E+01 0.90000000000E+01 0.10000000000E+02
+ 0.11000000000E+02 0.12000000000E+02
+augmentation occupancies   1   4
+  0.1000000E+01  0.2000000E+00  0.3000000E-01  0.4000000E-02
+augmentation occupancies   2   4
+  0.1000000E+01  0.2000000E+00  0.3000000E-01  0.4000000E-02
+  0.00000000000E+00  0.00000000000E+00
+    2    2    3
+-0.10000000000E+01 0.50000000000E+00 0.30000000000E+01 0.40000000000E+01 0.50000000000E+01
+ 0.60000000000E+01 0.70000000000E+01 0.80000000000E+01 0.90000000000E+01 0.10000000000E+02
+ 0.11000000000E+02 0.12000000000E+02
+augmentation occupancies   1   4
+  0.1000000E+01  0.2000000E+00  0.3000000E-01  0.4000000E-02
+augmentation occupancies   2   4
+  0.1000000E+01  0.2000000E+00  0.3000000E-01  0.4000000E-02
+"""
@@ -30,3 +30,41 @@ def test_parse_doscar(fresh_aiida_env):
     result_dos = result.get_array('tdos')
     for i in range(0, dos.size):
         assert result_dos[i] == dos[i]
+
+
+def test_parse_doscar_pdos(fresh_aiida_env):
+    """Check that the pdos of each ion is read from its own block."""
+    path = data_path('doscar', 'DOSCAR')
+    parser = DosParser(file_path=path)
+    pdos = parser.dos.get_array('pdos')
+    assert pdos.shape == (4, 10)
+    assert pdos['s'][:, 7].tolist() == [-1.988e-29, -2.042e-29, -2.061e-29, -2.089e-29]
+    assert pdos['energy'][3, -1] == 13.67
+
+
+@pytest.mark.parametrize(['tdos_columns', 'pdos_columns'], [(5, 19), (3, 37), (3, 17), (5, 33), (3, 65)])
+def test_parse_doscar_columns(fresh_aiida_env, tmpdir, tdos_columns, pdos_columns):
+    """Parse DOSCAR files of spin polarized and non-collinear runs, with pdos up to d and f orbitals."""
+    num_ions, num_dos = 2, 3
+    header_line = '  13.67039808  -3.43982524  {}  7.29482275  1.00000000\n'.format(num_dos)
+    lines = [
+        '{0}  {0}  1  0\n'.format(num_ions), '  0.1E+02  0.4E-09  0.4E-09  0.4E-09  0.1E-15\n', '  1.0E-004\n', '  CAR\n',
+        ' unknown system\n'
+    ]
+    lines.append(header_line)
+    tdos = numpy.arange(num_dos * tdos_columns, dtype=float).reshape(num_dos, tdos_columns)
+    pdos = numpy.arange(num_ions * num_dos * pdos_columns, dtype=float).reshape(num_ions, num_dos, pdos_columns) + 0.5
+    lines += [' '.join(str(value) for value in row) + '\n' for row in tdos]
+    for ion in pdos:
+        lines.append(header_line)
+        lines += [' '.join(str(value) for value in row) + '\n' for row in ion]
+    path = str(tmpdir.join('DOSCAR'))
+    with open(path, 'w') as handler:
+        handler.writelines(lines)
+
+    result = DosParser(file_path=path).get_quantity('doscar-dos')
+    assert result['tdos'].shape == (num_dos,)
+    assert result['pdos'].shape == (num_ions, num_dos)
+    assert numpy.array_equal(result['tdos'].view(float).reshape(tdos.shape), tdos)
+    assert numpy.array_equal(result['pdos'].view(float).reshape(pdos.shape), pdos)
+    assert numpy.array_equal(result['pdos']['s'].reshape(num_ions, num_dos, -1)[..., 0], pdos[..., 1])
@@ -19,3 +19,41 @@ def test_parse_eigenval():
 
     result = parser.get_quantity_from_inputs('eigenval-eigenvalues', inputs, None)
     assert result.all() == bands.all()
+
+
+def test_parse_eigenval_occupancies():
+    """Parse the occupations written next to the eigenvalues by newer VASP versions."""
+    parser = EigParser(file_path=data_path('eigenval', 'EIGENVAL'))
+    occupancies = parser.get_quantity('eigenval-occupancies')
+    assert occupancies.shape == (1, 1, 10)
+    assert occupancies[0, 0].tolist() == [1.0, 1.0, 1.0, 1.0, 0.666667, 0.666667, 0.666667, -0.0, -0.0, -0.0]
+    parser = EigParser(file_path=data_path('basic_run', 'EIGENVAL'))
+    assert parser.get_quantity('eigenval-eigenvalues').shape == (1, 10, 48)
+    assert parser.get_quantity('eigenval-occupancies') is None
+
+
+def test_parse_eigenval_spin(tmpdir):
+    """Parse the eigenvalues and occupations of both spins."""
+    num_kp, num_bands = 3, 4
+    lines = [
+        '    4    4    1    2\n', '  0.1648482E+02  0.4040000E-09  0.4040000E-09  0.4040000E-09  0.1000000E-15\n', '  1.0E-004\n', '  CAR\n'
+    ]
+    lines += [' unknown system\n', '     12      {}     {}\n'.format(num_kp, num_bands)]
+    energies = numpy.arange(2 * num_kp * num_bands, dtype=float).reshape(2, num_kp, num_bands) - 5.5
+    for k in range(num_kp):
+        lines.append('\n  {0}  {0}  0.0  0.1\n'.format(0.25 * k))
+        for band in range(num_bands):
+            lines.append('  {}  {}  {}  1.0  0.5\n'.format(band + 1, energies[0, k, band], energies[1, k, band]))
+    path = str(tmpdir.join('EIGENVAL'))
+    with open(path, 'w') as handler:
+        handler.writelines(lines)
+
+    parser = EigParser(file_path=path)
+    assert numpy.array_equal(parser.get_quantity('eigenval-eigenvalues'), energies)
+    occupancies = parser.get_quantity('eigenval-occupancies')
+    assert numpy.all(occupancies[0] == 1.0)
+    assert numpy.all(occupancies[1] == 0.5)
+    kpoints = parser.get_quantity('eigenval-kpoints')
+    assert numpy.array_equal(kpoints['points'][:, 0], [0.0, 0.25, 0.5])
+    assert numpy.array_equal(kpoints['weights'], [0.1, 0.1, 0.1])
+    assert not kpoints['cartesian']
@@ -78,3 +78,21 @@ def test_parse_kpoints_write(vasp_kpoints, tmpdir):
         assert getattr(result, method)().all() == getattr(kpoints, method)().all()
     if param == 'mesh':
         assert getattr(result, method)() == getattr(kpoints, method)()
+
+
+def test_parse_explicit_arrays(fresh_aiida_env, tmpdir):
+    """Parse an explicit list of k-points, as written to IBZKPT, into arrays."""
+    import numpy as np
+    parser = KpointsParser(file_path=data_path('test_relax_wc', 'out', 'IBZKPT'))
+    kpoints = parser.get_quantity('kpoints-kpoints')
+    assert kpoints['points'].shape == (171, 3)
+    assert kpoints['points'][1].tolist() == [0.1, 0.0, 0.0]
+    assert kpoints['weights'][:2].tolist() == [1.0, 4.0]
+    assert not kpoints['cartesian']
+    assert np.array_equal(parser.kpoints.get_kpoints(), kpoints['points'])
+
+    path = tmpdir.join('KPOINTS')
+    path.write('K-points\n 2\nCartesian\n 0.0 0.0 0.0 1.0\n 0.0 0.0 0.5 3.0\n')
+    kpoints = KpointsParser(file_path=str(path)).get_quantity('kpoints-kpoints')
+    assert kpoints['cartesian']
+    assert kpoints['weights'].tolist() == [1.0, 3.0]
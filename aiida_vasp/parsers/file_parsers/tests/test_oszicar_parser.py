@@ -0,0 +1,91 @@
+"""Test the OSZICAR parser."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import,import-outside-toplevel
+
+import numpy as np
+import pytest
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.fixtures.testdata import data_path
+from aiida_vasp.parsers.file_parsers.oszicar import OszicarParser
+from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser
+from aiida_vasp.parsers.settings import ParserSettings
+
+
+@pytest.fixture
+def exit_codes(fresh_aiida_env):
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    return VaspCalculation.exit_codes
+
+
+def get_parser(path, exit_codes, incar=None, **settings):
+    return OszicarParser(file_path=path, settings=ParserSettings(settings), exit_codes=exit_codes, incar=incar)
+
+
+def test_energies(exit_codes):
+    """The energies agree with the ones from vasprun.xml, to the precision they are written with."""
+    parser = get_parser(data_path('basic_run', 'OSZICAR'), exit_codes, energy_type=['energy_free', 'energy_extrapolated'])
+    energies = parser.get_quantity('oszicar-energies')
+    vasprun = VasprunParser(file_path=data_path('basic_run', 'vasprun.xml'),
+                            settings=ParserSettings({'energy_type': ['energy_free', 'energy_extrapolated']}),
+                            exit_codes=exit_codes)
+    reference = vasprun.get_quantity('energies')
+    for etype in ['energy_free', 'energy_extrapolated']:
+        np.testing.assert_allclose(energies[etype], reference[etype], atol=1e-5)
+    assert energies['electronic_steps'].tolist() == [1]
+    assert parser.get_quantity('oszicar-total_energies') == pytest.approx({'energy_free': -36.09677152, 'energy_extrapolated': -36.096169})
+
+
+def test_electronic_step_energies(exit_codes):
+    """The free energy is written for each electronic step, the extrapolated energy is only in vasprun.xml."""
+    path = data_path('born_effective_charge', 'OSZICAR')
+    energies = get_parser(path, exit_codes, energy_type=['energy_free'], electronic_step_energies=True).get_quantity('oszicar-energies')
+    # The steps of the linear response after the ionic step are not part of it.
+    assert energies['electronic_steps'].tolist() == [22]
+    assert energies['energy_free'].shape == (22,)
+    assert energies['energy_free'][-1] == -115.017747367
+    assert energies['energy_free_final'].tolist() == [-115.01775]
+
+    parser = get_parser(path, exit_codes, electronic_step_energies=True)
+    assert parser.get_quantity('oszicar-energies') is None
+    assert parser.exit_code.status == exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.status
+
+
+def test_run_status(exit_codes, tmpdir):
+    """The run status needs the INCAR parameters, a killed run ends with electronic steps."""
+    path = data_path('born_effective_charge', 'OSZICAR')
+    assert get_parser(path, exit_codes).get_quantity('oszicar-run_status') is None
+    status = get_parser(path, exit_codes, incar={'nelm': 60}).get_quantity('oszicar-run_status')
+    assert status == {'finished': True, 'electronic_converged': True, 'ionic_converged': None}
+    status = get_parser(path, exit_codes, incar={'nelm': 22, 'nsw': 5}).get_quantity('oszicar-run_status')
+    assert status == {'finished': True, 'electronic_converged': False, 'ionic_converged': True}
+
+    killed = tmpdir.join('OSZICAR')
+    with open(path) as handler:
+        killed.write(''.join(handler.readlines()[:30]))
+    status = get_parser(str(killed), exit_codes, incar={'nsw': 5}).get_quantity('oszicar-run_status')
+    assert status == {'finished': True, 'electronic_converged': True, 'ionic_converged': True}
+    with open(path) as handler:
+        killed.write(''.join(handler.readlines()[:20]))
+    parser = get_parser(str(killed), exit_codes, incar={'nsw': 5})
+    assert parser.get_quantity('oszicar-run_status') == {'finished': False, 'electronic_converged': False, 'ionic_converged': False}
+    assert parser.get_quantity('oszicar-energies') is None
+
+
+def test_relaxation(exit_codes, tmpdir):
+    """The output of the line search between the ionic steps of a relaxation does not end them."""
+    path = data_path('oszicar', 'OSZICAR')
+    parser = get_parser(path, exit_codes, energy_type=['energy_free'], electronic_step_energies=True)
+    energies = parser.get_quantity('oszicar-energies')
+    assert energies['electronic_steps'].tolist() == [3, 2]
+    assert energies['energy_free'].tolist() == [28.5426455572, -11.7447049004, -12.1096049937, -12.1105722611, -12.1108164925]
+    assert energies['energy_free_final'].tolist() == [-12.109605, -12.110816]
+    status = get_parser(path, exit_codes, incar={'nelm': 2, 'nsw': 10}).get_quantity('oszicar-run_status')
+    assert status == {'finished': False, 'electronic_converged': False, 'ionic_converged': False}
+
+    completed = tmpdir.join('OSZICAR')
+    with open(path) as handler:
+        completed.write(''.join(handler.readlines()[:13]))
+    status = get_parser(str(completed), exit_codes, incar={'nelm': 2, 'nsw': 10}).get_quantity('oszicar-run_status')
+    assert status == {'finished': True, 'electronic_converged': False, 'ionic_converged': True}
+    status = get_parser(str(completed), exit_codes, incar={'nelm': 3, 'nsw': 2}).get_quantity('oszicar-run_status')
+    assert status == {'finished': True, 'electronic_converged': True, 'ionic_converged': True}
@@ -0,0 +1,95 @@
+"""Test the streaming OUTCAR parser."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import,protected-access
+
+import pytest
+import numpy as np
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.fixtures.testdata import data_path
+from aiida_vasp.parsers.file_parsers import outcar_streaming
+from aiida_vasp.parsers.file_parsers.outcar import OutcarParser
+from aiida_vasp.parsers.file_parsers.outcar_streaming import StreamingOutcarParser, OutcarScanner
+from aiida_vasp.parsers.settings import ParserSettings
+
+
+def _get_parsers(path):
+    """Return an OutcarParser and a StreamingOutcarParser for the same OUTCAR."""
+    return [parser_cls(file_path=path, settings=ParserSettings({})) for parser_cls in (OutcarParser, StreamingOutcarParser)]
+
+
+def _assert_equal(value, reference):
+    """Compare nested dictionaries, which may contain arrays."""
+    if isinstance(reference, dict):
+        assert set(value) == set(reference)
+        for key in reference:
+            _assert_equal(value[key], reference[key])
+    elif isinstance(reference, np.ndarray):
+        assert np.array_equal(value, reference)
+    else:
+        assert value == reference
+
+
+@pytest.mark.parametrize('folder', ['disp_details', 'magnetization', 'magnetization_single', 'born_effective_charge', 'phonondb'])
+def test_quantities(fresh_aiida_env, folder):
+    """Compare all quantities with the ones from the parsevasp backend."""
+    reference, streaming = _get_parsers(data_path(folder, 'OUTCAR'))
+    for key in OutcarParser.PARSABLE_ITEMS:
+        _assert_equal(streaming.get_quantity(key), reference.get_quantity(key))
+
+
+@pytest.mark.parametrize('folder', ['disp_details', 'magnetization', 'magnetization_single'])
+def test_compressed_stream(fresh_aiida_env, tmpdir, monkeypatch, folder):
+    """Check that a compressed file is scanned from the stream, without an uncompressed copy."""
+    import gzip
+    import shutil
+    from aiida_vasp.parsers.file_parsers.parser import SingleFile
+    reference, _ = _get_parsers(data_path(folder, 'OUTCAR'))
+    path = str(tmpdir.join('OUTCAR.gz'))
+    with open(data_path(folder, 'OUTCAR'), 'rb') as source, gzip.open(path, 'wb') as destination:
+        shutil.copyfileobj(source, destination)
+
+    monkeypatch.setattr(SingleFile, 'local_path', property(lambda self: pytest.fail('The file was copied.')))
+    with open(path, 'rb') as handler:
+        streaming = StreamingOutcarParser(file_handler=handler, settings=ParserSettings({}))
+        assert streaming._outcar._path is None
+        for key in OutcarParser.PARSABLE_ITEMS:
+            _assert_equal(streaming.get_quantity(key), reference.get_quantity(key))
+
+
+@pytest.mark.parametrize('chunk_size', [7, 100])
+def test_chunk_boundaries(fresh_aiida_env, monkeypatch, chunk_size):
+    """Check that blocks of lines split between chunks are read completely."""
+    reference = OutcarScanner(data_path('magnetization', 'OUTCAR'), ['symmetry', 'magnetization'])
+    monkeypatch.setattr(outcar_streaming, 'CHUNK_SIZE', chunk_size)
+    scanner = OutcarScanner(data_path('magnetization', 'OUTCAR'), ['symmetry', 'magnetization'])
+    _assert_equal(scanner.get_symmetry(), reference.get_symmetry())
+    _assert_equal(scanner.get_magnetization(), reference.get_magnetization())
+
+
+def test_sections_on_demand(fresh_aiida_env):
+    """Check that only the sections of the requested quantities are read."""
+    _, streaming = _get_parsers(data_path('magnetization', 'OUTCAR'))
+    assert not streaming._outcar.sections_read
+    assert streaming.get_quantity('magnetization') == [6.4424922]
+    assert streaming._outcar.sections_read == {'magnetization'}
+    assert streaming.get_quantity('symmetries')['num_space_group_operations'] == {'static': [8], 'dynamic': [8]}
+    assert streaming._outcar.sections_read == {'magnetization', 'symmetry'}
+
+
+def test_symmetry_early_stop(fresh_aiida_env, tmpdir):
+    """Check that the symmetry is only searched until the first ionic step if it is not analysed again later."""
+    with open(data_path('magnetization', 'OUTCAR')) as handler:
+        content = handler.read()
+    analysis = content[content.index('Analysis of symmetry for dynamics'):content.index(' Subroutine INISYM returns')]
+    path = str(tmpdir.join('OUTCAR'))
+    with open(path, 'w') as handler:
+        handler.write(content + analysis.replace('Found  8 space group', 'Found  2 space group'))
+
+    scanner = OutcarScanner(path, ['symmetry'])
+    assert scanner.get_symmetry()['num_space_group_operations'] == {'static': [8], 'dynamic': [8]}
+
+
+def test_primitive_cells(fresh_aiida_env):
+    """Check the cell type of supercells built from several primitive cells."""
+    scanner = OutcarScanner(data_path('basic_run', 'OUTCAR'), ['symmetry'])
+    assert scanner.get_symmetry()['original_cell_type'] == {'static': ['4 primitive cells'], 'dynamic': ['4 primitive cells']}
@@ -187,3 +187,25 @@ def compare_objects(obj_a, obj_b):
             return
 
     assert obj_a == obj_b
+
+
+def test_parse_poscar_large(fresh_aiida_env, tmpdir):
+    """A large cell is composed from the arrays of the positions, symbols and kind names."""
+    import numpy as np
+    num_cells = 10
+    grid = np.stack(np.meshgrid(*[np.arange(num_cells)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+    direct = np.concatenate([grid, grid + 0.5]) / num_cells
+    cell = np.diag([30.0, 31.0, 32.0])
+    lines = ['Large cell', '1.0'] + ['{:.8f} {:.8f} {:.8f}'.format(*row) for row in cell]
+    lines += ['Si Ge', '{0} {0}'.format(len(grid)), 'Direct'] + ['{:.8f} {:.8f} {:.8f}'.format(*position) for position in direct]
+    path = tmpdir.join('POSCAR')
+    path.write('\n'.join(lines) + '\n')
+
+    result = PoscarParser(file_path=str(path)).get_quantity('poscar-structure')
+    assert result['positions'].shape == (2 * len(grid), 3)
+    np.testing.assert_allclose(result['positions'], np.dot(direct, cell), atol=1e-6)
+
+    structure = PoscarParser(file_path=str(path)).structure
+    assert [kind.name for kind in structure.kinds] == ['Si', 'Ge']
+    assert structure.get_site_kindnames() == ['Si'] * len(grid) + ['Ge'] * len(grid)
+    np.testing.assert_allclose([site.position for site in structure.sites], np.dot(direct, cell), atol=1e-6)
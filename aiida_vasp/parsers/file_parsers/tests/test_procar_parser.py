@@ -0,0 +1,107 @@
+"""Test the PROCAR parser."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import,import-outside-toplevel
+
+import numpy as np
+import pytest
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.fixtures.synthetic import SyntheticRun
+from aiida_vasp.utils.projectors import get_projectors
+from aiida_vasp.parsers.file_parsers.procar import ProcarParser
+from aiida_vasp.parsers.settings import ParserSettings
+
+# The layout of the phase factors before VASP 5.4.4, with a row for the real and one for the imaginary parts.
+OLD_PHASE = """PROCAR lm decomposed + phase
+# of k-points:    1         # of bands:    1         # of ions:    2
+
+ k-point     1 :    0.00000000 0.00000000 0.00000000     weight = 1.00000000
+
+band     1 # energy   -6.09960618 # occ.  2.00000000
+
+ion      s     py     pz     px    tot
+    1  0.250  0.010  0.000  0.000  0.260
+    2  0.240  0.000  0.020  0.000  0.260
+tot    0.490  0.010  0.020  0.000  0.520
+ion      s     py     pz     px
+    1  0.500  0.100  0.000  0.000
+    1 -0.010  0.020  0.000  0.000
+    2  0.490  0.000  0.140  0.000
+    2  0.030  0.000 -0.020  0.000
+
+"""
+
+
+@pytest.fixture
+def exit_codes(fresh_aiida_env):
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    return VaspCalculation.exit_codes
+
+
+def get_parser(path, exit_codes=None, **settings):
+    return ProcarParser(file_path=str(path), settings=ParserSettings(settings), exit_codes=exit_codes)
+
+
+@pytest.mark.parametrize('num_spins', [1, 2])
+def test_synthetic(tmpdir, exit_codes, num_spins):
+    """The projections agree with the ones from vasprun.xml, to the precision they are written with."""
+    from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser
+    run = SyntheticRun(num_spins=num_spins, num_atoms=3, num_kpoints=4, num_bands=6)
+    run.write(str(tmpdir), ['PROCAR', 'vasprun.xml'])
+    projectors = get_parser(tmpdir.join('PROCAR')).get_quantity('procar-projectors')
+    reference = VasprunParser(file_path=str(tmpdir.join('vasprun.xml')), settings=ParserSettings({}),
+                              exit_codes=exit_codes).get_quantity('projectors')
+    assert list(projectors) == ['projectors']
+    assert projectors['projectors'].shape == reference['projectors'].shape
+    np.testing.assert_allclose(projectors['projectors'], reference['projectors'], atol=5e-4)
+
+
+def test_phase_factors(tmpdir):
+    """The phase factors are read in the layout of VASP 5.4.4 and the one of earlier versions."""
+    run = SyntheticRun(num_spins=2, num_atoms=3, num_kpoints=4, num_bands=6)
+    path = tmpdir.join('PROCAR')
+    run.write_procar(str(path), phase=True)
+    projectors = get_parser(path).get_quantity('procar-projectors')
+    expected = np.sqrt(np.moveaxis(run.projections, 3, 1)) * (1 - 0.5j)
+    np.testing.assert_allclose(projectors['phase_factors'], expected, atol=1e-3)
+
+    path.write(OLD_PHASE)
+    projectors = get_parser(path).get_quantity('procar-projectors')
+    assert projectors['projectors'][:, 0, 0].tolist() == [[0.25, 0.01, 0.0, 0.0], [0.24, 0.0, 0.02, 0.0]]
+    assert projectors['phase_factors'][1, 0, 0, :3].tolist() == [0.49 + 0.03j, 0, 0.14 - 0.02j]
+
+
+def test_reduce(tmpdir, exit_codes):
+    """The ions and orbitals are selected, and small projections are dropped from the sparse array."""
+    from aiida_vasp.parsers.node_composer import NodeComposer
+    run = SyntheticRun(num_atoms=3, num_kpoints=4, num_bands=6)
+    path = tmpdir.join('PROCAR')
+    run.write_procar(str(path), phase=True)
+    projectors = get_parser(path, projectors_ions=[1, 3], projectors_orbitals=['px', 's'],
+                            projectors_threshold=0.05).get_quantity('procar-projectors')
+    assert projectors['ions'].tolist() == [1, 3]
+    assert projectors['orbitals'].tolist() == ['px', 's']
+
+    node = NodeComposer.compose('array', {'projectors': projectors})
+    dense = get_projectors(node)
+    expected = np.moveaxis(run.projections[0][..., [0, 2], :][..., [3, 0]], 2, 0)
+    assert dense.shape == expected.shape
+    np.testing.assert_allclose(dense, np.where(expected.round(3) >= 0.05, expected, 0), atol=5e-4)
+    assert np.count_nonzero(dense) == projectors['projectors_values'].size < dense.size
+    phase_factors = get_projectors(node, 'phase_factors')
+    np.testing.assert_allclose(phase_factors, np.where(dense > 0, np.sqrt(expected) * (1 - 0.5j), 0), atol=1e-3)
+
+    for settings in [{'projectors_orbitals': ['f']}, {'projectors_ions': [4]}]:
+        parser = get_parser(path, exit_codes, **settings)
+        assert parser.get_quantity('procar-projectors') is None
+        assert parser.exit_code.status == exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.status
+
+
+def test_truncated(tmpdir, exit_codes):
+    """A PROCAR file without all bands is not parsed."""
+    path = tmpdir.join('PROCAR')
+    SyntheticRun(num_atoms=3, num_kpoints=4, num_bands=6).write_procar(str(path))
+    lines = path.readlines()
+    path.write(''.join(lines[:len(lines) // 2]))
+    parser = get_parser(path, exit_codes)
+    assert parser.get_quantity('procar-projectors') is None
+    assert parser.exit_code.status == exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.status
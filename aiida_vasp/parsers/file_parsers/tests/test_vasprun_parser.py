@@ -6,7 +6,7 @@ import numpy as np
 
 from aiida_vasp.utils.fixtures import *
 from aiida_vasp.utils.aiida_utils import get_data_class
-from aiida_vasp.parsers.node_composer import NodeComposer, get_node_composer_inputs_from_file_parser
+from aiida_vasp.parsers.node_composer import NodeComposer, get_node_composer_inputs_from_file_parser, get_storage_options, reduce_array
 
 
 def test_version(fresh_aiida_env, vasprun_parser):
@@ -26,6 +26,31 @@ def test_parse_vasprun(fresh_aiida_env, vasprun_parser):
     #assert  == 7.29482275
 
 
+@pytest.mark.parametrize('vasprun_parser', [('basic', {})], indirect=True)
+def test_lazy_quantities(fresh_aiida_env, vasprun_parser, monkeypatch):
+    """Check that only the requested quantities are evaluated and that dependencies reuse evaluated data."""
+
+    xml = vasprun_parser._xml  # pylint: disable=protected-access
+    get_eigenvalues = xml.get_eigenvalues
+    calls = []
+
+    def _counting_get_eigenvalues():
+        calls.append(None)
+        return get_eigenvalues()
+
+    monkeypatch.setattr(xml, 'get_eigenvalues', _counting_get_eigenvalues)
+
+    band_properties = vasprun_parser.get_quantity('band_properties')
+    eigenvalues = vasprun_parser.get_quantity('eigenvalues')
+    assert band_properties is not None
+    assert eigenvalues is not None
+    assert len(calls) == 1
+    parsed_data = vasprun_parser._parsed_data  # pylint: disable=protected-access
+    assert 'occupancies' in parsed_data
+    assert 'dos' not in parsed_data
+    assert 'trajectory' not in parsed_data
+
+
 @pytest.mark.parametrize('vasprun_parser', [('basic', {})], indirect=True)
 def test_parameter_results(fresh_aiida_env, vasprun_parser):
     """
@@ -96,6 +121,28 @@ def test_structure(fresh_aiida_env, vasprun_parser):
     assert data_obj.get_cell_volume() == np.float(163.22171870360754)
 
 
+@pytest.mark.parametrize('vasprun_parser', [('basic', {})], indirect=True)
+def test_structure_arrays(fresh_aiida_env, vasprun_parser):
+    """The structure is composed from arrays, with the same kinds and sites as when appending the atoms one by one."""
+    structure = vasprun_parser.get_quantity('structure')
+    assert structure['positions'].shape == (8, 3)
+    data_obj = NodeComposer.compose('structure', {'structure': structure})
+    reference = get_data_class('structure')(cell=structure['unitcell'])
+    for position, symbol in zip(structure['positions'], structure['symbols']):
+        reference.append_atom(position=position, symbols=symbol, name=symbol)
+    assert data_obj.get_attribute('kinds') == reference.get_attribute('kinds')
+    assert data_obj.get_attribute('sites') == reference.get_attribute('sites')
+    assert data_obj.get_site_kindnames() == reference.get_site_kindnames()
+    assert data_obj.get_ase() == reference.get_ase()
+    assert data_obj.get_pymatgen() == reference.get_pymatgen()
+
+    # One kind name given for two different symbols.
+    structure['kind_names'] = ['A'] * 8
+    structure['symbols'][0] = 'Ge'
+    with pytest.raises(ValueError):
+        NodeComposer.compose('structure', {'structure': structure})
+
+
 @pytest.mark.parametrize('vasprun_parser', [('basic', {})], indirect=True)
 def test_final_force(fresh_aiida_env, vasprun_parser):
     """Test that the forces are returned correctly."""
@@ -397,6 +444,57 @@ def test_pdos(fresh_aiida_env, vasprun_parser):
     assert energy[500] == 0.01
 
 
+@pytest.mark.parametrize('vasprun_parser', [('partial', {})], indirect=True)
+def test_pdos_storage(fresh_aiida_env, vasprun_parser):
+    """Check that the partial density of states is stored with a reduced precision, rounded and compressed."""
+    inputs = get_node_composer_inputs_from_file_parser(vasprun_parser, quantity_keys=['dos'])
+    reference = inputs['dos']['pdos']
+    data_obj = NodeComposer.compose('array', inputs, storage={'dtype': 'float32'})
+    assert type(data_obj) is get_data_class('array')  # pylint: disable=unidiomatic-typecheck
+    assert data_obj.get_array('pdos').dtype == np.float32
+    np.testing.assert_allclose(data_obj.get_array('pdos'), reference, rtol=1e-6)
+    assert data_obj.get_attribute('storage') == {'dtype': 'float32', 'tolerance': None, 'compress': False}
+
+    data_obj = NodeComposer.compose('array', inputs, storage={'dtype': 'float32', 'tolerance': 1e-3, 'compress': True})
+    assert isinstance(data_obj, get_data_class('vasp.array_bundle'))
+    data_obj.store()
+    assert data_obj.list_object_names() == ['arrays.npz']
+    assert np.abs(data_obj.get_array('pdos') - reference).max() <= 1e-3
+    assert data_obj.get_attribute('storage')['tolerance'] == 1e-3
+
+
+def test_storage_tolerance():
+    """Check that the tolerance holds after the cast, arrays of values too large for it keep their type."""
+    storage = get_storage_options({'dtype': 'float32', 'tolerance': 1e-6})
+    small = np.linspace(-1, 1, 101)
+    reduced = reduce_array(small, storage)
+    assert reduced.dtype == np.float32
+    assert np.abs(reduced - small).max() <= 1e-6
+    large = small * 1e3 + 1e-4
+    reduced = reduce_array(large, storage)
+    assert reduced.dtype == np.float64
+    assert np.abs(reduced - large).max() <= 1e-6
+    assert reduce_array(large, get_storage_options({'dtype': 'float32', 'tolerance': 1e-3})).dtype == np.float32
+
+
+@pytest.mark.parametrize('vasprun_parser', [('relax', {})], indirect=True)
+def test_trajectory_storage(fresh_aiida_env, vasprun_parser):
+    """Check that the trajectory is stored with a reduced precision, but can not be compressed."""
+    inputs = get_node_composer_inputs_from_file_parser(vasprun_parser, quantity_keys=['trajectory'])
+    data_obj = NodeComposer.compose('array.trajectory', inputs, storage={'dtype': 'float32'})
+    assert data_obj.get_array('positions').dtype == np.float32
+    assert data_obj.get_array('steps').dtype == inputs['trajectory']['steps'].dtype
+    np.testing.assert_allclose(data_obj.get_array('cells'), inputs['trajectory']['cells'], rtol=1e-6)
+    with pytest.raises(ValueError):
+        NodeComposer.compose('array.trajectory', inputs, storage={'compress': True})
+    with pytest.raises(ValueError):
+        NodeComposer.compose('array.trajectory', inputs, storage={'dtype': 'int32'})
+    with pytest.raises(ValueError):
+        NodeComposer.compose('array.trajectory', inputs, storage={'precision': 'single'})
+    with pytest.raises(ValueError):
+        NodeComposer.compose('dict', {'version': '5.4.4'}, storage={'dtype': 'float32'})
+
+
 @pytest.mark.parametrize('vasprun_parser', [('partial', {})], indirect=True)
 def test_projectors(fresh_aiida_env, vasprun_parser):
     """
@@ -420,6 +518,36 @@ def test_projectors(fresh_aiida_env, vasprun_parser):
     assert np.all(proj[4, 3, 5] == np.array([0.2033, 0.0001, 0.0001, 0.0001, 0.0, 0.0, 0.0, 0.0, 0.0]))
 
 
+@pytest.mark.parametrize('vasprun_parser', [('partial', {'projectors_ions': [8], 'projectors_orbitals': ['s', 'x2-y2']})], indirect=True)
+def test_projectors_selection(fresh_aiida_env, vasprun_parser):
+    """Check that the orbitals are selected by the names in the field tags of the projections."""
+    projectors = vasprun_parser.get_quantity('projectors')
+    assert projectors['orbitals'].tolist() == ['s', 'x2-y2']
+    assert projectors['projectors'].shape == (1, 64, 21, 2)
+    assert projectors['projectors'][0, 0, 5].tolist() == [0.1909, 0.0]
+
+
+@pytest.mark.parametrize('settings', [{'projectors_ions': [9]}, {'projectors_orbitals': ['p']}, {}])
+def test_projectors_not_available(fresh_aiida_env, tmpdir, settings):
+    """Check that selecting ions or orbitals that are not in the projections, or projections parsevasp can not read, set an exit code."""
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser
+    from aiida_vasp.parsers.settings import ParserSettings
+    from aiida_vasp.utils.fixtures.testdata import data_path
+    path = data_path('partial', 'vasprun.xml')
+    if not settings:
+        # The projections of LORBIT = 10 are only decomposed by the angular momentum.
+        with open(path) as handler:
+            content = handler.read()
+        content = content.replace('<field>  s</field>\n    <field> py</field>', '<field>  s</field>\n    <field>  p</field>')
+        path = str(tmpdir.join('vasprun.xml'))
+        with open(path, 'w') as handler:
+            handler.write(content.replace('<field> pz</field>\n', '').replace('<field> px</field>\n', ''))
+    parser = VasprunParser(file_path=path, settings=ParserSettings(settings), exit_codes=VaspCalculation.exit_codes)
+    assert parser.get_quantity('projectors') is None
+    assert parser.exit_code.status == VaspCalculation.exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.status
+
+
 @pytest.mark.parametrize('vasprun_parser', [('basic', {})], indirect=True)
 def test_bands(fresh_aiida_env, vasprun_parser):
     """
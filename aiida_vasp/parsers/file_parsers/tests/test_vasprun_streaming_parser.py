@@ -0,0 +1,197 @@
+"""Test the streaming vasprun.xml parser."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import,protected-access
+
+import pytest
+import numpy as np
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.fixtures.testdata import data_path
+from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser
+from aiida_vasp.parsers.file_parsers.vasprun_streaming import StreamingVasprunParser, StepArray, SectionFilter
+from aiida_vasp.parsers.settings import ParserSettings
+
+
+def _get_parsers(folder, settings=None):
+    """Return a VasprunParser and a StreamingVasprunParser for the same vasprun.xml."""
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    path = data_path(folder, 'vasprun.xml')
+    return [
+        parser_cls(file_path=path, settings=ParserSettings(settings or {}), exit_codes=VaspCalculation.exit_codes)
+        for parser_cls in (VasprunParser, StreamingVasprunParser)
+    ]
+
+
+def test_step_array():
+    """Check that the step array grows beyond the preallocated capacity and can keep only the last entry."""
+    steps = StepArray(capacity=2)
+    last_only = StepArray(capacity=2, keep_all=False)
+    for step in range(5):
+        steps.append(np.full((2, 3), step))
+        last_only.append(np.full((2, 3), step))
+    assert len(steps) == 5
+    assert len(last_only) == 5
+    assert steps.to_array().shape == (5, 2, 3)
+    assert np.all(steps.to_array()[:, 0, 0] == np.arange(5))
+    assert np.all(last_only.last == 4)
+    assert last_only.indices().tolist() == [4]
+    assert last_only.to_array().shape == (1, 2, 3)
+    assert np.all(last_only.to_array() == 4)
+    assert StepArray(keep_all=False).to_array() is None
+
+    strided = StepArray(capacity=2, stride=3, tail=2)
+    for step in range(8):
+        strided.append(np.full((2, 3), step))
+    assert strided.indices().tolist() == [0, 3, 6, 7]
+    assert strided.to_array()[:, 0, 0].tolist() == [0, 3, 6, 7]
+    assert np.all(strided.last == 7)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1000])
+def test_section_filter(chunk_size):
+    """Check that the sections are cut out, also when their tags are split between chunks."""
+    xml = b'<a><dos comment="x"><total><r>1</r></total></dos><b>2</b><total/><partial>3</partial><c>4</c></a>'
+    section_filter = SectionFilter(['dos', 'total', 'partial'])
+    filtered = b''.join([section_filter.feed(xml[i:i + chunk_size]) for i in range(0, len(xml), chunk_size)]) + section_filter.close()
+    assert filtered == b'<a><b>2</b><c>4</c></a>'
+
+
+@pytest.mark.parametrize('folder', ['basic', 'relax', 'relax-truncated'])
+def test_trajectory(fresh_aiida_env, folder):
+    """Compare the trajectory with the one from the parsevasp backend."""
+    reference, streaming = _get_parsers(folder)
+    ref_trajectory = reference.get_quantity('trajectory')
+    trajectory = streaming.get_quantity('trajectory')
+    assert set(trajectory) == set(ref_trajectory)
+    for key, array in ref_trajectory.items():
+        assert np.array_equal(trajectory[key], array)
+
+
+@pytest.mark.parametrize(['folder', 'steps'], [('basic', [0, 1]), ('relax', [0, 5, 10, 15, 17, 18])])
+def test_trajectory_selection(fresh_aiida_env, folder, steps):
+    """Compare the selected steps and arrays of the trajectory with the ones from the parsevasp backend."""
+    settings = {'add_trajectory': True, 'trajectory_stride': 5, 'trajectory_tail': 2, 'trajectory_arrays': ['forces']}
+    reference, streaming = _get_parsers(folder, settings)
+    full_trajectory = _get_parsers(folder)[0].get_quantity('trajectory')
+    trajectory = streaming.get_quantity('trajectory')
+    assert trajectory['steps'].tolist() == steps
+    assert set(trajectory) == {'positions', 'forces', 'symbols', 'steps'}
+    for key, array in reference.get_quantity('trajectory').items():
+        assert np.array_equal(trajectory[key], array)
+    assert np.array_equal(trajectory['positions'], full_trajectory['positions'][steps])
+    assert np.array_equal(trajectory['forces'], full_trajectory['forces'][steps])
+    # The forces of the last step are kept regardless of the selection.
+    assert np.array_equal(streaming.get_quantity('forces')['final'], full_trajectory['forces'][-1])
+
+
+@pytest.mark.parametrize('folder', ['basic', 'relax'])
+@pytest.mark.parametrize('settings', [{}, {'electronic_step_energies': True, 'energy_type': ['energy_free', 'energy_no_entropy']}])
+def test_energies(fresh_aiida_env, folder, settings):
+    """Compare the energies with the ones from the parsevasp backend."""
+    reference, streaming = _get_parsers(folder, settings)
+    ref_energies = reference.get_quantity('energies')
+    energies = streaming.get_quantity('energies')
+    assert set(energies) == set(ref_energies)
+    for key, array in ref_energies.items():
+        assert np.allclose(energies[key], array)
+    assert streaming.get_quantity('total_energies') == reference.get_quantity('total_energies')
+
+
+@pytest.mark.parametrize('folder', ['basic', 'relax', 'relax-truncated', 'relax-not-converged'])
+def test_last_step(fresh_aiida_env, folder):
+    """Compare the quantities of the last ionic step and the run status with the parsevasp backend."""
+    reference, streaming = _get_parsers(folder, {'add_misc': True})
+    # Only the last ionic step is kept when the trajectory is not requested.
+    assert not streaming._reader.store_steps
+    for key in ['forces', 'stress']:
+        assert np.allclose(streaming.get_quantity(key)['final'], reference.get_quantity(key)['final'])
+    for key in ['maximum_force', 'maximum_stress', 'version']:
+        assert streaming.get_quantity(key) == pytest.approx(reference.get_quantity(key))
+    run_status = streaming.get_quantity('run_status')
+    run_status.pop('truncated_at_step', None)
+    assert run_status == reference.get_quantity('run_status')
+    structure = streaming.get_quantity('structure')
+    ref_structure = reference.get_quantity('structure')
+    assert np.allclose(structure['unitcell'], ref_structure['unitcell'])
+    assert np.array_equal(structure['symbols'], ref_structure['symbols'])
+    assert np.allclose(structure['positions'], ref_structure['positions'])
+    kpoints = streaming.get_quantity('kpoints')
+    ref_kpoints = reference.get_quantity('kpoints')
+    assert np.array_equal(kpoints['points'], ref_kpoints['points'])
+    assert np.array_equal(kpoints['weights'], ref_kpoints['weights'])
+    assert streaming.get_quantity('dos') is None
+    if folder == 'basic':
+        assert streaming.get_quantity('fermi_level') == reference.get_quantity('fermi_level')
+
+
+def test_truncated(fresh_aiida_env):
+    """Check that a truncated file is read up to the last complete ionic step."""
+    _, streaming = _get_parsers('relax-truncated')
+    assert streaming._xml_truncated
+    assert streaming.get_quantity('trajectory')['positions'].shape == (18, 8, 3)
+    run_status = streaming.get_quantity('run_status')
+    assert run_status['finished'] is False
+    assert run_status['truncated_at_step'] == 18
+
+
+def test_truncated_last_step(fresh_aiida_env):
+    """Check that only the last complete ionic step of a truncated file is read if no quantity needs all steps."""
+    reference, streaming = _get_parsers('relax-truncated', {'add_misc': True, 'add_structure': True})
+    assert streaming._reader.num_steps == 1
+    assert streaming._reader.truncated_at_step == 18
+    assert np.array_equal(streaming.get_quantity('forces')['final'], reference.get_quantity('forces')['final'])
+    assert np.array_equal(streaming.get_quantity('structure')['unitcell'], reference.get_quantity('structure')['unitcell'])
+    # The recovery of parsevasp does not provide the energies, this is the energy of the 18th step of the complete run.
+    assert streaming.get_quantity('total_energies') == {'energy_extrapolated': pytest.approx(-43.39044584)}
+    run_status = streaming.get_quantity('run_status')
+    assert run_status['truncated_at_step'] == 18
+    assert run_status['finished'] is False
+    assert run_status['ionic_converged'] is False
+
+
+@pytest.mark.parametrize('folder', ['relax', 'relax-truncated'])
+def test_compressed_stream(fresh_aiida_env, tmpdir, monkeypatch, folder):
+    """Check that a compressed file is read from the stream, without an uncompressed copy, also when it is truncated."""
+    import gzip
+    import shutil
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    from aiida_vasp.parsers.file_parsers.parser import SingleFile
+    settings = {'add_misc': True, 'add_structure': True}
+    _, reference = _get_parsers(folder, settings)
+    path = str(tmpdir.join('vasprun.xml.gz'))
+    with open(data_path(folder, 'vasprun.xml'), 'rb') as source, gzip.open(path, 'wb') as destination:
+        shutil.copyfileobj(source, destination)
+
+    monkeypatch.setattr(SingleFile, 'local_path', property(lambda self: pytest.fail('The file was copied.')))
+    with open(path, 'rb') as handler:
+        streaming = StreamingVasprunParser(file_handler=handler, settings=ParserSettings(settings), exit_codes=VaspCalculation.exit_codes)
+        for key in ['structure', 'forces', 'total_energies', 'run_status']:
+            value, expected = streaming.get_quantity(key), reference.get_quantity(key)
+            if isinstance(expected, dict) and 'final' in expected:
+                assert np.array_equal(value['final'], expected['final'])
+            elif key == 'structure':
+                assert np.array_equal(value['unitcell'], expected['unitcell'])
+            else:
+                assert value == expected
+
+
+@pytest.mark.parametrize('folder', ['basic', 'spin'])
+def test_bands(fresh_aiida_env, folder):
+    """Compare the eigenvalues, occupancies and band properties with the parsevasp backend."""
+    reference, streaming = _get_parsers(folder)
+    for key in ['eigenvalues', 'occupancies']:
+        assert np.array_equal(np.stack(streaming.get_quantity(key)), np.stack(reference.get_quantity(key)))
+    assert streaming.get_quantity('band_properties') == pytest.approx(reference.get_quantity('band_properties'))
+
+
+def test_skipped_sections(fresh_aiida_env):
+    """Check that only the sections needed by the requested quantities are read."""
+    reference, streaming = _get_parsers('basic', {'add_misc': ['total_energies', 'maximum_force']})
+    skipped_sections = streaming._reader.skipped_sections
+    for section in ['eigenvalues', 'dos', 'projected']:
+        assert section in skipped_sections
+    assert 'scstep' not in skipped_sections
+    assert streaming._reader.eigenvalues is None
+    # Quantities with skipped sections are still available, at the cost of reading the file again.
+    assert np.array_equal(np.stack(streaming.get_quantity('eigenvalues')), np.stack(reference.get_quantity('eigenvalues')))
+    assert 'eigenvalues' not in streaming._reader.skipped_sections
+    assert streaming.get_quantity('total_energies') == reference.get_quantity('total_energies')
@@ -0,0 +1,104 @@
+"""Test the XDATCAR parser."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import,import-outside-toplevel
+
+import numpy as np
+import pytest
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.fixtures.synthetic import SyntheticRun
+from aiida_vasp.utils.fixtures.testdata import data_path
+from aiida_vasp.parsers.file_parsers.xdatcar import XdatcarParser
+
+VARIABLE_CELL = """Si2
+           1
+     0.000000    2.750000    2.750000
+     2.750000    0.000000    2.750000
+     2.750000    2.750000    0.000000
+   Si
+   2
+Direct configuration=     1
+   0.00000000  0.00000000  0.00000000
+   0.25000000  0.25000000  0.25000000
+Si2
+           2
+     0.000000    1.400000    1.400000
+     1.400000    0.000000    1.400000
+     1.400000    1.400000    0.000000
+   Si
+   2
+Direct configuration=     2
+   0.00000000  0.00000000  0.01000000
+   0.25000000  0.25000000  0.24000000
+"""
+
+
+@pytest.fixture
+def exit_codes(fresh_aiida_env):
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    return VaspCalculation.exit_codes
+
+
+@pytest.mark.parametrize('variable_cell', [False, True])
+def test_synthetic(tmpdir, variable_cell):
+    """All configurations are read, with the header repeated for each of them or not."""
+    run = SyntheticRun(num_atoms=5, num_steps=4)
+    path = str(tmpdir.join('XDATCAR'))
+    run.write_xdatcar(path, variable_cell=variable_cell)
+    trajectory = XdatcarParser(file_path=path).get_quantity('xdatcar-trajectory')
+    np.testing.assert_allclose(trajectory['positions'], run.positions, atol=1e-8)
+    np.testing.assert_allclose(trajectory['cells'], np.broadcast_to(run.cell, (4, 3, 3)), atol=1e-6)
+    assert trajectory['symbols'].tolist() == run.symbols
+    assert trajectory['steps'].tolist() == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize('variable_cell', [False, True])
+def test_selection(tmpdir, variable_cell):
+    """Only the selected configurations and arrays are kept, with the indices of the configurations as steps."""
+    from aiida_vasp.parsers.settings import ParserSettings
+    run = SyntheticRun(num_atoms=5, num_steps=7)
+    path = str(tmpdir.join('XDATCAR'))
+    run.write_xdatcar(path, variable_cell=variable_cell)
+    settings = ParserSettings({'trajectory_stride': 3, 'trajectory_tail': 2})
+    trajectory = XdatcarParser(file_path=path, settings=settings).get_quantity('xdatcar-trajectory')
+    assert trajectory['steps'].tolist() == [0, 3, 5, 6]
+    np.testing.assert_allclose(trajectory['positions'], run.positions[[0, 3, 5, 6]], atol=1e-8)
+    np.testing.assert_allclose(trajectory['cells'], np.broadcast_to(run.cell, (4, 3, 3)), atol=1e-6)
+
+    settings = ParserSettings({'trajectory_arrays': []})
+    trajectory = XdatcarParser(file_path=path, settings=settings).get_quantity('xdatcar-trajectory')
+    assert sorted(trajectory) == ['positions', 'steps', 'symbols']
+
+
+def test_variable_cell(tmpdir):
+    """The cell of each configuration is scaled by its own scaling factor."""
+    path = tmpdir.join('XDATCAR')
+    path.write(VARIABLE_CELL)
+    trajectory = XdatcarParser(file_path=str(path)).get_quantity('xdatcar-trajectory')
+    assert trajectory['cells'][:, 0, 1].tolist() == [2.75, 2.8]
+    assert trajectory['positions'][:, 1, 2].tolist() == [0.25, 0.24]
+
+    # The last configuration of a killed run is incomplete.
+    path.write(VARIABLE_CELL[:-30])
+    trajectory = XdatcarParser(file_path=str(path)).get_quantity('xdatcar-trajectory')
+    assert trajectory['positions'].shape == (1, 2, 3)
+
+
+def test_relax(exit_codes):
+    """The positions agree with the ones from vasprun.xml."""
+    from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser
+    from aiida_vasp.parsers.settings import ParserSettings
+    trajectory = XdatcarParser(file_path=data_path('test_relax_wc', 'out', 'XDATCAR')).get_quantity('xdatcar-trajectory')
+    vasprun = VasprunParser(file_path=data_path('test_relax_wc', 'out', 'vasprun.xml'), settings=ParserSettings({}),
+                            exit_codes=exit_codes).get_quantity('trajectory')
+    np.testing.assert_allclose(trajectory['positions'], vasprun['positions'][:1])
+    np.testing.assert_allclose(trajectory['cells'], vasprun['cells'][:1])
+    assert trajectory['symbols'].tolist() == vasprun['symbols'].tolist()
+
+
+def test_vasp4(tmpdir, exit_codes):
+    """The layout of VASP 4, without the element names, is not supported."""
+    path = tmpdir.join('XDATCAR')
+    path.write('\n'.join(line for line in VARIABLE_CELL.split('\n')[:10] if line.strip() != 'Si'))
+    parser = XdatcarParser(file_path=str(path), exit_codes=exit_codes)
+    assert parser.get_quantity('xdatcar-trajectory') is None
+    assert parser.exit_code.status == exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.status
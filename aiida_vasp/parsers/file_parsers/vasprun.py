@@ -5,14 +5,16 @@ vasprun parser.
 The file parser that handles the parsing of vasprun.xml files.
 """
 # pylint: disable=too-many-public-methods, protected-access
+import re
 import sys
 import numpy as np
 
 from parsevasp.vasprun import Xml
-from parsevasp.kpoints import Kpoint
 from parsevasp import constants as parsevaspct
 from aiida_vasp.parsers.file_parsers.parser import BaseFileParser, SingleFile
 from aiida_vasp.utils.compare_bands import get_band_properties
+from aiida_vasp.utils.projectors import get_orbital_names, reduce_projectors
+from aiida_vasp.utils.trajectory import get_trajectory_selection, select_steps
 
 DEFAULT_OPTIONS = {
     'quantities_to_parse': [
@@ -43,6 +45,15 @@ DEFAULT_OPTIONS = {
     'electronic_step_energies': False
 }
 
+# The field tags of the projections in <projected>, which follow the array of the eigenvalues. parsevasp does not read them.
+PROJECTED_FIELDS = re.compile(br'</eigenvalues>\s*<array>\s*(?:<dimension[^>]*>[^<]*</dimension>\s*)*((?:<field>[^<]*</field>\s*)+)<set>')
+FIELD = re.compile(br'<field>([^<]*)</field>')
+# The number of orbitals parsevasp reads the projections for.
+PARSEVASP_NUM_ORBITALS = 9
+# Size of the chunks searched for the field tags, and the overlap of consecutive chunks, which is longer than the tags.
+CHUNK_SIZE = 1 << 20
+CHUNK_OVERLAP = 1 << 12
+
 
 class VasprunParser(BaseFileParser):
     """Interface to parsevasp's xml parser."""
@@ -76,26 +87,31 @@ class VasprunParser(BaseFileParser):
             'inputs': [],
             'name': 'occupancies',
             'prerequisites': [],
+            'alternatives': ['eigenval-occupancies']
         },
         'trajectory': {
             'inputs': [],
             'name': 'trajectory',
             'prerequisites': [],
+            'alternatives': ['xdatcar-trajectory']
         },
         'energies': {
             'inputs': [],
             'name': 'energies',
             'prerequisites': [],
+            'alternatives': ['oszicar-energies']
         },
         'total_energies': {
             'inputs': [],
             'name': 'total_energies',
             'prerequisites': [],
+            'alternatives': ['oszicar-total_energies']
         },
         'projectors': {
             'inputs': [],
             'name': 'projectors',
             'prerequisites': [],
+            'alternatives': ['procar-projectors']
         },
         'dielectrics': {
             'inputs': [],
@@ -151,6 +167,7 @@ class VasprunParser(BaseFileParser):
             'inputs': [],
             'name': 'run_status',
             'prerequisites': [],
+            'alternatives': ['oszicar-run_status']
         },
         'version': {
             'inputs': [],
@@ -179,17 +196,19 @@ class VasprunParser(BaseFileParser):
         self._exit_codes = kwargs.get('exit_codes', None)
         if 'file_path' in kwargs:
             self._init_xml(kwargs['file_path'])
+        if 'file_handler' in kwargs:
+            self._init_xml(handler=kwargs['file_handler'])
         if 'data' in kwargs:
             self._init_xml(kwargs['data'].get_file_abs_path())
 
-    def _init_xml(self, path):
+    def _init_xml(self, path=None, handler=None):
         """Create parsevasp Xml instance"""
-        self._data_obj = SingleFile(path=path)
+        self._data_obj = SingleFile(path=path, handler=handler)
 
         # Since vasprun.xml can be fairly large, we will parse it only
         # once and store the parsevasp Xml object.
         try:
-            self._xml = Xml(file_path=path, k_before_band=True, logger=self._logger)
+            self._xml = Xml(file_path=self._data_obj.local_path, k_before_band=True, logger=self._logger)
             # Let us also check if the xml was truncated as the parser uses lxml and its
             # recovery mode in case we can use some of the results.
             self._xml_truncated = self._xml.truncated
@@ -209,26 +228,29 @@ class VasprunParser(BaseFileParser):
             quantities_to_parse = self._settings.quantity_names_to_parse
 
         result = {}
+        for quantity in quantities_to_parse:
+            if quantity in self._parsable_items:
+                result[quantity] = self._evaluate(quantity)
+
+        return result
+
+    def _parse_quantity(self, quantity_key):
+        """Evaluate a single quantity, only querying the parts of the xml file it needs."""
 
         if self._xml is None:
             # parsevasp threw an exception, which means vasprun.xml could not be parsed.
-            for quantity in quantities_to_parse:
-                if quantity in self._parsable_items:
-                    result[quantity] = None
-            return result
+            return None
 
-        for quantity in quantities_to_parse:
-            if quantity in self._parsable_items:
-                result[quantity] = getattr(self, quantity)
+        result = getattr(self, quantity_key)
 
-        # Now we make sure that if some of the requested quantities sets an error during parsing and
+        # Now we make sure that if the requested quantity sets an error during parsing and
         # the xml file is in recover mode, the calculation is simply garbage. Also, exit_code is not always set, or
         # its status can be zero.
         if self._exit_code is None:
             self._exit_code = self._exit_codes.NO_ERROR
         if self._exit_code.status:
             if (self._xml_truncated and self._exit_code.status == self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.status):
-                self._exit_code = self._exit_codes.ERROR_RECOVERY_PARSING_OF_XML_FAILED.format(quantities=list(result.keys()))
+                self._exit_code = self._exit_codes.ERROR_RECOVERY_PARSING_OF_XML_FAILED.format(quantities=[quantity_key])
 
         return result
 
@@ -302,18 +324,13 @@ class VasprunParser(BaseFileParser):
 
     @property
     def kpoints(self):
-        """Fetch the kpoints from parsevasp an store in KpointsData."""
+        """Fetch the kpoints from parsevasp, as arrays of the points in reciprocal coordinates and their weights."""
 
         kpts = self._xml.get_kpoints()
         kptsw = self._xml.get_kpointsw()
         kpoints_data = None
         if (kpts is not None) and (kptsw is not None):
-            # create a KpointsData object and store k-points
-            kpoints_data = {}
-            kpoints_data['mode'] = 'explicit'
-            kpoints_data['points'] = []
-            for kpt, kptw in zip(kpts, kptsw):
-                kpoints_data['points'].append(Kpoint(kpt, weight=kptw))
+            kpoints_data = {'mode': 'explicit', 'points': np.asarray(kpts), 'weights': np.asarray(kptsw), 'cartesian': False}
 
         return kpoints_data
 
@@ -332,7 +349,7 @@ class VasprunParser(BaseFileParser):
 
         """
 
-        return self.last_structure
+        return self._evaluate('last_structure')
 
     @property
     def last_structure(self):
@@ -395,7 +412,7 @@ class VasprunParser(BaseFileParser):
 
         """
 
-        final_forces = self.final_forces
+        final_forces = self._evaluate('final_forces')
         forces = {'final': final_forces}
 
         return forces
@@ -404,7 +421,7 @@ class VasprunParser(BaseFileParser):
     def maximum_force(self):
         """Fetch the maximum force of at the last ionic run."""
 
-        forces = self.final_forces
+        forces = self._evaluate('final_forces')
         if forces is None:
             self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
             return None
@@ -445,7 +462,7 @@ class VasprunParser(BaseFileParser):
 
         """
 
-        final_stress = self.final_stress
+        final_stress = self._evaluate('final_stress')
         stress = {'final': final_stress}
         return stress
 
@@ -453,7 +470,7 @@ class VasprunParser(BaseFileParser):
     def maximum_stress(self):
         """Fetch the maximum stress of at the last ionic run."""
 
-        stress = self.final_stress
+        stress = self._evaluate('final_stress')
         if stress is None:
             self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
             return None
@@ -465,50 +482,40 @@ class VasprunParser(BaseFileParser):
         """
         Fetch unitcells, positions, species, forces and stress.
 
-        For all calculation steps from parsevasp.
+        For the calculation steps from parsevasp selected by the parser settings, see
+        ``get_trajectory_selection``. Only the selected steps are converted to arrays, the
+        ``steps`` are their indices.
 
         """
 
-        unitcell = self._xml.get_unitcell('all')
-        positions = self._xml.get_positions('all')
+        stride, tail, names = get_trajectory_selection(self._settings)
+        getters = {
+            'cells': self._xml.get_unitcell,
+            'positions': self._xml.get_positions,
+            'forces': self._xml.get_forces,
+            'stress': self._xml.get_stress
+        }
         species = self._xml.get_species()
-        forces = self._xml.get_forces('all')
-        stress = self._xml.get_stress('all')
         # make sure all are sorted, first to last calculation
         # (species is constant)
-        unitcell = sorted(unitcell.items())
-        positions = sorted(positions.items())
-        forces = sorted(forces.items())
-        stress = sorted(stress.items())
-        # convert to numpy
-        unitcell = np.asarray([item[1] for item in unitcell])
-        positions = np.asarray([item[1] for item in positions])
-        forces = np.asarray([item[1] for item in forces])
-        stress = np.asarray([item[1] for item in stress])
+        steps = {name: sorted((getters[name]('all') or {}).items()) for name in names}
+        if species is None or any(not items for items in steps.values()):
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+
+        stepids = select_steps(len(steps['positions']), stride, tail)
+        # convert the selected steps to numpy
+        trajectory_data = {name: np.asarray([items[index][1] for index in stepids]) for name, items in steps.items()}
         # Aiida wants the species as symbols, so invert
         elements = _invert_dict(parsevaspct.elements)
-        symbols = np.asarray([elements[item].title() for item in species.tolist()])
-
-        if (unitcell is not None) and (positions is not None) and \
-           (species is not None) and (forces is not None) and \
-           (stress is not None):
-            trajectory_data = {}
-
-            keys = ('cells', 'positions', 'symbols', 'forces', 'stress', 'steps')
-            stepids = np.arange(unitcell.shape[0])
-
-            for key, data in zip(keys, (unitcell, positions, symbols, forces, stress, stepids)):
-                trajectory_data[key] = data
-            return trajectory_data
-
-        self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
-
-        return None
+        trajectory_data['symbols'] = np.asarray([elements[item].title() for item in species.tolist()])
+        trajectory_data['steps'] = stepids
+        return trajectory_data
 
     @property
     def total_energies(self):
         """Fetch the total energies after the last ionic run."""
-        energies = self.energies
+        energies = self._evaluate('energies')
         if energies is None:
             self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
             return None
@@ -567,7 +574,30 @@ class VasprunParser(BaseFileParser):
         else:
             projectors['projectors'] = np.asarray(prj)
 
-        return projectors
+        orbitals = self._get_projected_orbitals()
+        if orbitals is None or len(orbitals) != PARSEVASP_NUM_ORBITALS:
+            # parsevasp only reads the projections on the nine orbitals of LORBIT >= 11 without f orbitals.
+            self._logger.warning('The projections on the orbitals {} can not be read from vasprun.xml.'.format(orbitals))
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+        try:
+            return reduce_projectors(projectors['projectors'], orbitals, self._settings)
+        except ValueError as error:
+            self._logger.warning(str(error))
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+
+    def _get_projected_orbitals(self):
+        """Return the names of the orbitals of the projections from their field tags, None if they are not found."""
+        previous = b''
+        with self._data_obj.open('rb') as handler:
+            for chunk in iter(lambda: handler.read(CHUNK_SIZE), b''):
+                buffer = previous + chunk
+                match = PROJECTED_FIELDS.search(buffer)
+                if match is not None:
+                    return get_orbital_names([field.decode() for field in FIELD.findall(match.group(1))])
+                previous = buffer[-CHUNK_OVERLAP:]
+        return None
 
     @property
     def dielectrics(self):
@@ -673,8 +703,8 @@ class VasprunParser(BaseFileParser):
     def band_properties(self):
         """Fetch miscellaneous electronic structure data"""
 
-        eigenvalues = self.eigenvalues
-        occupations = self.occupancies
+        eigenvalues = self._evaluate('eigenvalues')
+        occupations = self._evaluate('occupancies')
         if eigenvalues is None:
             return None
 
@@ -716,21 +746,19 @@ class VasprunParser(BaseFileParser):
 
 
 def _build_structure(lattice):
-    """Builds a structure according to AiiDA spec."""
-    structure_dict = {}
-    structure_dict['unitcell'] = lattice['unitcell']
-    structure_dict['sites'] = []
-
-    # AiiDA wants the species as symbols, so invert
+    """Builds a structure according to AiiDA spec, with the cartesian positions and the symbols of all sites as arrays."""
+    unitcell = np.asarray(lattice['unitcell'])
+    # AiiDA wants the species as symbols, so invert and look up each distinct specie once
     elements = _invert_dict(parsevaspct.elements)
-    for pos, specie in zip(lattice['positions'], lattice['species']):
-        site = {}
-        site['position'] = np.dot(pos, lattice['unitcell'])
-        site['symbol'] = elements[specie].title()
-        site['kind_name'] = elements[specie].title()
-        structure_dict['sites'].append(site)
-
-    return structure_dict
+    species, indices = np.unique(lattice['species'], return_inverse=True)
+    symbols = np.array([elements[specie].title() for specie in species.tolist()])[indices.ravel()]
+
+    return {
+        'unitcell': unitcell,
+        'positions': np.dot(np.asarray(lattice['positions']).reshape(-1, 3), unitcell),
+        'symbols': symbols,
+        'kind_names': symbols,
+    }
 
 
 def _invert_dict(dct):
@@ -0,0 +1,695 @@
+"""
+Streaming vasprun parser.
+
+-------------------------
+Alternative backend for vasprun.xml files of long MD and relaxation runs, which reads the file
+with an event driven parser so that only a single ionic step is held in memory at any time.
+"""
+# pylint: disable=protected-access
+import os
+import re
+import sys
+import mmap
+import numpy as np
+from lxml import etree
+
+from aiida_vasp.parsers.file_parsers.parser import SingleFile
+from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser, DEFAULT_OPTIONS
+from aiida_vasp.utils.trajectory import TRAJECTORY_ARRAYS, get_trajectory_selection, select_steps
+
+# The vasprun.xml sections each quantity of the streaming backend is read from,
+# all other quantities are left to the alternatives in other files.
+QUANTITY_SECTIONS = {
+    'structure': ['atominfo', 'structure'],
+    'kpoints': ['kpoints'],
+    'eigenvalues': ['eigenvalues'],
+    'occupancies': ['eigenvalues'],
+    'band_properties': ['eigenvalues'],
+    'trajectory': ['atominfo', 'structure', 'forces', 'stress'],
+    'energies': ['scstep', 'energy'],
+    'total_energies': ['scstep', 'energy'],
+    'forces': ['forces'],
+    'stress': ['stress'],
+    'maximum_force': ['forces'],
+    'maximum_stress': ['stress'],
+    'fermi_level': ['dos'],
+    'run_status': ['parameters', 'scstep'],
+    'version': ['generator'],
+}
+
+# Quantities that need all ionic steps, without them only the last complete step of a truncated file is read.
+ALL_STEPS_QUANTITIES = ['trajectory', 'energies']
+
+# Sections that are cut out of the file before it reaches the XML parser if no requested quantity needs them.
+SKIPPABLE_SECTIONS = [
+    'scstep', 'eigenvalues', 'dos', 'total', 'partial', 'projected', 'dielectricfunction', 'dynmat', 'eigenvalues_kpoints_opt',
+    'projected_kpoints_opt'
+]
+
+# Total energy types and their tag names in vasprun.xml, as in parsevasp.
+SUPPORTED_TOTAL_ENERGIES = {'energy_extrapolated': 'e_0_energy', 'energy_free': 'e_fr_energy', 'energy_no_entropy': 'e_wo_entrp'}
+
+# Size of the chunks the file is read in.
+CHUNK_SIZE = 1 << 20
+
+
+class StepArray(object):  # pylint: disable=useless-object-inheritance,too-many-instance-attributes
+    """
+    Array growing by one entry per ionic step.
+
+    Storage is preallocated for the expected number of steps and doubled when it runs out. Every ``stride`` th
+    entry is stored, starting with the first, and the last ``tail`` entries, see ``select_steps``. If ``keep_all``
+    is False only the last entry is stored.
+    """
+
+    def __init__(self, capacity=1, keep_all=True, dtype=float, stride=1, tail=0):
+        self._stride = stride if keep_all else 0
+        self._capacity = max(-(-capacity // stride), 1) if keep_all else 0
+        self._tail = tail if keep_all else 1
+        # The last entries are kept in a ring buffer, which also holds the last entry if no tail is stored.
+        self._ring_size = max(self._tail, 1)
+        self._dtype = dtype
+        self._data = None
+        self._ring = None
+        self._size = 0
+        self._count = 0
+
+    def __len__(self):
+        """Number of entries appended, including the ones that were not kept."""
+        return self._count
+
+    def append(self, value):
+        """Copy value into the next slot."""
+        value = np.asarray(value, dtype=self._dtype)
+        if self._ring is None:
+            self._ring = np.empty((self._ring_size,) + value.shape, dtype=self._dtype)
+            if self._stride:
+                self._data = np.empty((self._capacity,) + value.shape, dtype=self._dtype)
+        if self._stride and self._count % self._stride == 0:
+            if self._size == self._data.shape[0]:
+                grown = np.empty((2 * self._size,) + self._data.shape[1:], dtype=self._dtype)
+                grown[:self._size] = self._data
+                self._data = grown
+            self._data[self._size] = value
+            self._size += 1
+        self._ring[self._count % self._ring_size] = value
+        self._count += 1
+
+    @property
+    def last(self):
+        if not self._count:
+            return None
+        return self._ring[(self._count - 1) % self._ring_size]
+
+    def indices(self):
+        """Return the indices of the stored entries among all appended ones."""
+        if not self._stride:
+            return np.arange(max(self._count - 1, 0), self._count)
+        return select_steps(self._count, self._stride, self._tail)
+
+    def to_array(self):
+        """Return the stored entries, releasing the unused capacity."""
+        if self._ring is None:
+            return None
+        if not self._stride:
+            # Only the last entry is kept.
+            return self.last[np.newaxis].copy()
+        if self._stride == 1:
+            if self._size < self._data.shape[0]:
+                self._data = self._data[:self._size].copy()
+            return self._data
+        indices = self.indices()
+        strided = indices % self._stride == 0
+        array = np.empty((indices.size,) + self._ring.shape[1:], dtype=self._dtype)
+        array[strided] = self._data[indices[strided] // self._stride]
+        array[~strided] = self._ring[indices[~strided] % self._ring_size]
+        return array
+
+
+class SectionFilter(object):  # pylint: disable=useless-object-inheritance
+    """
+    Cut elements with the given tags out of a stream of XML chunks.
+
+    The elements are located by searching for their start and end tags in the raw bytes, so no nodes are
+    ever built for them. Elements with these tags are not expected to be nested into each other.
+    """
+
+    def __init__(self, tags):
+        self._start = re.compile(b'<(' + b'|'.join([re.escape(tag.encode()) for tag in tags]) + br')[\s/>]')
+        # A start or end tag might be split between two chunks, so this much is held back.
+        self._overlap = max([len(tag) for tag in tags]) + 3
+        self._pending = b''
+        self._end = None
+
+    def feed(self, chunk):
+        """Return the part of the stream up to the end of chunk that is not cut out."""
+        buffer = self._pending + chunk
+        kept = []
+        position = 0
+        while True:
+            if self._end is not None:
+                index = buffer.find(self._end, position)
+                if index < 0:
+                    self._pending = buffer[max(position, len(buffer) - self._overlap):]
+                    break
+                position = index + len(self._end)
+                self._end = None
+            else:
+                match = self._start.search(buffer, position)
+                if match is None:
+                    end = max(position, len(buffer) - self._overlap)
+                    kept.append(buffer[position:end])
+                    self._pending = buffer[end:]
+                    break
+                kept.append(buffer[position:match.start()])
+                close = buffer.find(b'>', match.end() - 1)
+                if close < 0:
+                    self._pending = buffer[match.start():]
+                    break
+                position = close + 1
+                if buffer[close - 1:close] != b'/':
+                    self._end = b'</' + match.group(1) + b'>'
+        return b''.join(kept)
+
+    def close(self):
+        """Return what is left of the stream."""
+        rest = b'' if self._end is not None else self._pending
+        self._pending = b''
+        return rest
+
+
+class VasprunStreamingReader(object):  # pylint: disable=useless-object-inheritance,too-many-instance-attributes
+    """
+    Read the ionic steps of a vasprun.xml file in a single pass with an event driven lxml parser.
+
+    Every ``<calculation>`` element is converted as soon as it is closed and then removed from the tree.
+    Cells, positions, forces and stress are written into ``StepArray`` containers preallocated for NSW
+    steps. Sections listed in skipped_sections are cut out before they reach the XML parser. A truncated
+    file is read up to and including the last complete ionic step.
+
+    With last_step_only, a truncated file is not read as a whole. Instead the last closed ``</calculation>``
+    is located from the end of the file and only the header sections and this last complete ionic step are
+    parsed. ``truncated_at_step`` is then set to the number of complete ionic steps in the file. This needs
+    random access to the file, so a file read from a stream, e.g. a compressed one, is read as a whole.
+
+    :param path: Path to the vasprun.xml file, which must be uncompressed. It is mapped into memory to locate the
+        last complete ionic step.
+    :param store_steps: If False, only the last ionic step is kept for the cells, positions, forces and stress.
+    :param skipped_sections: Tags of the sections, see ``SKIPPABLE_SECTIONS``, that are not read.
+    :param last_step_only: If True, only read the last complete ionic step of truncated files.
+    :param stride: Of the stored steps only keep every ``stride`` th one, starting with the first, ...
+    :param tail: ... and the last ``tail`` ones.
+    :param arrays: The names of the arrays of which the steps are stored, out of ``TRAJECTORY_ARRAYS``. Of the
+        other ones only the last ionic step is kept. All of them by default.
+    :param open_file: A callable returning a context manager that gives a readable binary stream of the file, which
+        is read instead of the path if it is not given.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+            self,
+            path=None,
+            store_steps=True,
+            skipped_sections=None,
+            last_step_only=False,
+            stride=1,
+            tail=0,
+            arrays=None,
+            open_file=None):
+        self.version = None
+        self.parameters = {}
+        self.symbols = None
+        self.kpoints = None
+        self.kpoints_weights = None
+        self.eigenvalues = None
+        self.occupancies = None
+        self.fermi_level = None
+        self.truncated = False
+        self.truncated_at_step = None
+        self._store_steps = store_steps
+        self._stride = stride
+        self._tail = tail
+        self._stored_arrays = TRAJECTORY_ARRAYS if arrays is None else list(arrays)
+        self._skipped_sections = list(skipped_sections or [])
+        self._num_steps = 0
+        self._steps = {}
+        self._energies = {}
+        self._final_energies = {}
+        self._electronic_steps = None
+
+        chunks = None
+        if last_step_only and path is not None:
+            chunks = self._last_step_chunks(path)
+        if chunks is None:
+            chunks = _file_chunks(path, open_file)
+        self._read(chunks)
+        if self.truncated_at_step is not None:
+            # Only the last complete ionic step of a truncated file was read.
+            self.truncated = True
+        elif self.truncated:
+            self.truncated_at_step = self._num_steps
+
+    @property
+    def store_steps(self):
+        return self._store_steps
+
+    @property
+    def skipped_sections(self):
+        return self._skipped_sections
+
+    @property
+    def num_steps(self):
+        """Number of complete ionic steps read."""
+        return self._num_steps
+
+    def get_steps(self, name):
+        """Return the array with the cells, positions, forces or stress of all read ionic steps."""
+        steps = self._steps.get(name)
+        if steps is None or steps.last is None or len(steps) != self.num_steps:
+            return None
+        return steps.to_array()
+
+    def get_step_indices(self, name):
+        """Return the indices of the ionic steps returned by ``get_steps``."""
+        steps = self._steps.get(name)
+        if steps is None or len(steps) != self.num_steps:
+            return None
+        return steps.indices()
+
+    def get_last(self, name):
+        """Return the cell, positions, forces or stress of the last complete ionic step."""
+        steps = self._steps.get(name)
+        if steps is None or len(steps) != self.num_steps:
+            return None
+        return steps.last
+
+    def get_energies(self, etypes, nosc=True):
+        """
+        Return the total energies in the same layout as ``parsevasp.vasprun.Xml.get_energies``.
+
+        :param etypes: List of the energy types to return, see ``SUPPORTED_TOTAL_ENERGIES``.
+        :param nosc: If True only return the energy of the last electronic step of each ionic step.
+        """
+        if not self.num_steps:
+            return None
+        electronic_steps = self._electronic_steps.to_array()
+        energies = {}
+        for etype in etypes:
+            if etype not in SUPPORTED_TOTAL_ENERGIES:
+                raise ValueError('The supplied total energy type: {etype} is not supported.'.format(etype=etype))
+            scstep_energies = self._energies[etype].to_array()
+            if nosc:
+                scstep_energies = scstep_energies[np.cumsum(electronic_steps) - 1]
+            energies[etype + '_final'] = self._final_energies[etype].to_array()
+            energies[etype] = scstep_energies
+        if nosc:
+            electronic_steps = np.ones(electronic_steps.shape, dtype=int)
+        energies['electronic_steps'] = electronic_steps
+        return energies
+
+    def _read(self, chunks):
+        """Walk the chunks of the file and convert the elements as they are closed."""
+        parser = etree.XMLPullParser(events=('end',), huge_tree=True)
+        section_filter = SectionFilter(self._skipped_sections) if self._skipped_sections else None
+        try:
+            for chunk in chunks:
+                if section_filter is not None:
+                    chunk = section_filter.feed(chunk)
+                parser.feed(chunk)
+                self._handle_events(parser)
+            if section_filter is not None:
+                parser.feed(section_filter.close())
+            parser.close()
+            self._handle_events(parser)
+        except etree.XMLSyntaxError:
+            # The file was truncated, keep the complete ionic steps read so far.
+            self._handle_events(parser)
+            self.truncated = True
+
+    def _last_step_chunks(self, path):
+        """
+        Return the header and the last complete ionic step of a truncated file, closed to a valid document.
+
+        Returns None if the file is not truncated or does not contain a complete ionic step.
+        """
+        with open(path, 'rb') as handler:
+            size = os.fstat(handler.fileno()).st_size
+            if not size:
+                return None
+            mapping = mmap.mmap(handler.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if mapping.rfind(b'</modeling>', max(0, size - 1024)) >= 0:
+                    return None
+                last_end = mapping.rfind(b'</calculation>')
+                if last_end < 0:
+                    return None
+                last_end += len(b'</calculation>')
+                last_start = mapping.rfind(b'<calculation>', 0, last_end)
+                header_end = mapping.find(b'<calculation>')
+                num_steps = 0
+                position = mapping.find(b'</calculation>')
+                while 0 <= position < last_end:
+                    num_steps += 1
+                    position = mapping.find(b'</calculation>', position + 1)
+                chunks = [mapping[:header_end], mapping[last_start:last_end], b'\n</modeling>\n']
+            finally:
+                mapping.close()
+
+        self.truncated_at_step = num_steps
+        return chunks
+
+    def _handle_events(self, parser):
+        for _, element in parser.read_events():
+            self._handle(element)
+
+    def _handle(self, element):
+        """Convert a closed element, release the ones that are not needed anymore."""
+        tag = element.tag
+        if tag == 'calculation':
+            self._read_calculation(element)
+            _release(element)
+        elif tag == 'eigenvalues' and element.getparent().tag == 'calculation':
+            self._read_eigenvalues(element)
+            element.clear()
+        elif tag == 'dos':
+            efermi = element.find('i[@name="efermi"]')
+            if efermi is not None:
+                self.fermi_level = float(efermi.text)
+            element.clear()
+        elif tag == 'generator':
+            version = element.find('i[@name="version"]')
+            if version is not None:
+                self.version = version.text.strip()
+        elif tag == 'kpoints' and element.getparent().tag == 'modeling':
+            self._read_kpoints(element)
+        elif tag == 'parameters':
+            self._read_parameters(element)
+            _release(element)
+        elif tag == 'atominfo':
+            self._read_symbols(element)
+            _release(element)
+
+    def _read_parameters(self, element):
+        """Store the first occurence of the parameters that determine the array sizes and the run status."""
+        for item in element.iter('i'):
+            name = item.get('name', '').lower()
+            if name in ('nsw', 'nelm') and name not in self.parameters:
+                self.parameters[name] = int(item.text)
+
+        capacity = self.parameters.get('nsw', 0) + 1
+        self._steps = {
+            name: StepArray(capacity, keep_all=self._store_steps and name in self._stored_arrays, stride=self._stride, tail=self._tail)
+            for name in TRAJECTORY_ARRAYS
+        }
+        self._electronic_steps = StepArray(capacity, dtype=int)
+        for etype in SUPPORTED_TOTAL_ENERGIES:
+            self._energies[etype] = StepArray(capacity)
+            self._final_energies[etype] = StepArray(capacity)
+
+    def _read_kpoints(self, element):
+        """Read the explicit list of k-points and their weights."""
+        kpoints = element.find('varray[@name="kpointlist"]')
+        weights = element.find('varray[@name="weights"]')
+        if kpoints is not None and weights is not None:
+            self.kpoints = _varray_to_array(kpoints)
+            self.kpoints_weights = _varray_to_array(weights)[:, 0]
+
+    def _read_eigenvalues(self, element):
+        """Read the eigenvalues and occupancies per spin, replacing the ones of earlier ionic steps."""
+        eigenvalues = []
+        occupancies = []
+        for spin in element.findall('array/set/set'):
+            rows = ' '.join([row.text for row in spin.iter('r')]).split()
+            data = np.array(rows, dtype=float).reshape(len(spin), -1, 2)
+            eigenvalues.append(data[:, :, 0])
+            occupancies.append(data[:, :, 1])
+        self.eigenvalues = eigenvalues or None
+        self.occupancies = occupancies or None
+
+    def _read_symbols(self, element):
+        """Read the element symbols of the atoms."""
+        rows = element.findall('array[@name="atoms"]/set/rc')
+        self.symbols = np.asarray([row[0].text.strip().title() for row in rows])
+
+    def _read_calculation(self, element):
+        """Append an ionic step."""
+        if self._electronic_steps is None:
+            # No parameters section, fall back to growing from a single step.
+            self._read_parameters(etree.Element('parameters'))
+
+        for name, path in (('cells', 'structure/crystal/varray[@name="basis"]'), ('positions', 'structure/varray[@name="positions"]'),
+                           ('forces', 'varray[@name="forces"]'), ('stress', 'varray[@name="stress"]')):
+            varray = element.find(path)
+            if varray is not None:
+                self._steps[name].append(_varray_to_array(varray))
+
+        self._num_steps += 1
+        scsteps = element.findall('scstep')
+        self._electronic_steps.append(len(scsteps))
+        for etype, tag_name in SUPPORTED_TOTAL_ENERGIES.items():
+            for scstep in scsteps:
+                self._energies[etype].append(_energy(scstep, tag_name))
+            self._final_energies[etype].append(_energy(element, tag_name))
+
+
+class StreamingVasprunParser(VasprunParser):
+    """
+    Constant memory alternative to the ``VasprunParser`` for long MD and relaxation runs.
+
+    Offers the same properties as the ``VasprunParser`` for the ionic steps (``trajectory``, ``energies``,
+    ``last_structure``, ``final_forces``, ...), but reads them with ``VasprunStreamingReader`` instead of
+    building the full parsevasp tree. It is selected by setting ``vasprun_backend`` to ``'streaming'`` in the
+    ``parser_settings``. Quantities not listed in ``QUANTITY_SECTIONS`` are not offered by this parser.
+
+    Only the sections of the file needed by the quantities in ``quantity_names_to_parse`` of the settings
+    are read. If any other quantity is requested later on, the file is read again including its sections.
+    Of a truncated file only the last complete ionic step is read, unless one of ``ALL_STEPS_QUANTITIES``
+    is requested. The ``run_status`` of a truncated file also reports the number of complete ionic steps
+    as ``truncated_at_step``.
+    """
+
+    PARSABLE_ITEMS = {key: value for key, value in VasprunParser.PARSABLE_ITEMS.items() if key in QUANTITY_SECTIONS}
+
+    def __init__(self, *args, **kwargs):
+        self._reader = None
+        self._quantities_read = set()
+        super(StreamingVasprunParser, self).__init__(*args, **kwargs)
+
+    def _init_xml(self, path=None, handler=None):
+        """Read the sections of the file needed by the requested quantities, from the stream if the file is not uncompressed on disk."""
+        self._data_obj = SingleFile(path=path, handler=handler)
+        self._read(self._requested_quantities())
+
+    def _read(self, quantities):
+        """Read the file, skipping the sections not needed by quantities and only keeping all steps if the trajectory is needed."""
+        sections = set()
+        for quantity in quantities:
+            sections.update(QUANTITY_SECTIONS[quantity])
+        skipped_sections = [section for section in SKIPPABLE_SECTIONS if section not in sections]
+        all_steps = [quantity for quantity in ALL_STEPS_QUANTITIES if quantity in quantities]
+        stride, tail, arrays = get_trajectory_selection(self._settings)
+        try:
+            self._reader = VasprunStreamingReader(self._data_obj.mappable_path,
+                                                  store_steps='trajectory' in quantities,
+                                                  skipped_sections=skipped_sections,
+                                                  last_step_only=not all_steps,
+                                                  stride=stride,
+                                                  tail=tail,
+                                                  arrays=arrays,
+                                                  open_file=lambda: self._data_obj.open('rb'))
+        except (IOError, OSError, ValueError, EOFError):
+            self._logger.warning('Could not read {path}. Returning None.'.format(path=self._data_obj.path))
+            self._reader = None
+            return
+        self._quantities_read = set(quantities)
+        self._xml_truncated = self._reader.truncated
+
+    def _requested_quantities(self):
+        """Return the quantities of this parser among the ones to parse, or all of them if that is not known."""
+        if self._settings is None or not self._settings.quantity_names_to_parse:
+            return list(QUANTITY_SECTIONS)
+        return [quantity for quantity in self._settings.quantity_names_to_parse if quantity in QUANTITY_SECTIONS]
+
+    def _parse_quantity(self, quantity_key):
+        """Evaluate a single quantity from the sections read by the reader."""
+
+        if self._reader is not None and quantity_key in QUANTITY_SECTIONS and quantity_key not in self._quantities_read:
+            # The sections of this quantity were skipped, read the file again including them.
+            self._read(self._quantities_read | {quantity_key})
+
+        if self._reader is None:
+            return None
+
+        result = getattr(self, quantity_key)
+
+        if self._exit_code is None:
+            self._exit_code = self._exit_codes.NO_ERROR
+        if self._exit_code.status:
+            if (self._xml_truncated and self._exit_code.status == self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.status):
+                self._exit_code = self._exit_codes.ERROR_RECOVERY_PARSING_OF_XML_FAILED.format(quantities=[quantity_key])
+
+        return result
+
+    @property
+    def version(self):
+        """Fetch the VASP version and return it as a string object."""
+
+        version = self._reader.version
+        match = re.search(r'(\d+)\.(\d+)\.(\d+)', version) if version is not None else None
+        if match is None:
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+
+        return match.group(0)
+
+    @property
+    def eigenvalues(self):
+        """Fetch the eigenvalues of the last ionic step, as a list with an array for each spin."""
+
+        if self._reader.eigenvalues is None:
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+        return self._reader.eigenvalues
+
+    @property
+    def occupancies(self):
+        """Fetch the occupancies of the last ionic step, as a list with an array for each spin."""
+
+        if self._reader.occupancies is None:
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+        return self._reader.occupancies
+
+    @property
+    def kpoints(self):
+        """Fetch the explicit k-points and their weights."""
+
+        if self._reader.kpoints is None:
+            return None
+        return {'mode': 'explicit', 'points': self._reader.kpoints, 'weights': self._reader.kpoints_weights, 'cartesian': False}
+
+    @property
+    def last_structure(self):
+        """Fetch the structure at the last complete ionic step."""
+
+        cell = self._reader.get_last('cells')
+        positions = self._reader.get_last('positions')
+        if cell is None or positions is None or self._reader.symbols is None:
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+
+        return {
+            'unitcell': cell.copy(),
+            'positions': np.dot(positions, cell),
+            'symbols': self._reader.symbols,
+            'kind_names': self._reader.symbols,
+        }
+
+    @property
+    def last_forces(self):
+        """Fetch the forces at the last complete ionic step."""
+
+        forces = self._reader.get_last('forces')
+        return None if forces is None else forces.copy()
+
+    @property
+    def last_stress(self):
+        """Fetch the stress at the last complete ionic step."""
+
+        stress = self._reader.get_last('stress')
+        return None if stress is None else stress.copy()
+
+    @property
+    def trajectory(self):
+        """
+        Fetch unitcells, positions, species, forces and stress for the complete ionic steps.
+
+        Only the steps and arrays selected by the parser settings, see ``get_trajectory_selection``, are stored
+        while reading the file. The ``steps`` are the indices of the selected steps.
+        """
+
+        stride, tail, names = get_trajectory_selection(self._settings)
+        arrays = {name: self._reader.get_steps(name) for name in names}
+        if any(array is None for array in arrays.values()) or self._reader.symbols is None:
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+
+        if self._reader.num_steps == 1:
+            # As parsevasp, report the initial and the last step for a static run.
+            steps = select_steps(2, stride, tail)
+            arrays = {name: np.concatenate([array, array])[steps] for name, array in arrays.items()}
+        else:
+            steps = self._reader.get_step_indices('positions')
+        return dict(arrays, symbols=self._reader.symbols, steps=steps)
+
+    def _energies(self, nosc):
+        """Fetch the total energies for all energy types, see ``VasprunParser._energies``."""
+
+        etype = self._settings.get('energy_type', DEFAULT_OPTIONS['energy_type'])
+        energies = self._reader.get_energies(etype, nosc=nosc)
+        if energies is None:
+            self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=str(sys._getframe().f_code.co_name))
+            return None
+
+        return energies
+
+    @property
+    def fermi_level(self):
+        """Fetch Fermi level."""
+
+        return self._reader.fermi_level
+
+    @property
+    def run_status(self):
+        """Fetch run_status information"""
+
+        info = {}
+        nelm = self._reader.parameters.get('nelm')
+        nsw = self._reader.parameters.get('nsw', 0)
+        info['finished'] = not self._xml_truncated
+        # Only set to true for untruncated run to avoid false positives
+        energies = self._reader.get_energies(['energy_extrapolated'], nosc=False)
+        if energies is None:
+            info['electronic_converged'] = False
+            info['ionic_converged'] = False
+        else:
+            sc_steps = energies['electronic_steps']
+            info['electronic_converged'] = bool(nelm is None or sc_steps[-1] < nelm) and not self._xml_truncated
+            info['ionic_converged'] = len(sc_steps) <= nsw and not self._xml_truncated
+        # Override if nsw is 0 - no ionic steps are performed
+        if nsw < 1:
+            info['ionic_converged'] = None
+        if self._xml_truncated:
+            # Number of complete ionic steps, the last of which provides the structure, forces and energies.
+            info['truncated_at_step'] = self._reader.truncated_at_step
+
+        return info
+
+
+def _file_chunks(path=None, open_file=None):
+    """Read the file at path, or else the stream returned by open_file, in chunks."""
+    with open(path, 'rb') if path is not None else open_file() as handler:
+        for chunk in iter(lambda: handler.read(CHUNK_SIZE), b''):
+            yield chunk
+
+
+def _varray_to_array(varray):
+    """Convert the rows of a varray element into a 2D array."""
+    rows = varray.findall('v')
+    return np.array(' '.join([row.text for row in rows]).split(), dtype=float).reshape(len(rows), -1)
+
+
+def _energy(element, tag_name):
+    energy = element.find('energy/i[@name="{name}"]'.format(name=tag_name))
+    if energy is None:
+        return np.nan
+    return float(energy.text)
+
+
+def _release(element):
+    """Free an element that has been read, together with its already read preceding siblings."""
+    element.clear()
+    parent = element.getparent()
+    if parent is None:
+        return
+    while element.getprevious() is not None:
+        del parent[0]
@@ -15,7 +15,8 @@ class WavecarParser(BaseFileParser):
         'wavecar': {
             'inputs': [],
             'name': 'wavecar',
-            'prerequisites': []
+            'prerequisites': [],
+            'cacheable': False,
         },
     }
 
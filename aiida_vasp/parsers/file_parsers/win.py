@@ -1,7 +1,7 @@
 """Utils to work with Wannier90 .win format."""
 import re
 
-from aiida_vasp.parsers.file_parsers.parser import KeyValueParser
+from aiida_vasp.parsers.file_parsers.parser import KeyValueParser, open_file
 
 
 class WinParser(KeyValueParser):
@@ -12,7 +12,7 @@ class WinParser(KeyValueParser):
     def __init__(self, file_path):
         super(WinParser, self).__init__()
         self.result = {}
-        with open(file_path) as winf:
+        with open_file(file_path) as winf:
             self.keywords, self.blocks, self.comments = WinParser.parse_win(winf)
         self.result.update(self.keywords)
         self.result.update(self.blocks)
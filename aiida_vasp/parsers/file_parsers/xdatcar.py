@@ -0,0 +1,108 @@
+"""
+XDATCAR parser.
+
+---------------
+The file parser that handles the parsing of XDATCAR files.
+"""
+# pylint: disable=protected-access
+import re
+import sys
+
+import numpy as np
+
+from aiida_vasp.parsers.file_parsers.parser import BaseFileParser
+from aiida_vasp.utils.trajectory import get_trajectory_selection, select_steps
+
+# Lines with anything else than numbers: the comment, the element names and the configuration lines.
+NON_NUMERIC_LINE = re.compile(r'^(?![\s\d.+-]*$).*$', re.MULTILINE)
+HEADER_LINES = 7
+
+
+class XdatcarParser(BaseFileParser):
+    """
+    Parser for the configurations of the ionic steps in XDATCAR, as written by VASP 5 and later.
+
+    XDATCAR only contains the cells and the positions, so this is a much smaller source of the
+    trajectory of molecular dynamics runs than vasprun.xml, but without the forces and the stress.
+    The configurations are read in a single numpy pass. For runs with a variable cell the header
+    with the cell is repeated before each configuration, otherwise it is only written once. Only
+    the configurations and arrays selected by the parser settings, see ``get_trajectory_selection``,
+    are copied into the arrays of the trajectory.
+    """
+
+    PARSABLE_ITEMS = {
+        'xdatcar-trajectory': {
+            'inputs': [],
+            'name': 'trajectory',
+            'prerequisites': [],
+        },
+    }
+
+    def __init__(self, *args, **kwargs):
+        super(XdatcarParser, self).__init__(*args, **kwargs)
+        self._exit_codes = kwargs.get('exit_codes', None)
+        self._settings = kwargs.get('settings', None)
+
+    def _parse_file(self, inputs):
+        """Parse the trajectory from XDATCAR."""
+        return {'xdatcar-trajectory': self.trajectory}
+
+    @property
+    def trajectory(self):
+        """Fetch the cells and positions, in the layout of ``VasprunParser.trajectory`` without the forces and the stress."""
+        with self._data_obj.open() as handler:
+            header = [handler.readline() for _ in range(HEADER_LINES)]
+            content = handler.read()
+        try:
+            cell, symbols, num_kinds = _read_header(header)
+        except ValueError:
+            # Not the layout of VASP 5, which has the element names on the sixth line.
+            if self._exit_codes is not None:
+                self._exit_code = self._exit_codes.ERROR_NOT_ABLE_TO_PARSE_QUANTITY.format(quantity=sys._getframe().f_code.co_name)
+            return None
+        num_atoms = symbols.size
+        blocks, header_size = _read_blocks(header, content, num_atoms, num_kinds)
+        stride, tail, names = get_trajectory_selection(self._settings)
+        steps = select_steps(len(blocks), stride, tail)
+        blocks = blocks[steps]
+        trajectory = {'positions': blocks[:, header_size:].reshape(steps.size, num_atoms, 3), 'symbols': symbols, 'steps': steps}
+        if 'cells' in names and header_size:
+            trajectory['cells'] = blocks[:, 1:10].reshape(steps.size, 3, 3) * blocks[:, :1, np.newaxis]
+        elif 'cells' in names:
+            trajectory['cells'] = np.broadcast_to(cell, (steps.size, 3, 3)).copy()
+        return trajectory
+
+
+def _read_header(header):
+    """
+    Read the cell, the symbols of the sites and the number of kinds from the header lines.
+
+    :raises ValueError: If the header does not have the layout of VASP 5.
+    """
+    scale = float(header[1])
+    cell = np.array([line.split() for line in header[2:5]], dtype=float) * scale
+    counts = [int(count) for count in header[6].split()]
+    # VASP 6 may append the hash of the POTCAR to the element names, e.g. Si/ab12cd34.
+    elements = [name.split('/')[0].split('_')[0] for name in header[5].split()]
+    symbols = np.array([element for element, count in zip(elements, counts) for _ in range(count)])
+    return cell, symbols, len(counts)
+
+
+def _read_blocks(header, content, num_atoms, num_kinds):
+    """
+    Read the numbers of all complete configurations.
+
+    :return: A tuple (blocks, header_size), with the numbers of each configuration as a row of blocks, for a variable
+        cell starting with the header_size numbers of its header, the scale, the cell and the counts.
+    """
+    # The line after the first configuration starts the next one, or repeats the header for a variable cell.
+    lines = content.split('\n', num_atoms + 2)
+    variable_cell = len(lines) > num_atoms + 1 and 'configuration' not in lines[num_atoms + 1] and bool(lines[num_atoms + 1].strip())
+    if variable_cell:
+        content = ''.join(header) + content
+    values = np.fromstring(NON_NUMERIC_LINE.sub('', content), sep=' ')
+    header_size = 1 + 9 + num_kinds if variable_cell else 0
+    block_size = header_size + 3 * num_atoms
+    # An incomplete last configuration of a killed run is dropped.
+    num_steps = values.size // block_size
+    return values[:num_steps * block_size].reshape(num_steps, block_size), header_size
@@ -0,0 +1,282 @@
+"""
+Parser manager.
+
+---------------
+Manages the file parser instances used while parsing a single calculation.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from aiida_vasp.parsers.profile import ParserProfile
+
+
+def get_file_size(file_path=None, file_handler=None):
+    """Return the size of a file as it is stored, from the end of its stream if it is given, None if it is unknown."""
+    if file_handler is not None:
+        try:
+            size = file_handler.seek(0, os.SEEK_END)
+            file_handler.seek(0)
+            return size
+        except (OSError, ValueError):
+            return None
+    if file_path and os.path.isfile(file_path):
+        return os.path.getsize(file_path)
+    return None
+
+
+class ParserManager(object):  # pylint: disable=useless-object-inheritance,too-many-instance-attributes
+    """
+    A parsing session over the retrieved files of one calculation.
+
+    Each file in the parser definitions is handed to its file parser at most once per session.
+    All quantity keys belonging to the same file are routed to that single instance, which is
+    released as soon as the last of its quantities has been requested.
+
+    :param parser_definitions: Dict with the FileParser definitions, see ``ParserDefinitions``.
+    :param quantity_keys_to_filenames: Dict of quantity key -> file name, see ``ParsableQuantities``.
+    :param get_file: A callable returning the path of a retrieved file given its name.
+    :param open_file: A callable opening a retrieved file given its name, returning a context manager that gives a readable
+        binary stream. If it is given, the file parsers read the streams instead of reopening the files by their paths,
+        each stream is closed when its file parser is released. The paths are then only resolved for the cache.
+    :param settings: The ``ParserSettings`` passed on to the file parsers.
+    :param exit_codes: The exit codes passed on to the file parsers.
+    :param profile: A ``ParserProfile`` recording the time spent opening each file and evaluating each quantity.
+    :param cache: A ``QuantityCache`` to take the quantities from, a file is then only parsed if one of its quantities is
+        not in the cache. Quantities with the 'cacheable' flag set to False in the ``PARSABLE_ITEMS`` are always parsed.
+    :param incar: The INCAR parameters of the calculation, passed on to the file parsers.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+            self,
+            parser_definitions,
+            quantity_keys_to_filenames,
+            get_file,
+            open_file=None,
+            settings=None,
+            exit_codes=None,
+            profile=None,
+            cache=None,
+            incar=None):
+        self._parser_definitions = parser_definitions
+        self._quantity_keys_to_filenames = quantity_keys_to_filenames
+        self._get_file = get_file
+        self._open_file = open_file
+        self._settings = settings
+        self._exit_codes = exit_codes
+        self._profile = profile if profile is not None else ParserProfile(enabled=False)
+        self._cache = cache
+        self._incar = incar
+
+        self._file_parsers = {}
+        self._file_paths = {}
+        self._file_handlers = {}
+        self._pending_quantity_keys = {}
+        self._exit_code = None
+
+    @property
+    def exit_code(self):
+        """The exit code of the file parser that delivered the last requested quantity."""
+        return self._exit_code
+
+    @property
+    def file_parsers(self):
+        """Dictionary of file name -> file parser instance for the files still in use."""
+        return self._file_parsers
+
+    def setup(self, quantity_keys_to_parse):
+        """Register the quantity keys that will be requested during this session."""
+        self._pending_quantity_keys = {}
+        for quantity_key in quantity_keys_to_parse:
+            file_name = self._quantity_keys_to_filenames[quantity_key]
+            self._pending_quantity_keys.setdefault(file_name, set()).add(quantity_key)
+
+    def get_quantities(self, quantity_keys):
+        """
+        Fetch quantities one after the other.
+
+        :return: Dict of quantity key -> parsed quantity, for all quantities that could be parsed.
+        """
+        parsed_quantities = {}
+        for quantity_key in quantity_keys:
+            parsed_quantity = self.get_quantity(quantity_key)
+            if parsed_quantity is not None:
+                parsed_quantities[quantity_key] = parsed_quantity
+        return parsed_quantities
+
+    def get_quantities_parallel(self, quantity_keys, max_workers=None):
+        """
+        Fetch quantities with the files parsed concurrently.
+
+        The quantity keys are grouped by file and each file is parsed in a bounded thread pool,
+        so the wall time is set by the slowest file instead of the sum over all files.
+        The exit code is resolved in the order of quantity_keys, as for ``get_quantities``.
+
+        :param max_workers: Maximum number of files parsed at the same time. Defaults to the
+            number of files, limited by the number of available CPUs.
+        :return: Dict of quantity key -> parsed quantity, for all quantities that could be parsed.
+        """
+        quantity_keys_by_filename = {}
+        for quantity_key in quantity_keys:
+            file_name = self._quantity_keys_to_filenames[quantity_key]
+            quantity_keys_by_filename.setdefault(file_name, []).append(quantity_key)
+        if not quantity_keys_by_filename:
+            return {}
+
+        # Access to the repository is not thread safe, so open all the files and resolve the paths needed before spawning workers.
+        file_handlers = {file_name: self._get_file_handler(file_name) for file_name in quantity_keys_by_filename}
+        file_paths = {
+            file_name: self._get_file_path(file_name) if self._needs_file_path(file_handlers[file_name]) else None
+            for file_name in quantity_keys_by_filename
+        }
+
+        if max_workers is None:
+            max_workers = min(len(quantity_keys_by_filename), os.cpu_count() or 1)
+
+        evaluated = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(self._parse_quantities_from_file, file_name, file_paths[file_name], keys, file_handlers[file_name])
+                    for file_name, keys in quantity_keys_by_filename.items()
+                ]
+                for future in futures:
+                    evaluated.update(future.result())
+        finally:
+            for file_name in quantity_keys_by_filename:
+                self._close_file_handler(file_name)
+
+        parsed_quantities = {}
+        for quantity_key in quantity_keys:
+            parsed_quantity, self._exit_code = evaluated[quantity_key]
+            if parsed_quantity is not None:
+                parsed_quantities[quantity_key] = parsed_quantity
+        return parsed_quantities
+
+    def get_fallback_quantities(self, parsed_quantities, fallback_quantity_keys):
+        """
+        Fetch the alternatives of the quantities that could not be parsed, until one of them can be parsed.
+
+        :param parsed_quantities: Dict of quantity key -> parsed quantity, as returned by ``get_quantities``.
+        :param fallback_quantity_keys: Dict of quantity key -> equivalent quantity keys, see ``ParsableQuantities``.
+        :return: Dict of quantity key -> parsed quantity, for the alternatives that could be parsed.
+        """
+        fallback_quantities = {}
+        for quantity_key, alternative_keys in fallback_quantity_keys.items():
+            if quantity_key in parsed_quantities:
+                continue
+            for alternative_key in alternative_keys:
+                parsed_quantity = self.get_quantity(alternative_key)
+                if parsed_quantity is not None:
+                    fallback_quantities[alternative_key] = parsed_quantity
+                    break
+        return fallback_quantities
+
+    def get_quantity(self, quantity_key):
+        """Fetch a quantity from the file parser responsible for it and release the parser if it is no longer needed."""
+        file_name = self._quantity_keys_to_filenames[quantity_key]
+        file_path = self._get_file_path(file_name) if self._cache is not None else None
+        quantity, self._exit_code = self._fetch(file_name, file_path, quantity_key, self._get_file_parser)
+
+        pending = self._pending_quantity_keys.get(file_name, set())
+        pending.discard(quantity_key)
+        if not pending:
+            self._release(file_name)
+
+        return quantity
+
+    def _needs_file_path(self, file_handler):
+        """Whether the path of a file is needed, for the cache or because there is no stream of it."""
+        return self._cache is not None or file_handler is None
+
+    def _get_file_path(self, file_name):
+        """Return the path of the retrieved file file_name."""
+        if file_name not in self._file_paths:
+            self._file_paths[file_name] = self._get_file(file_name)
+        return self._file_paths[file_name]
+
+    def _get_file_handler(self, file_name):
+        """Return a stream of the retrieved file file_name, or None if the file parsers read the files by their paths."""
+        if self._open_file is None:
+            return None
+        if file_name not in self._file_handlers:
+            exit_stack = ExitStack()
+            opened_file = self._open_file(file_name)
+            file_handler = exit_stack.enter_context(opened_file) if opened_file is not None else None
+            self._file_handlers[file_name] = (file_handler, exit_stack)
+        return self._file_handlers[file_name][0]
+
+    def _close_file_handler(self, file_name):
+        """Close the stream of file_name, if one was opened."""
+        _, exit_stack = self._file_handlers.pop(file_name, (None, None))
+        if exit_stack is not None:
+            exit_stack.close()
+
+    def _get_file_parser(self, file_name):
+        """Return the file parser for file_name, instantiating it on first use."""
+        if file_name not in self._file_parsers:
+            file_handler = self._get_file_handler(file_name)
+            file_path = self._get_file_path(file_name) if self._needs_file_path(file_handler) else None
+            self._file_parsers[file_name] = self._create_file_parser(file_name, file_path, file_handler)
+        return self._file_parsers[file_name]
+
+    def _create_file_parser(self, file_name, file_path, file_handler=None):
+        """Instantiate the file parser defined for file_name, reading file_handler if it is given and else file_path."""
+        file_parser_cls = self._parser_definitions[file_name]['parser_class']
+        file_kwargs = {'file_handler': file_handler} if file_handler is not None else {'file_path': file_path}
+        file_size = get_file_size(file_path, file_handler) if self._profile.enabled else None
+        with self._profile.open_file(file_name, file_parser_cls, file_size):
+            return file_parser_cls(settings=self._settings, exit_codes=self._exit_codes, incar=self._incar, **file_kwargs)
+
+    def _fetch(self, file_name, file_path, quantity_key, get_file_parser):
+        """
+        Get a quantity from the cache or else from the file parser returned by get_file_parser(file_name).
+
+        :return: A tuple (quantity, exit code of the file parser after parsing it).
+        """
+        cache_key = None
+        file_parser_cls = self._parser_definitions[file_name]['parser_class']
+        # Quantities backed by files, e.g. the paths of CHGCAR and WAVECAR or memory-mapped grids, are not cached.
+        cacheable = file_parser_cls.PARSABLE_ITEMS.get(quantity_key, {}).get('cacheable', True)
+        if self._cache is not None and file_path is not None and cacheable:
+            cache_key = self._cache.get_key(file_path, file_parser_cls, quantity_key)
+            with self._profile.quantity(file_name, quantity_key):
+                found, quantity = self._cache.get(cache_key)
+            if found:
+                self._profile.cache_hit(file_name, quantity_key)
+                return quantity, None
+
+        file_parser = get_file_parser(file_name)
+        quantity = self._evaluate(file_parser, file_name, quantity_key)
+        # Only quantities from files that were parsed without problems are reused.
+        exit_code = file_parser.exit_code
+        if cache_key is not None and (exit_code is None or not exit_code.status):
+            self._cache.put(cache_key, quantity)
+        return quantity, exit_code
+
+    def _evaluate(self, file_parser, file_name, quantity_key):
+        """Get a quantity from the file parser."""
+        with self._profile.quantity(file_name, quantity_key):
+            return file_parser.get_quantity(quantity_key)
+
+    def _parse_quantities_from_file(self, file_name, file_path, quantity_keys, file_handler=None):
+        """
+        Parse all quantity_keys from a single file, this is what runs in a worker thread.
+
+        :return: Dict of quantity key -> (parsed quantity, exit code of the file parser after parsing it).
+        """
+        file_parsers = {}
+
+        def get_file_parser(file_name):
+            # The file is only parsed if one of its quantities is not in the cache.
+            if file_name not in file_parsers:
+                file_parsers[file_name] = self._create_file_parser(file_name, file_path, file_handler)
+            return file_parsers[file_name]
+
+        return {quantity_key: self._fetch(file_name, file_path, quantity_key, get_file_parser) for quantity_key in quantity_keys}
+
+    def _release(self, file_name):
+        """Drop the file parser for file_name so that its parsed content can be garbage collected."""
+        self._file_parsers.pop(file_name, None)
+        self._pending_quantity_keys.pop(file_name, None)
+        self._close_file_handler(file_name)
@@ -4,7 +4,13 @@ Node composer.
 --------------
 A composer that composes different quantities onto AiiDA data nodes.
 """
+import numbers
+import os
 
+import numpy as np
+from aiida.orm.nodes.data.structure import Kind, Site
+
+from aiida_vasp.parsers.file_parsers.parser import open_file, split_compression_suffix
 from aiida_vasp.utils.aiida_utils import get_data_class
 
 NODES_TYPES = {
@@ -18,8 +24,12 @@ NODES_TYPES = {
     'array.bands': ['eigenvalues', 'kpoints', 'occupancies'],
     'vasp.chargedensity': ['chgcar'],
     'vasp.wavefun': ['wavecar'],
+    'vasp.array_bundle': [],
     'array': [],
 }
+# The node types of which the arrays can be stored with a reduced precision, and the storage options with their defaults.
+STORAGE_NODE_TYPES = ['array', 'array.trajectory', 'vasp.array_bundle']
+STORAGE_OPTIONS = {'dtype': None, 'tolerance': None, 'compress': False}
 
 
 def get_node_composer_inputs(equivalent_quantity_keys, parsed_quantities, quantity_names_in_node_dict):
@@ -59,18 +69,22 @@ class NodeComposer:
     """
 
     @classmethod
-    def compose(cls, node_type, inputs):
+    def compose(cls, node_type, inputs, storage=None):
         """
         A wrapper for compose_node with a node definition taken from NODES.
 
         :param node_type: str holding the type of the node. Must be one of the keys of NODES_TYPES.
         :param quantities: A list of strings with quantities to be used for composing this node.
+        :param storage: A dict with the storage options of the arrays, only for the node types in
+            STORAGE_NODE_TYPES, see ``get_storage_options``.
 
         :return: An AiidaData object of a type corresponding to node_type.
         """
 
         # Call the correct specialised method for assembling.
         method_name = '_compose_' + node_type.replace('.', '_')
+        if storage:
+            return getattr(cls, method_name)(node_type, inputs, storage=get_storage_options(storage, node_type))
         return getattr(cls, method_name)(node_type, inputs)
 
     @staticmethod
@@ -86,17 +100,33 @@ class NodeComposer:
         node = get_data_class(node_type)()
         for key in inputs:
             node.set_cell(inputs[key]['unitcell'])
+            if 'positions' in inputs[key]:
+                _set_sites(node, inputs[key]['positions'], inputs[key]['symbols'], inputs[key]['kind_names'])
+                continue
             for site in inputs[key]['sites']:
                 node.append_atom(position=site['position'], symbols=site['symbol'], name=site['kind_name'])
         return node
 
     @staticmethod
-    def _compose_array(node_type, inputs):
-        """Compose an array node."""
+    def _compose_array(node_type, inputs, storage=None):
+        """Compose an array node, which is an array bundle if the arrays are to be compressed."""
+        if storage is not None and storage['compress']:
+            node_type = 'vasp.array_bundle'
         node = get_data_class(node_type)()
         for item in inputs:
             for key, value in inputs[item].items():
-                node.set_array(key, value)
+                node.set_array(key, reduce_array(value, storage))
+        _set_storage(node, storage)
+        return node
+
+    @staticmethod
+    def _compose_vasp_array_bundle(node_type, inputs, storage=None):
+        """Compose an array bundle node, with the arrays of each quantity prefixed by its name."""
+        node = get_data_class(node_type)()
+        for item in inputs:
+            node.set_quantity(item, {key: reduce_array(value, storage) for key, value in inputs[item].items()})
+        if storage is not None:
+            _set_storage(node, dict(storage, compress=True))
         return node
 
     @staticmethod
@@ -106,17 +136,17 @@ class NodeComposer:
         for key in inputs:
             # Technically this dictionary has only one key. to
             # avoid problems with python 2/3 it is done with the loop.
-            node = get_data_class(node_type)(file=inputs[key])
+            node = _compose_file(node_type, inputs[key])
         return node
 
     @staticmethod
     def _compose_vasp_chargedensity(node_type, inputs):
-        """Compose a charge density node."""
-        node = None
-        for key in inputs:
-            # Technically this dictionary has only one key. to
-            # avoid problems with python 2/3 it is done with the loop.
-            node = get_data_class(node_type)(file=inputs[key])
+        """Compose a charge density node, with the grids if they are parsed."""
+        if inputs.get('chgcar') is None:
+            return None
+        node = _compose_file(node_type, inputs['chgcar'])
+        if inputs.get('grids') is not None:
+            node.set_grids(inputs['grids'])
         return node
 
     @classmethod
@@ -130,11 +160,18 @@ class NodeComposer:
 
     @staticmethod
     def _compose_array_kpoints(node_type, inputs):
-        """Compose an array.kpoints node based on inputs."""
+        """
+        Compose an array.kpoints node based on inputs.
+
+        Explicit k-points are given by the ``points`` and ``weights`` arrays and the ``cartesian`` flag. A list
+        of parsevasp ``Kpoint`` objects as ``points`` is still accepted.
+        """
         node = get_data_class(node_type)()
         for key in inputs:
             mode = inputs[key]['mode']
-            if mode == 'explicit':
+            if mode == 'explicit' and isinstance(inputs[key].get('points'), np.ndarray):
+                node.set_kpoints(inputs[key]['points'], weights=inputs[key].get('weights'), cartesian=inputs[key].get('cartesian', False))
+            elif mode == 'explicit':
                 kpoints = inputs[key].get('points')
                 cartesian = not kpoints[0].get_direct()
                 kpoint_list = []
@@ -155,7 +192,7 @@ class NodeComposer:
         return node
 
     @staticmethod
-    def _compose_array_trajectory(node_type, inputs):
+    def _compose_array_trajectory(node_type, inputs, storage=None):
         """
         Compose a trajectory node.
 
@@ -174,6 +211,9 @@ class NodeComposer:
             aiida-core v1.0.0, data, using the same keys are those from inputs,
             for 'symbols', the value is stored by set_attribute and
             for the others, the values are stored by by set_array.
+        storage : dict, optional
+            The storage options of the arrays, the arrays of a trajectory
+            can not be compressed.
 
         """
         node = get_data_class(node_type)()
@@ -182,5 +222,111 @@ class NodeComposer:
                 if key == 'symbols':
                     node.set_attribute(key, value)
                 else:
-                    node.set_array(key, value)
+                    node.set_array(key, reduce_array(value, storage))
+        _set_storage(node, storage)
         return node
+
+
+def get_storage_options(storage, node_type=None):
+    """
+    Check the storage options of the arrays of a node and add the defaults.
+
+    * ``dtype``: The floating point type the arrays are stored with, e.g. ``'float32'``. Complex arrays are stored
+      with the complex type of the same precision. Arrays are never converted to a type of higher precision.
+    * ``tolerance``: Round the values to multiples of a power of two, with an absolute error of at most the
+      tolerance. This does not reduce the size of the arrays by itself, but they are then compressed better.
+      The tolerance also holds with a ``dtype``: an array of which the values are too large to be stored with
+      the tolerance in that type, e.g. energies of 1e3 eV in float32 with a tolerance of 1e-6, keeps its type.
+    * ``compress``: Store the arrays compressed in a single file, as a ``vasp.array_bundle`` node. The arrays
+      of a trajectory can not be compressed.
+
+    :param node_type: The type of the node, which has to be one of STORAGE_NODE_TYPES if it is given.
+    :raises ValueError: If the storage options are not valid.
+    """
+    if node_type is not None and node_type not in STORAGE_NODE_TYPES:
+        raise ValueError('The storage of the arrays can only be set for the node types {}, not {}.'.format(STORAGE_NODE_TYPES, node_type))
+    if not isinstance(storage, dict):
+        raise ValueError('The storage options must be given as a dict, not {}.'.format(storage))
+    unknown = set(storage) - set(STORAGE_OPTIONS)
+    if unknown:
+        raise ValueError('Unknown storage options {}, use one of {}.'.format(sorted(unknown), sorted(STORAGE_OPTIONS)))
+    options = dict(STORAGE_OPTIONS, **storage)
+    if options['dtype'] is not None:
+        try:
+            options['dtype'] = np.dtype(options['dtype']).name
+        except TypeError as error:
+            raise ValueError('Unknown dtype {}.'.format(options['dtype'])) from error
+        if not np.issubdtype(options['dtype'], np.floating):
+            raise ValueError('The arrays can only be stored with a floating point type, not {}.'.format(options['dtype']))
+    tolerance = options['tolerance']
+    if tolerance is not None and (isinstance(tolerance, bool) or not isinstance(tolerance, numbers.Real) or not tolerance > 0):
+        raise ValueError('The tolerance must be a positive number, not {}.'.format(tolerance))
+    options['compress'] = bool(options['compress'])
+    if options['compress'] and node_type == 'array.trajectory':
+        raise ValueError('The arrays of a trajectory can not be compressed, only their dtype and tolerance can be set.')
+    return options
+
+
+def reduce_array(array, storage):
+    """Apply the storage options to a floating point or complex array, other arrays are returned unchanged."""
+    array = np.asarray(array)
+    if storage is None or not np.issubdtype(array.dtype, np.inexact):
+        return array
+    original = array
+    if storage['tolerance'] is not None:
+        # Multiples of a power of two have trailing zero bits, which are compressed well.
+        step = 2.0**np.floor(np.log2(2 * storage['tolerance']))
+        array = np.round(array / step) * step
+    if storage['dtype'] is not None:
+        dtype = np.promote_types(storage['dtype'], np.complex64) if np.iscomplexobj(array) else np.dtype(storage['dtype'])
+        if dtype.itemsize < array.dtype.itemsize:
+            reduced = array.astype(dtype)
+            # The cast adds a relative error, which can exceed the tolerance for values of a large magnitude.
+            if storage['tolerance'] is not None and _exceeds_tolerance(reduced, original, storage['tolerance']):
+                return array
+            array = reduced
+    return array
+
+
+def _exceeds_tolerance(array, reference, tolerance):
+    """Whether the real or imaginary part of any element of array differs from reference by more than the tolerance."""
+    with np.errstate(invalid='ignore'):
+        difference = array - reference
+        return bool(np.any(np.abs(difference.real) > tolerance) or np.any(np.abs(difference.imag) > tolerance))
+
+
+def _set_storage(node, storage):
+    """Record the storage options of the arrays, so that their precision is known."""
+    if storage is not None:
+        node.set_attribute('storage', storage)
+
+
+def _set_sites(node, positions, symbols, kind_names):
+    """
+    Set the sites of a structure node from arrays.
+
+    Each kind is created once and the sites are appended with their kind names, instead of appending the atoms one by
+    one, which compares the kind of each atom with all existing kinds.
+
+    :param positions: The cartesian positions, an array of shape ``(num_sites, 3)``.
+    :param symbols: The chemical symbol of each site.
+    :param kind_names: The kind name of each site.
+    """
+    kinds = {}
+    for kind_name, symbol in zip(kind_names, symbols):
+        if kinds.setdefault(kind_name, symbol) != symbol:
+            raise ValueError('The kind {} is given for the symbols {} and {}.'.format(kind_name, kinds[kind_name], symbol))
+    for kind_name, symbol in kinds.items():
+        node.append_kind(Kind(symbols=str(symbol), name=str(kind_name)))
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    for position, kind_name in zip(positions.tolist(), kind_names):
+        node.append_site(Site(kind_name=str(kind_name), position=position))
+
+
+def _compose_file(node_type, path):
+    """Compose a single file node, a compressed file is stored uncompressed with its original name."""
+    original_name, suffix = split_compression_suffix(os.path.basename(path))
+    if suffix is None:
+        return get_data_class(node_type)(file=path)
+    with open_file(path, 'rb') as handler:
+        return get_data_class(node_type)(file=handler, filename=original_name)
@@ -0,0 +1,118 @@
+"""
+Parser profile.
+
+---------------
+Records where the time and memory go while parsing a single calculation.
+"""
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, the memory usage is then not recorded.
+    resource = None
+
+
+def get_peak_rss():
+    """Return the peak resident set size of the process in kB, or None if it can not be determined."""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # ru_maxrss is given in bytes on macOS.
+        peak_rss //= 1024
+    return peak_rss
+
+
+class ParserProfile(object):  # pylint: disable=useless-object-inheritance
+    """
+    Timings, memory usage and file sizes of a parsing session.
+
+    For each file the size, the file parser class, the time to open it (instantiating the file parser, which
+    for some parsers includes reading the whole file), the time spent evaluating each quantity and the increase
+    of the peak RSS of the process while doing so are recorded, as well as the quantities taken from the cache.
+    For each output node the time to compose it is recorded. When files are parsed concurrently, the peak RSS
+    increase is attributed to the file that happens to be parsed when the peak is reached.
+
+    The result of ``get_dict`` only contains basic types and no periods in keys, so it can be stored as an extra.
+    If the profile is not enabled nothing is recorded.
+    """
+
+    def __init__(self, enabled=True):
+        self._enabled = enabled
+        self._start = time.perf_counter()
+        self._start_rss = get_peak_rss()
+        self._files = {}
+        self._nodes = {}
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @contextmanager
+    def open_file(self, file_name, parser_class, file_size=None):
+        """Record the file size and the time and memory used to instantiate its file parser."""
+        entry = self._file_entry(file_name)
+        if entry is not None:
+            entry['parser'] = parser_class.__name__
+            entry['size'] = file_size
+        with self._measure(entry, 'open_time'):
+            yield
+
+    @contextmanager
+    def quantity(self, file_name, quantity_key):
+        """Record the time and memory used to evaluate a quantity from a file."""
+        entry = self._file_entry(file_name)
+        quantities = entry['quantities'] if entry is not None else None
+        with self._measure(entry, 'parse_time'), self._measure(quantities, quantity_key, memory=False):
+            yield
+
+    def cache_hit(self, file_name, quantity_key):
+        """Record that a quantity was taken from the cache instead of parsing the file."""
+        entry = self._file_entry(file_name)
+        if entry is not None:
+            entry.setdefault('cached', []).append(quantity_key)
+
+    @contextmanager
+    def compose(self, link_name):
+        """Record the time used to compose an output node."""
+        with self._measure(self._nodes if self._enabled else None, link_name, memory=False):
+            yield
+
+    def get_dict(self):
+        """Return the profile as a dictionary."""
+        end_rss = get_peak_rss()
+        return {
+            'total_time': _round(time.perf_counter() - self._start),
+            'rss_delta': end_rss - self._start_rss if end_rss is not None else None,
+            'files': sorted(self._files.values(), key=lambda entry: entry['name']),
+            'nodes': dict(self._nodes),
+        }
+
+    def _file_entry(self, file_name):
+        if not self._enabled:
+            return None
+        return self._files.setdefault(file_name, {'name': file_name, 'quantities': {}})
+
+    @staticmethod
+    @contextmanager
+    def _measure(entry, time_key, memory=True):
+        """Add the elapsed time to entry[time_key] and the increase of the peak RSS to entry['rss_delta']."""
+        if entry is None:
+            yield
+            return
+        start_rss = get_peak_rss() if memory else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry[time_key] = _round(entry.get(time_key, 0.0) + time.perf_counter() - start)
+            if start_rss is not None:
+                entry['rss_delta'] = entry.get('rss_delta', 0) + get_peak_rss() - start_rss
+
+
+def _round(seconds):
+    """Round a time to microseconds, which keeps the stored profile compact."""
+    return round(seconds, 6)
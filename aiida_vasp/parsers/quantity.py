@@ -4,14 +4,21 @@ Parser quantity configuration.
 ------------------------------
 Contains the representation of quantities that users want to parse.
 """
+from itertools import combinations
 
 
-class ParsableQuantities(object):  # pylint: disable=useless-object-inheritance
+class ParsableQuantities(object):  # pylint: disable=useless-object-inheritance,too-many-instance-attributes
     """
     A Database of parsable quantities.
 
     - Get the parsable quantities from the FileParsers and initialise them.
     - Provide ways to get parsable quantities.
+
+    When a requested quantity can be parsed from several files, only one of its equivalent quantity keys is
+    parsed, such that the total size of the parsed files is as small as possible. The remaining equivalent
+    quantity keys are kept as fallbacks, smallest file first. A quantity can be pinned to one of its files,
+    which its other files are then not used for. Quantity keys with the 'pinned_only' flag are only parsed
+    when their quantity is pinned to their file.
     """
 
     def __init__(self, vasp_parser_logger=None):
@@ -24,6 +31,7 @@ class ParsableQuantities(object):  # pylint: disable=useless-object-inheritance
         self._missing_filenames = None
         self._quantity_items = None
         self._waiting_quantity_items = {}
+        self._fallback_quantity_keys = None
 
     @property
     def quantity_keys_to_parse(self):
@@ -35,6 +43,11 @@ class ParsableQuantities(object):  # pylint: disable=useless-object-inheritance
         """Dictionary of quantity key -> file name"""
         return self._quantity_keys_to_filenames
 
+    @property
+    def fallback_quantity_keys(self):
+        """Dictionary of quantity key to parse -> equivalent quantity keys to try if it can not be parsed"""
+        return self._fallback_quantity_keys
+
     @property
     def equivalent_quantity_keys(self):
         """
@@ -52,8 +65,20 @@ class ParsableQuantities(object):  # pylint: disable=useless-object-inheritance
         """Put parsable quantity in the waiting list"""
         self._waiting_quantity_items[quantity_key] = quantity_dict
 
-    def setup(self, retrieved_filenames=None, parser_definitions=None, quantity_names_to_parse=None):
-        """Set the parsable_quantities dictionary based on parsable_items obtained from the FileParsers."""
+    def setup(  # pylint: disable=too-many-arguments
+            self,
+            retrieved_filenames=None,
+            parser_definitions=None,
+            quantity_names_to_parse=None,
+            file_sizes=None,
+            quantity_files=None):
+        """
+        Set the parsable_quantities dictionary based on parsable_items obtained from the FileParsers.
+
+        :param file_sizes: Dictionary of file name -> size, used to choose between equivalent quantity keys.
+            Without it the quantity key with the highest priority is chosen.
+        :param quantity_files: Dictionary of quantity name -> the file name to parse it from.
+        """
 
         def _show(var, var_name):
             print('---%s ---' % var_name)
@@ -89,7 +114,7 @@ class ParsableQuantities(object):  # pylint: disable=useless-object-inheritance
             _show(parsable_quantity_keys, 'parsable_quantity_keys')
 
         self._quantity_keys_to_parse = self._get_quantity_keys_to_parse(parsable_quantity_keys, quantity_names_to_parse,
-                                                                        retrieved_filenames)
+                                                                        retrieved_filenames, file_sizes, quantity_files)
         if show_screening_steps:
             _show(quantity_names_to_parse, 'quantity_names_to_parse')
             _show(self._quantity_keys_to_parse, 'self._quantity_keys_to_parse')
@@ -192,25 +217,106 @@ class ParsableQuantities(object):  # pylint: disable=useless-object-inheritance
                 _parsable_quantity_keys.append(quantity_key)
         return _parsable_quantity_keys
 
-    def _get_quantity_keys_to_parse(self, parsable_quantity_keys, quantity_names_to_parse, retrieve_filenames):
+    def _get_quantity_keys_to_parse(  # pylint: disable=too-many-arguments
+            self,
+            parsable_quantity_keys,
+            quantity_names_to_parse,
+            retrieve_filenames,
+            file_sizes=None,
+            quantity_files=None):
         """Collect quantity_names_to_parse"""
-        _quantity_keys_to_parse = []
+        candidates = {}
+        quantity_files = quantity_files or {}
         for quantity_name in quantity_names_to_parse:
             if quantity_name in self._equiv_quantity_keys:
-                is_parsable = False
-                for quantity_key in self._equiv_quantity_keys[quantity_name]:
-                    if quantity_key in parsable_quantity_keys:
-                        _quantity_keys_to_parse.append(quantity_key)
-                        is_parsable = True
-                if not is_parsable:
+                quantity_keys = [key for key in self._equiv_quantity_keys[quantity_name] if key in parsable_quantity_keys]
+                quantity_keys = self._remove_unpinned_keys(quantity_keys, quantity_files.get(quantity_name))
+                if quantity_keys and quantity_name in quantity_files:
+                    quantity_keys = self._pin_quantity_keys(quantity_name, quantity_keys, quantity_files[quantity_name])
+                if quantity_keys:
+                    candidates[quantity_name] = quantity_keys
+                else:
                     self._issue_warning(retrieve_filenames, quantity_name)
             else:
                 self._vasp_parser_logger.warning('{quantity} has been requested, '
                                                  'however its parser has not been implemented. '
                                                  'Please check the docstrings in aiida_vasp.parsers.vasp.py '
                                                  'for valid input.'.format(quantity=quantity_name))
+
+        file_sizes = file_sizes or {}
+        chosen_keys = self._choose_quantity_keys(candidates, file_sizes)
+        _quantity_keys_to_parse = []
+        self._fallback_quantity_keys = {}
+        for quantity_name, quantity_key in chosen_keys.items():
+            _quantity_keys_to_parse.append(quantity_key)
+            fallback_keys = [key for key in candidates[quantity_name] if key != quantity_key]
+            if fallback_keys:
+                self._fallback_quantity_keys[quantity_key] = sorted(fallback_keys, key=lambda key: self._get_cost(key, file_sizes))
         return _quantity_keys_to_parse
 
+    def _choose_quantity_keys(self, candidates, file_sizes):
+        """
+        Choose one of the parsable equivalent quantity keys for each quantity name.
+
+        The files to parse are the set of files providing all requested quantities with the smallest total size.
+        Files which are the only source of a requested quantity are always part of it. Each quantity is then
+        taken from the first of its equivalent quantity keys in these files. Without file sizes, the first
+        parsable equivalent quantity key is chosen.
+
+        :param candidates: Dictionary of quantity name -> parsable equivalent quantity keys.
+        :return: Dictionary of quantity name -> chosen quantity key, in the order of candidates.
+        """
+        if not file_sizes:
+            return {quantity_name: quantity_keys[0] for quantity_name, quantity_keys in candidates.items()}
+
+        candidate_filenames = {}
+        required = set()
+        for quantity_name, quantity_keys in candidates.items():
+            filenames = {self._quantity_keys_to_filenames[key] for key in quantity_keys}
+            candidate_filenames[quantity_name] = filenames
+            if len(filenames) == 1:
+                required.update(filenames)
+        optional = sorted(set().union(*candidate_filenames.values()) - required)
+
+        best_files, best_cost = None, None
+        # The number of files with a file parser is small, so all combinations can be tried.
+        for num_files in range(len(optional) + 1):
+            for selection in combinations(optional, num_files):
+                files = required.union(selection)
+                if not all(filenames & files for filenames in candidate_filenames.values()):
+                    continue
+                cost = sum(file_sizes.get(filename, float('inf')) for filename in files)
+                if best_cost is None or cost < best_cost:
+                    best_files, best_cost = files, cost
+
+        return {
+            quantity_name: next(key for key in quantity_keys if self._quantity_keys_to_filenames[key] in best_files)
+            for quantity_name, quantity_keys in candidates.items()
+        }
+
+    def _pin_quantity_keys(self, quantity_name, quantity_keys, filename):
+        """Return the quantity keys of the file a quantity is pinned to, or all of them if it is not parsable from that file."""
+        pinned_keys = [key for key in quantity_keys if self._quantity_keys_to_filenames[key] == filename]
+        if not pinned_keys:
+            self._vasp_parser_logger.warning('The quantity {quantity} can not be parsed from {filename}, which it is pinned to '
+                                             'in quantity_files, it is taken from one of {filenames}.'.format(
+                                                 quantity=quantity_name,
+                                                 filename=filename,
+                                                 filenames=sorted({self._quantity_keys_to_filenames[key] for key in quantity_keys})))
+            return quantity_keys
+        return pinned_keys
+
+    def _remove_unpinned_keys(self, quantity_keys, filename):
+        """Remove the quantity keys which are only parsed when pinned, unless they are pinned to their file."""
+        return [
+            key for key in quantity_keys
+            if not self._quantity_items[key].get('pinned_only', False) or self._quantity_keys_to_filenames[key] == filename
+        ]
+
+    def _get_cost(self, quantity_key, file_sizes):
+        """The cost of parsing a quantity is estimated by the size of its file, unknown sizes go last."""
+        return file_sizes.get(self._quantity_keys_to_filenames[quantity_key], float('inf'))
+
     def _issue_warning(self, retrieve_filenames, quantity_name):
         """
         Issue warning when no parsable quantity is found.
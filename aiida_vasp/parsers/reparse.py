@@ -0,0 +1,165 @@
+"""
+Reparsing.
+
+----------
+Parse finished VASP calculations again, e.g. with other parser settings, in parallel worker processes.
+"""
+import json
+import multiprocessing
+import os
+import time
+import traceback
+
+import numpy as np
+
+from aiida_vasp.parsers.vasp import VaspParser
+
+PROCESS_TYPE = 'aiida.calculations:vasp.vasp'
+DEFAULT_CHUNK_SIZE = 50
+
+
+def get_calculation_pks(filters=None, group=None, pks=None):
+    """
+    Return the pks of the finished VASP calculations selected by the given criteria.
+
+    :param filters: QueryBuilder filters on the calculation nodes, added to the ones selecting finished VASP calculations.
+    :param group: Only select calculations in the group with this label.
+    :param pks: Only select calculations with these pks.
+    """
+    from aiida.orm import CalcJobNode, Group, QueryBuilder  # pylint: disable=import-outside-toplevel
+    node_filters = {'process_type': PROCESS_TYPE, 'attributes.process_state': 'finished'}
+    node_filters.update(filters or {})
+    if pks:
+        node_filters['id'] = {'in': list(pks)}
+    query = QueryBuilder()
+    if group is not None:
+        query.append(Group, filters={'label': group}, tag='group')
+        query.append(CalcJobNode, filters=node_filters, with_group='group', project='id')
+    else:
+        query.append(CalcJobNode, filters=node_filters, project='id')
+    query.order_by({CalcJobNode: {'id': 'asc'}})
+    return [pk for pk, in query.iterall()]
+
+
+def reparse(node, parser_settings=None, store_provenance=True):
+    """
+    Parse a calculation again, the outputs are created by a calcfunction with the outputs of the calculation as inputs.
+
+    This follows ``Parser.parse_from_node`` of AiiDA, but allows to update the parser settings of the calculation.
+    The parser settings are then an additional input of the calcfunction.
+
+    :param node: The CalcJobNode of a finished VASP calculation.
+    :param parser_settings: A dict updating the parser settings of the calculation.
+    :param store_provenance: If False, the calcfunction and its outputs are not stored.
+    :return: A tuple (outputs, calcfunction node).
+    """
+    from aiida.engine import calcfunction, Process  # pylint: disable=import-outside-toplevel
+    from aiida.orm import Dict  # pylint: disable=import-outside-toplevel
+    parser = VaspParser(node, parser_settings=parser_settings)
+
+    @calcfunction
+    def reparse_calcfunction(**kwargs):
+        """Run the VaspParser, see ``Parser.parse_from_node`` for how the exit code is returned."""
+        kwargs.pop('parser_settings', None)
+        exit_code = parser.parse(**kwargs)
+        outputs = parser.outputs
+        if exit_code and exit_code.status:
+            Process.current().out_many(outputs)
+            return exit_code
+        return dict(outputs)
+
+    inputs = {'metadata': {'store_provenance': store_provenance}}
+    inputs.update(parser.get_outputs_for_parsing())
+    if parser_settings:
+        inputs['parser_settings'] = Dict(dict=parser_settings)
+    return reparse_calcfunction.run_get_node(**inputs)
+
+
+def write_npz(path, outputs):
+    """
+    Write parsed output nodes to a compressed npz file.
+
+    The arrays of an ``ArrayData`` output are stored as ``<link_name>/<array_name>``, the remaining attributes of
+    every output are stored as a JSON string in ``<link_name>/attributes``.
+
+    :param path: The path of the npz file.
+    :param outputs: A dict of output nodes by link name.
+    """
+    content = {}
+    for link_name, node in outputs.items():
+        attributes = {}
+        for key, value in node.attributes.items():
+            if key.startswith('array|'):
+                array_name = key[len('array|'):]
+                content['{}/{}'.format(link_name, array_name)] = node.get_array(array_name)
+            else:
+                attributes[key] = value
+        content['{}/attributes'.format(link_name)] = np.array(json.dumps(attributes, default=str))
+    np.savez_compressed(path, **content)
+
+
+def reparse_chunk(pks, parser_settings=None, output_dir=None):
+    """
+    Reparse a chunk of calculations, failures are recorded instead of raised.
+
+    :param pks: The pks of the calculations.
+    :param parser_settings: A dict updating the parser settings of the calculations.
+    :param output_dir: If given, the outputs are not stored in the database, but written to ``<uuid>.npz`` in this directory.
+    :return: A list of tuples (pk, exit status, message, seconds), the exit status is None for an exception.
+    """
+    from aiida.orm import load_node  # pylint: disable=import-outside-toplevel
+    results = []
+    for calc_pk in pks:
+        start = time.perf_counter()
+        try:
+            node = load_node(calc_pk)
+            if output_dir is None:
+                _, calcfunction_node = reparse(node, parser_settings=parser_settings)
+                exit_status, message = calcfunction_node.exit_status, calcfunction_node.exit_message
+            else:
+                parser = VaspParser(node, parser_settings=parser_settings)
+                exit_code = parser.parse()
+                exit_status, message = (exit_code.status, exit_code.message) if exit_code else (0, None)
+                write_npz(os.path.join(output_dir, '{}.npz'.format(node.uuid)), parser.outputs)
+        except Exception:  # pylint: disable=broad-except
+            exit_status, message = None, traceback.format_exc(limit=-1).strip()
+        results.append((calc_pk, exit_status, message, time.perf_counter() - start))
+    return results
+
+
+def _reparse_chunk_in_worker(arguments):
+    """Reparse a chunk in a worker process, loading the AiiDA profile first."""
+    from aiida import load_profile  # pylint: disable=import-outside-toplevel
+    profile_name, chunk_arguments = arguments
+    load_profile(profile_name)
+    return reparse_chunk(*chunk_arguments)
+
+
+def reparse_calculations(pks, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, parser_settings=None, output_dir=None):
+    """
+    Reparse calculations in chunks, distributed over a pool of worker processes.
+
+    Each worker loads the current AiiDA profile and has its own database connection. With a single worker the
+    chunks are parsed in the current process.
+
+    :param pks: The pks of the calculations.
+    :param workers: The number of worker processes.
+    :param chunk_size: The number of calculations handed to a worker at once.
+    :return: A generator of the results of ``reparse_chunk`` for each chunk, in the order they are finished.
+    """
+    pks = list(pks)
+    chunks = [(pks[index:index + chunk_size], parser_settings, output_dir) for index in range(0, len(pks), chunk_size)]
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield reparse_chunk(*chunk)
+        return
+
+    from aiida.manage.configuration import get_profile  # pylint: disable=import-outside-toplevel
+    profile_name = get_profile().name
+    # Workers are started from scratch, forked processes would share the database connection of this one.
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(min(workers, len(chunks))) as pool:
+        for results in pool.imap_unordered(_reparse_chunk_in_worker, [(profile_name, chunk) for chunk in chunks]):
+            yield results
@@ -10,12 +10,17 @@ from copy import deepcopy
 from aiida_vasp.parsers.file_parsers.doscar import DosParser
 from aiida_vasp.parsers.file_parsers.eigenval import EigParser
 from aiida_vasp.parsers.file_parsers.kpoints import KpointsParser
+from aiida_vasp.parsers.file_parsers.oszicar import OszicarParser
 from aiida_vasp.parsers.file_parsers.outcar import OutcarParser
+from aiida_vasp.parsers.file_parsers.outcar_streaming import StreamingOutcarParser
 from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser
+from aiida_vasp.parsers.file_parsers.vasprun_streaming import StreamingVasprunParser
 from aiida_vasp.parsers.file_parsers.chgcar import ChgcarParser
 from aiida_vasp.parsers.file_parsers.wavecar import WavecarParser
 from aiida_vasp.parsers.file_parsers.poscar import PoscarParser
+from aiida_vasp.parsers.file_parsers.procar import ProcarParser
 from aiida_vasp.parsers.file_parsers.stream import StreamParser
+from aiida_vasp.parsers.file_parsers.xdatcar import XdatcarParser
 
 FILE_PARSER_SETS = {
     'default': {
@@ -44,6 +49,11 @@ FILE_PARSER_SETS = {
             'is_critical': False,
             'status': 'Unknown'
         },
+        'OSZICAR': {
+            'parser_class': OszicarParser,
+            'is_critical': False,
+            'status': 'Unknown'
+        },
         'CHGCAR': {
             'parser_class': ChgcarParser,
             'is_critical': False,
@@ -59,6 +69,16 @@ FILE_PARSER_SETS = {
             'is_critical': False,
             'status': 'Unknown'
         },
+        'PROCAR': {
+            'parser_class': ProcarParser,
+            'is_critical': False,
+            'status': 'Unknown'
+        },
+        'XDATCAR': {
+            'parser_class': XdatcarParser,
+            'is_critical': False,
+            'status': 'Unknown'
+        },
         'vasp_output': {
             'parser_class': StreamParser,
             'is_critical': False,
@@ -66,6 +86,18 @@ FILE_PARSER_SETS = {
         }
     },
 }
+
+# Alternative file parsers for a file, selected by the '<file>_backend' entries of the parser settings.
+FILE_PARSER_BACKENDS = {
+    'OUTCAR': {
+        'parsevasp': OutcarParser,
+        'streaming': StreamingOutcarParser,
+    },
+    'vasprun.xml': {
+        'parsevasp': VasprunParser,
+        'streaming': StreamingVasprunParser,
+    },
+}
 """ NODES """
 
 NODES = {
@@ -164,6 +196,11 @@ NODES = {
         'type': 'dict',
         'quantities': ['site_magnetization'],
     },
+    'arrays': {
+        'link_name': 'arrays',
+        'type': 'vasp.array_bundle',
+        'quantities': ['forces', 'stress', 'energies'],
+    },
 }
 
 
@@ -182,6 +219,15 @@ class ParserDefinitions(object):  # pylint: disable=useless-object-inheritance
         """Add custum parser definition"""
         self._parser_definitions[filename] = parser_dict
 
+    def select_backend(self, filename, backend):
+        """Replace the parser class of a file by one of its alternatives in FILE_PARSER_BACKENDS."""
+        backends = FILE_PARSER_BACKENDS.get(filename, {})
+        if backend not in backends:
+            raise ValueError('The backend {backend} is not available for {filename}, use one of: {backends}'.format(
+                backend=backend, filename=filename, backends=list(backends)))
+        if filename in self._parser_definitions:
+            self._parser_definitions[filename]['parser_class'] = backends[backend]
+
     def _init_parser_definitions(self, file_parser_set):
         """Load a set of parser definitions."""
         if file_parser_set not in FILE_PARSER_SETS:
@@ -247,6 +293,9 @@ class ParserSettings(object):  # pylint: disable=useless-object-inheritance
     def get(self, item, default=None):
         return self._settings.get(item, default)
 
+    def items(self):
+        return self._settings.items()
+
     def _init_output_nodes_dict(self):
         """
         Set the 'nodes' card of a settings object.
@@ -0,0 +1,107 @@
+"""Unittests for the cache of parsed quantities."""
+# pylint: disable=redefined-outer-name,protected-access
+
+import os
+
+import numpy as np
+import pytest
+
+from aiida_vasp.parsers.cache import QuantityCache
+from aiida_vasp.parsers.file_parsers.doscar import DosParser
+from aiida_vasp.parsers.file_parsers.eigenval import EigParser
+
+
+@pytest.fixture
+def output_file(tmpdir):
+    path = tmpdir.join('OUTPUT')
+    path.write('content')
+    return str(path)
+
+
+@pytest.fixture
+def cache_dir(tmpdir):
+    return str(tmpdir.join('cache'))
+
+
+def test_get_put(cache_dir, output_file):
+    """Store and load a quantity with arrays."""
+    cache = QuantityCache(cache_dir)
+    key = cache.get_key(output_file, DosParser, 'doscar-dos')
+    assert cache.get(key) == (False, None)
+    quantity = {'tdos': np.arange(10.), 'header': {'name': 'unknown system'}, 'moments': {1: (0.5, np.float64(0.25))}, 'symbols': ['Si']}
+    cache.put(key, quantity)
+    found, quantity = cache.get(key)
+    assert found
+    assert np.array_equal(quantity['tdos'], np.arange(10.))
+    assert quantity['header'] == {'name': 'unknown system'}
+    assert quantity['moments'] == {1: (0.5, 0.25)}
+    assert isinstance(quantity['moments'][1][1], np.float64)
+    assert quantity['symbols'] == ['Si']
+    assert os.listdir(cache_dir) == [key + '.npz']
+
+
+def test_key(cache_dir, output_file, tmpdir):
+    """The key depends on the file content, the file parser, the quantity and the settings changing the result."""
+    cache = QuantityCache(cache_dir, settings={'add_dos': True, 'energy_type': ['energy_free']})
+    key = cache.get_key(output_file, DosParser, 'doscar-dos')
+    assert key != cache.get_key(output_file, EigParser, 'doscar-dos')
+    assert key != cache.get_key(output_file, DosParser, 'eigenval-eigenvalues')
+
+    other_file = tmpdir.join('OTHER')
+    other_file.write('content')
+    assert key == cache.get_key(str(other_file), DosParser, 'doscar-dos')
+    other_file.write('other content')
+    # The hash of a file is only computed once per cache instance.
+    assert key != QuantityCache(cache_dir, settings={'energy_type': ['energy_free']}).get_key(str(other_file), DosParser, 'doscar-dos')
+
+    assert key == QuantityCache(cache_dir, settings={
+        'energy_type': ['energy_free'],
+        'profile': True
+    }).get_key(output_file, DosParser, 'doscar-dos')
+    assert key != QuantityCache(cache_dir, settings={'energy_type': ['energy_no_entropy']}).get_key(output_file, DosParser, 'doscar-dos')
+    # The INCAR parameters are given to the file parsers, e.g. the run status from OSZICAR depends on NSW.
+    cache = QuantityCache(cache_dir, settings={'energy_type': ['energy_free']}, incar={'nsw': 10})
+    assert key != cache.get_key(output_file, DosParser, 'doscar-dos')
+
+
+def test_eviction(cache_dir, output_file):
+    """The least recently used entries are removed when the cache grows beyond the maximum size."""
+    cache = QuantityCache(cache_dir, max_size=1)
+    array = np.zeros(50000)  # 400 kB
+    keys = [cache.get_key(output_file, DosParser, str(index)) for index in range(3)]
+    cache.put(keys[0], array)
+    cache.put(keys[1], array)
+    cache.evict()
+    for index, key in enumerate(keys[:2]):
+        os.utime(cache._get_path(key), (index, index))
+    # Using the first entry makes the second one the least recently used.
+    assert cache.get(keys[0])[0]
+    cache.put(keys[2], array)
+    os.utime(cache._get_path(keys[2]), (2, 2))
+    # The entries are only removed when evicting, once per parsed calculation.
+    assert all(os.path.exists(cache._get_path(key)) for key in keys)
+    cache.evict()
+    assert [cache.get(key)[0] for key in keys] == [True, False, True]
+
+
+@pytest.mark.parametrize('quantity', [{'function': print}, {'positions': np.array([None, 1])}, {'cell': [[1., 0.]], 'node': object()}])
+def test_not_cacheable(quantity, cache_dir, output_file):
+    """Quantities with other types than arrays, dicts, lists, tuples and scalars, e.g. nodes, are not stored."""
+    cache = QuantityCache(cache_dir)
+    key = cache.get_key(output_file, DosParser, 'doscar-dos')
+    cache.put(key, quantity)
+    assert cache.get(key) == (False, None)
+    assert not os.listdir(cache_dir)
+
+
+def test_failed_write(cache_dir, output_file, monkeypatch):
+    """The temporary file is removed when an entry can not be written."""
+    cache = QuantityCache(cache_dir)
+    key = cache.get_key(output_file, DosParser, 'doscar-dos')
+
+    def _failing_replace(source, destination):
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr(os, 'replace', _failing_replace)
+    cache.put(key, np.zeros(10))
+    assert not os.listdir(cache_dir)
@@ -311,6 +311,520 @@ def test_misc(request, calc_with_retrieved):
     assert data['total_energies']['energy_extrapolated'] == -10.823296
 
 
+def test_file_parsed_once(request, calc_with_retrieved, monkeypatch):
+    """Test that vasprun.xml is only handed to parsevasp once, even if many quantities are parsed from it."""
+    from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser
+
+    settings_dict = {
+        'parser_settings': {
+            'add_bands': True,
+            'add_dos': True,
+            'add_kpoints': True,
+            'add_trajectory': True,
+            'add_energies': True,
+            'add_structure': True
+        }
+    }
+
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic')
+
+    node = calc_with_retrieved(file_path, settings_dict)
+
+    init_xml = VasprunParser._init_xml
+    calls = []
+
+    def _counting_init_xml(self, *args, **kwargs):
+        calls.append((args, kwargs))
+        return init_xml(self, *args, **kwargs)
+
+    monkeypatch.setattr(VasprunParser, '_init_xml', _counting_init_xml)
+
+    parser_cls = ParserFactory('vasp.vasp')
+    result, _ = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert 'misc' in result
+    assert 'bands' in result
+    assert 'trajectory' in result
+    assert len(calls) == 1
+
+
+def test_bands_from_eigenval(request, calc_with_retrieved):
+    """Test that the bands taken from EIGENVAL, the smallest file providing them, agree with the ones from vasprun.xml."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    parser_cls = ParserFactory('vasp.vasp')
+    results = []
+    for misc in [['total_energies'], ['fermi_level']]:
+        settings = {'add_bands': True, 'add_misc': misc, 'profile': True}
+        node = calc_with_retrieved(file_path, {'parser_settings': settings})
+        result, _ = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+        results.append(result)
+        parsed_files = {entry['name'] for entry in node.get_extra('parser_profile')['files']}
+        assert ('EIGENVAL' in parsed_files) == (misc == ['total_energies'])
+
+    eigenval, vasprun = [result['bands'] for result in results]
+    np.testing.assert_allclose(eigenval.get_kpoints(), vasprun.get_kpoints(), atol=1e-6)
+    np.testing.assert_allclose(eigenval.get_array('weights'), vasprun.get_array('weights'), atol=1e-6)
+    np.testing.assert_allclose(eigenval.get_bands(), vasprun.get_bands(), atol=1e-4)
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_file_streams(parallel, request, calc_with_retrieved, monkeypatch):
+    """Test that the file parsers read streams opened from the repository, which are closed after parsing."""
+    from aiida_vasp.parsers.base import BaseParser
+    from aiida_vasp.parsers.file_parsers.parser import SingleFile
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    handlers = []
+    paths = []
+    init_with_handler = SingleFile._init_with_handler
+    get_file = BaseParser._get_file
+
+    def _recording_init_with_handler(self, handler):
+        handlers.append(handler)
+        init_with_handler(self, handler)
+
+    def _recording_get_file(self, fname):
+        paths.append(fname)
+        return get_file(self, fname)
+
+    monkeypatch.setattr(SingleFile, '_init_with_handler', _recording_init_with_handler)
+    monkeypatch.setattr(BaseParser, '_get_file', _recording_get_file)
+    settings = {
+        'add_bands': True,
+        'add_dos': True,
+        'add_misc': ['fermi_level', 'total_energies', 'notifications'],
+        'parallel': parallel,
+        'profile': True
+    }
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert calcfunction.is_finished_ok
+    assert {'bands', 'dos', 'misc'} <= set(result)
+    assert 'vasprun.xml' in [os.path.basename(handler.name) for handler in handlers]
+    assert all(handler.closed for handler in handlers)
+    # Without the cache the paths of the files are not needed, the sizes are taken from the streams.
+    assert not paths
+    files = {entry['name']: entry for entry in node.get_extra('parser_profile')['files']}
+    assert files['vasprun.xml']['size'] == os.path.getsize(os.path.join(file_path, 'vasprun.xml'))
+
+
+def test_array_bundle(request, calc_with_retrieved):
+    """Test that several quantities are bundled into one node, with the same arrays as their separate nodes."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    settings = {'add_forces': True, 'add_stress': True, 'add_dos': True, 'add_arrays': ['forces', 'stress', 'dos']}
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert calcfunction.is_finished_ok
+    bundle = result['arrays']
+    assert isinstance(bundle, get_data_class('vasp.array_bundle'))
+    assert bundle.get_quantity_names() == ['dos', 'forces', 'stress']
+    assert np.array_equal(bundle.get_array('forces_final'), result['forces'].get_array('final'))
+    for quantity in ['forces', 'stress', 'dos']:
+        arrays = bundle.get_quantity(quantity)
+        assert sorted(arrays) == sorted(result[quantity].get_arraynames())
+        for name, array in arrays.items():
+            assert np.array_equal(array, result[quantity].get_array(name))
+
+
+def test_array_storage(request, calc_with_retrieved):
+    """Test that the storage options are applied to the arrays of the nodes they are given for."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    array_storage = {'dos': {'dtype': 'float32', 'compress': True}, 'arrays': {'dtype': 'float32'}}
+    settings = {'add_dos': True, 'add_forces': True, 'add_arrays': ['forces'], 'array_storage': array_storage}
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert calcfunction.is_finished_ok
+    assert isinstance(result['dos'], get_data_class('vasp.array_bundle'))
+    assert result['dos'].get_array('tdos').dtype == np.float32
+    assert result['dos'].get_attribute('storage')['compress']
+    assert result['arrays'].get_array('forces_final').dtype == np.float32
+    assert result['forces'].get_array('final').dtype == np.float64
+    assert 'storage' not in result['forces'].attributes
+
+
+@pytest.mark.parametrize('array_storage', [
+    {
+        'dos': {
+            'precision': 'single'
+        }
+    },
+    {
+        'dos': {
+            'dtype': 'int32'
+        }
+    },
+    {
+        'dos': {
+            'tolerance': '1e-3'
+        }
+    },
+    {
+        'dos': 'float32'
+    },
+    {
+        'misc': {
+            'dtype': 'float32'
+        }
+    },
+    {
+        'trajectory': {
+            'compress': True
+        }
+    },
+    ['dos'],
+])
+def test_invalid_array_storage(array_storage, request, calc_with_retrieved):
+    """Test that invalid storage options give an exit code before any file is parsed."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    settings = {'add_dos': True, 'add_trajectory': True, 'array_storage': array_storage, 'profile': True}
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert calcfunction.exit_status == parser_cls(node).exit_codes.ERROR_INVALID_PARSER_SETTINGS.status
+    assert not result
+
+
+@pytest.mark.parametrize('selection', [
+    {
+        'trajectory_stride': 0
+    },
+    {
+        'trajectory_stride': None
+    },
+    {
+        'trajectory_tail': 1.5
+    },
+    {
+        'trajectory_arrays': 'forces'
+    },
+    {
+        'trajectory_arrays': ['velocities']
+    },
+])
+def test_bad_traj_selection(selection, request, calc_with_retrieved):
+    """Test that an invalid selection of the steps and arrays of the trajectory gives an exit code."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/test_relax_wc/out')
+    settings = dict(selection, add_trajectory=True, vasprun_backend='streaming')
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert calcfunction.exit_status == parser_cls(node).exit_codes.ERROR_INVALID_PARSER_SETTINGS.status
+    assert list(selection)[0] in calcfunction.exit_message
+    assert not result
+
+
+@pytest.mark.parametrize('selection', [{'projectors_ions': [0, 1]}, {'projectors_orbitals': ['dx2-y2']}, {'projectors_threshold': -1}])
+def test_bad_proj_selection(selection, request, calc_with_retrieved):
+    """Test that an invalid selection of the projections gives an exit code before parsing."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    node = calc_with_retrieved(file_path, {'parser_settings': dict(selection, add_projectors=True)})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert calcfunction.exit_status == parser_cls(node).exit_codes.ERROR_INVALID_PARSER_SETTINGS.status
+    assert list(selection)[0] in calcfunction.exit_message
+    assert not result
+
+
+@pytest.mark.parametrize('setting', ['vasprun_backend', 'outcar_backend'])
+def test_unknown_backend(setting, request, calc_with_retrieved):
+    """Test that an unknown backend gives an exit code instead of failing the parser."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    node = calc_with_retrieved(file_path, {'parser_settings': {setting: 'nonexisting'}})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert calcfunction.exit_status == parser_cls(node).exit_codes.ERROR_INVALID_PARSER_SETTINGS.status
+    assert 'The backend nonexisting is not available' in calcfunction.exit_message
+    assert not result
+
+
+@pytest.mark.parametrize('parallel', [True, 2])
+def test_parallel(parallel, request, calc_with_retrieved):
+    """Test that parsing the files concurrently gives the same outputs as parsing them one after the other."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    parser_settings = {
+        'add_bands': True,
+        'add_dos': True,
+        'add_structure': True,
+        'add_misc': ['fermi_level', 'total_energies', 'notifications']
+    }
+
+    parser_cls = ParserFactory('vasp.vasp')
+    results = []
+    for settings in [parser_settings, dict(parser_settings, parallel=parallel)]:
+        node = calc_with_retrieved(file_path, {'parser_settings': settings})
+        result, _ = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+        results.append(result)
+
+    sequential, concurrent = results[0], results[1]
+    assert set(sequential.keys()) == set(concurrent.keys())
+    assert sequential['misc'].get_dict() == concurrent['misc'].get_dict()
+    np.testing.assert_allclose(sequential['bands'].get_bands(), concurrent['bands'].get_bands())
+    np.testing.assert_allclose(sequential['structure'].cell, concurrent['structure'].cell)
+
+
+def test_vasprun_backend(request, calc_with_retrieved):
+    """Test that the streaming vasprun.xml backend gives the same outputs as the parsevasp backend."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    parser_settings = {
+        'add_bands': True,
+        'add_trajectory': True,
+        'add_energies': True,
+        'add_misc': ['total_energies', 'maximum_force', 'run_status', 'version']
+    }
+
+    parser_cls = ParserFactory('vasp.vasp')
+    results = []
+    for settings in [parser_settings, dict(parser_settings, vasprun_backend='streaming')]:
+        node = calc_with_retrieved(file_path, {'parser_settings': settings})
+        result, _ = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+        results.append(result)
+
+    parsevasp, streaming = results[0], results[1]
+    assert set(parsevasp.keys()) == set(streaming.keys())
+    assert parsevasp['misc'].get_dict() == streaming['misc'].get_dict()
+    np.testing.assert_allclose(parsevasp['bands'].get_bands(), streaming['bands'].get_bands())
+    for name in ['positions', 'cells', 'forces']:
+        np.testing.assert_allclose(parsevasp['trajectory'].get_array(name), streaming['trajectory'].get_array(name))
+    np.testing.assert_allclose(parsevasp['energies'].get_array('energy_extrapolated'),
+                               streaming['energies'].get_array('energy_extrapolated'))
+
+
+def test_outcar_backend(request, calc_with_retrieved):
+    """Test that the streaming OUTCAR backend gives the same outputs as the parsevasp backend."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/magnetization')
+    parser_settings = {'add_misc': ['symmetries', 'magnetization', 'run_stats'], 'add_site_magnetization': True}
+
+    parser_cls = ParserFactory('vasp.vasp')
+    results = []
+    for settings in [parser_settings, dict(parser_settings, outcar_backend='streaming')]:
+        node = calc_with_retrieved(file_path, {'parser_settings': settings})
+        result, _ = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+        results.append(result)
+
+    parsevasp, streaming = results[0], results[1]
+    assert set(parsevasp.keys()) == set(streaming.keys())
+    assert parsevasp['misc'].get_dict() == streaming['misc'].get_dict()
+    assert parsevasp['site_magnetization'].get_dict() == streaming['site_magnetization'].get_dict()
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_profile(parallel, request, calc_with_retrieved):
+    """Test that the parser profile is stored as an extra of the calculation node."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    settings = {'add_bands': True, 'add_structure': True, 'parallel': parallel, 'profile': True}
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+
+    parser_cls = ParserFactory('vasp.vasp')
+    parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    profile = node.get_extra('parser_profile')
+    assert profile['total_time'] > 0
+    assert set(profile['nodes']) == {'misc', 'bands', 'structure'}
+    files = {entry['name']: entry for entry in profile['files']}
+    assert files['vasprun.xml']['parser'] == 'VasprunParser'
+    assert files['vasprun.xml']['size'] == os.path.getsize(os.path.join(file_path, 'vasprun.xml'))
+    assert {'eigenvalues', 'occupancies', 'structure'} <= set(files['vasprun.xml']['quantities'])
+    for entry in files.values():
+        assert entry['open_time'] >= 0
+        assert entry['parse_time'] >= sum(entry['quantities'].values()) - 1e-5
+
+
+def test_profile_on_failure(request, calc_with_retrieved, monkeypatch):
+    """Test that the parser profile is also stored if a node can not be composed."""
+    from aiida_vasp.parsers.node_composer import NodeComposer
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    node = calc_with_retrieved(file_path, {'parser_settings': {'add_structure': True, 'profile': True}})
+    monkeypatch.setattr(NodeComposer, 'compose', staticmethod(lambda node_type, inputs, storage=None: None))
+
+    parser_cls = ParserFactory('vasp.vasp')
+    _, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert calcfunction.exit_status == parser_cls(node).exit_codes.ERROR_PARSING_FILE_FAILED.status
+    profile = node.get_extra('parser_profile')
+    assert 'vasprun.xml' in {entry['name'] for entry in profile['files']}
+
+
+def test_no_profile(request, calc_with_retrieved):
+    """Test that no profile is stored unless requested."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    node = calc_with_retrieved(file_path, {'parser_settings': {}})
+    parser_cls = ParserFactory('vasp.vasp')
+    parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+    assert 'parser_profile' not in node.extras
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_cache(parallel, request, tmpdir, calc_with_retrieved):
+    """Test that the quantities are taken from the cache when parsing again, also with other nodes requested."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    settings = {'add_structure': True, 'parallel': parallel, 'profile': True, 'cache': str(tmpdir)}
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+    first = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)[0]
+    assert os.listdir(str(tmpdir))
+
+    node = calc_with_retrieved(file_path, {'parser_settings': dict(settings, add_bands=True)})
+    second = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)[0]
+    assert first['misc'].get_dict() == second['misc'].get_dict()
+    assert np.array_equal(first['structure'].cell, second['structure'].cell)
+    assert 'bands' in second
+
+    files = {entry['name']: entry for entry in node.get_extra('parser_profile')['files']}
+    assert set(files['OUTCAR']['cached']) == set(files['OUTCAR']['quantities'])
+    assert 'parser' not in files['OUTCAR']
+    # The bands were not requested before, so vasprun.xml is parsed again.
+    assert files['vasprun.xml']['parser'] == 'VasprunParser'
+    assert 'structure' in files['vasprun.xml']['cached']
+
+
+@pytest.mark.parametrize(['misc', 'parsed_files'], [
+    (['total_energies', 'notifications'], {'OSZICAR', 'vasp_output'}),
+    (['total_energies', 'maximum_force'], {'vasprun.xml'}),
+    (['total_energies', 'run_status'], {'vasprun.xml'}),
+])
+def test_cheapest_file(misc, parsed_files, request, calc_with_retrieved):
+    """Test that a quantity is taken from the cheapest file, which is OSZICAR for the energies unless vasprun.xml is parsed anyway."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    node = calc_with_retrieved(file_path, {'parser_settings': {'add_misc': misc, 'profile': True}})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, _ = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert {entry['name'] for entry in node.get_extra('parser_profile')['files']} == parsed_files
+    assert result['misc']['total_energies']['energy_extrapolated'] == pytest.approx(-36.09616894, abs=1e-5)
+
+
+def test_cheapest_file_fallback(request, calc_with_retrieved):
+    """Test that a quantity which can not be parsed from the cheapest file is taken from the next one."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    settings = {'add_misc': ['total_energies'], 'energy_type': ['energy_no_entropy'], 'profile': True}
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert calcfunction.is_finished_ok
+    assert [entry['name'] for entry in node.get_extra('parser_profile')['files']] == ['OSZICAR', 'vasprun.xml']
+    assert result['misc']['total_energies'] == {'energy_no_entropy': -36.09556635}
+
+
+@pytest.mark.parametrize('settings', [{'quantity_files': {'total_energies': 'vasprun.xml'}}, {'choose_cheapest_file': False}])
+def test_cheapest_file_disabled(settings, request, calc_with_retrieved):
+    """Test that a quantity pinned to a file, or with the choice by the file sizes turned off, is not taken from the cheapest file."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    settings = dict(settings, add_misc=['total_energies', 'notifications'], profile=True)
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, _ = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert {entry['name'] for entry in node.get_extra('parser_profile')['files']} == {'vasprun.xml', 'vasp_output'}
+    assert result['misc']['total_energies']['energy_extrapolated'] == -36.09616894
+
+
+def test_run_status_pinned(request, calc_with_retrieved, monkeypatch):
+    """Test that the run status is only taken from OSZICAR when it is pinned to it."""
+    from aiida_vasp.parsers.vasp import VaspParser
+    monkeypatch.setattr(VaspParser, '_get_incar', lambda self: {'nsw': 0})
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    settings = {'add_misc': ['run_status'], 'quantity_files': {'run_status': 'OSZICAR'}, 'profile': True}
+    node = calc_with_retrieved(file_path, {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, _ = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert {entry['name'] for entry in node.get_extra('parser_profile')['files']} == {'OSZICAR'}
+    assert result['misc']['run_status']['finished']
+
+
+def test_compressed_file_sizes(request, tmpdir, calc_with_retrieved):
+    """Test that the files retrieved compressed are compared by their uncompressed sizes."""
+    import gzip
+    import shutil
+    file_path = str(request.fspath.join('..') + '../../../test_data/basic_run')
+    compressed_path = str(tmpdir)
+    for file_name in os.listdir(file_path):
+        if file_name == 'vasprun.xml':
+            with open(os.path.join(file_path, file_name), 'rb') as source, gzip.open(os.path.join(compressed_path, file_name + '.gz'),
+                                                                                     'wb') as destination:
+                shutil.copyfileobj(source, destination)
+        else:
+            shutil.copy(os.path.join(file_path, file_name), compressed_path)
+    node = calc_with_retrieved(compressed_path, {'parser_settings': {}})
+    parser = ParserFactory('vasp.vasp')(node)
+    parser._compose_retrieved_content({'retrieved_temporary_folder': compressed_path})
+
+    file_sizes = parser._get_file_sizes()
+    assert file_sizes['vasprun.xml'] == os.path.getsize(os.path.join(file_path, 'vasprun.xml'))
+    assert file_sizes['OSZICAR'] == os.path.getsize(os.path.join(file_path, 'OSZICAR'))
+
+
+@pytest.mark.parametrize(['misc', 'parsed_files'], [
+    (False, {'XDATCAR'}),
+    (['maximum_force'], {'vasprun.xml'}),
+])
+def test_trajectory_from_xdatcar(misc, parsed_files, request, calc_with_retrieved):
+    """Test that the trajectory is taken from XDATCAR when vasprun.xml is not needed, without the forces."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/test_relax_wc/out')
+    settings = {'add_trajectory': True, 'add_misc': misc, 'profile': True}
+    node = calc_with_retrieved(file_path, {'parser_settings': settings, 'ADDITIONAL_RETRIEVE_LIST': ['XDATCAR']})
+    parser_cls = ParserFactory('vasp.vasp')
+    result, _ = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=file_path)
+
+    assert {entry['name'] for entry in node.get_extra('parser_profile')['files']} == parsed_files
+    trajectory = result['trajectory']
+    assert trajectory.get_array('positions').shape[1:] == (2, 3)
+    assert ('forces' in trajectory.get_arraynames()) == ('vasprun.xml' in parsed_files)
+
+
+def _copy_compressed(source_dir, destination_dir, file_names):
+    """Copy the files of source_dir to destination_dir, the ones in file_names compressed with gzip."""
+    import gzip
+    import shutil
+    for file_name in os.listdir(source_dir):
+        source_path = os.path.join(source_dir, file_name)
+        if file_name in file_names:
+            with open(source_path, 'rb') as source, gzip.open(os.path.join(destination_dir, file_name + '.gz'), 'wb') as destination:
+                shutil.copyfileobj(source, destination)
+        else:
+            shutil.copy(source_path, destination_dir)
+
+
+@pytest.mark.parametrize('backend', ['parsevasp', 'streaming'])
+def test_compressed_files(backend, request, tmpdir, calc_with_retrieved):
+    """Test that files retrieved compressed give the same outputs as the uncompressed files."""
+    file_path = str(request.fspath.join('..') + '../../../test_data/test_relax_wc/out')
+    compressed_path = str(tmpdir)
+    _copy_compressed(file_path, compressed_path, ['vasprun.xml', 'OUTCAR', 'CHGCAR'])
+
+    settings = {
+        'add_trajectory': True,
+        'add_misc': True,
+        'add_chgcar': True,
+        'vasprun_backend': backend,
+        'outcar_backend': backend,
+    }
+    parser_cls = ParserFactory('vasp.vasp')
+    results = []
+    for path in [file_path, compressed_path]:
+        node = calc_with_retrieved(path, {'parser_settings': settings})
+        result, calcfunction = parser_cls.parse_from_node(node, store_provenance=False, retrieved_temporary_folder=path)
+        assert calcfunction.is_finished_ok
+        results.append(result)
+
+    plain, compressed = results[0], results[1]
+    assert compressed['misc'].get_dict() == plain['misc'].get_dict()
+    for name in plain['trajectory'].get_arraynames():
+        assert np.array_equal(compressed['trajectory'].get_array(name), plain['trajectory'].get_array(name))
+    assert compressed['chgcar'].filename == 'CHGCAR'
+    assert compressed['chgcar'].get_content() == plain['chgcar'].get_content()
+
+
 @pytest.mark.parametrize(
     'config',
     [
@@ -9,14 +9,23 @@ contains several modules:
 - ``quantity`` the actual quantity to parse and what file parsers to use to obtain it
 - ``settings`` general parser settings
 - ``manager`` takes the quantity definitions and executes the actual parsing needed
+- ``profile`` optionally records the time and memory used while parsing
+- ``cache`` optionally stores the parsed quantities on disk for reparsing
 """
 #encoding: utf-8
 # pylint: disable=no-member
+
 from aiida.common.exceptions import NotExistent
 from aiida_vasp.parsers.base import BaseParser
+from aiida_vasp.parsers.file_parsers.parser import get_uncompressed_size, split_compression_suffix
+from aiida_vasp.parsers.cache import QuantityCache, DEFAULT_MAX_SIZE, get_default_cache_dir
+from aiida_vasp.parsers.manager import ParserManager
+from aiida_vasp.parsers.profile import ParserProfile
 from aiida_vasp.parsers.quantity import ParsableQuantities
 from aiida_vasp.parsers.settings import ParserSettings, ParserDefinitions
-from aiida_vasp.parsers.node_composer import NodeComposer, get_node_composer_inputs
+from aiida_vasp.parsers.node_composer import NodeComposer, get_node_composer_inputs, get_storage_options
+from aiida_vasp.utils.projectors import check_projector_selection
+from aiida_vasp.utils.trajectory import get_trajectory_selection
 
 DEFAULT_OPTIONS = {
     'add_trajectory': False,
@@ -36,6 +45,12 @@ DEFAULT_OPTIONS = {
     'add_forces': False,
     'add_stress': False,
     'add_site_magnetization': False,
+    'vasprun_backend': 'parsevasp',
+    'outcar_backend': 'parsevasp',
+    'profile': False,
+    'cache': False,
+    'cache_max_size': DEFAULT_MAX_SIZE,
+    'choose_cheapest_file': True,
 }
 
 
@@ -77,6 +92,65 @@ class VaspParser(BaseParser):
         By this option the default set of FileParsers can be chosen. See settings.py
         for available options.
 
+    * `parallel`: Bool or int (DEFAULT = False).
+
+        Parse the retrieved files concurrently in a thread pool. If an integer is given,
+        it sets the maximum number of files parsed at the same time.
+
+    * `vasprun_backend`: String (DEFAULT = 'parsevasp').
+
+        The file parser used for vasprun.xml. With 'streaming' the ionic steps are read one
+        at a time with constant memory, which is recommended for long MD and relaxation runs.
+        This backend only provides the quantities of the ionic steps (structure, trajectory,
+        energies, forces, stress, ...), the bands and the run status. See settings.py for available options.
+        An unknown backend gives the ERROR_INVALID_PARSER_SETTINGS exit code.
+
+    * `outcar_backend`: String (DEFAULT = 'parsevasp').
+
+        The file parser used for OUTCAR. With 'streaming' only the parts of the file the requested
+        quantities are taken from are read, instead of loading the whole file into memory.
+        An unknown backend gives the ERROR_INVALID_PARSER_SETTINGS exit code.
+
+    * `profile`: Bool (DEFAULT = False).
+
+        Record the size of each file, the time to open it and to evaluate each quantity from it,
+        the increase of the peak memory usage and the time to compose each output node. The record
+        is stored as the 'parser_profile' extra of the calculation node.
+
+    * `cache`: Bool or string (DEFAULT = False).
+
+        Store the parsed quantities on disk, keyed by the content of the parsed files, and take them
+        from there when the same files are parsed again, e.g. when reparsing with other output nodes.
+        With True the cache is located in the AiiDA configuration folder, a string gives the directory.
+
+    * `cache_max_size`: Int (DEFAULT = 1024).
+
+        The maximum size of the cache in MB, the least recently used quantities are removed beyond it.
+
+    * `choose_cheapest_file`: Bool (DEFAULT = True).
+
+        Parse a quantity that is available from several files from the ones with the smallest total size, e.g.
+        the total energies from OSZICAR instead of vasprun.xml, with fewer digits. With False the quantities
+        are taken from vasprun.xml, or else from the file their parser is defined for first.
+
+    * `quantity_files`: Dict (DEFAULT = {}).
+
+        The files to parse quantities from by the quantity names, e.g. {'total_energies': 'vasprun.xml'},
+        regardless of the size of the files.
+
+    * `array_storage`: Dict (DEFAULT = {}).
+
+        The storage options of the arrays of the output nodes by their node names, e.g.
+        {'projectors': {'dtype': 'float32', 'tolerance': 1e-4, 'compress': True}}. The arrays can be stored
+        with a lower precision, rounded to a tolerance and compressed, see ``get_storage_options`` in
+        node_composer.py. The options are stored as the 'storage' attribute of the nodes. With 'compress',
+        an ``array`` output node is a ``vasp.array_bundle`` node instead of an ``ArrayData`` node, which is a
+        subclass of it with the same array names. Invalid options give the ERROR_INVALID_PARSER_SETTINGS exit
+        code, before any file is parsed.
+
+    When a finished calculation is parsed again, e.g. with ``reparse`` in ``aiida_vasp.parsers.reparse``,
+    the `parser_settings` given to the constructor update the ones of the calculation.
+
     Additional FileParsers can be added to the VaspParser by using
 
         VaspParser.add_file_parser(parser_name, parser_definition_dict),
@@ -86,7 +160,7 @@ class VaspParser(BaseParser):
     is called, will only have an effect when parsing a second time.
     """
 
-    def __init__(self, node):
+    def __init__(self, node, parser_settings=None):
         super(VaspParser, self).__init__(node)
 
         try:
@@ -94,12 +168,24 @@ class VaspParser(BaseParser):
         except NotExistent:
             calc_settings = None
 
-        parser_settings = None
+        stored_settings = None
         if calc_settings:
-            parser_settings = calc_settings.get_dict().get('parser_settings')
+            stored_settings = calc_settings.get_dict().get('parser_settings')
+        # Settings given when reparsing a calculation update the ones it was run with.
+        if parser_settings is not None:
+            parser_settings = dict(stored_settings or {}, **parser_settings)
+        else:
+            parser_settings = stored_settings
 
         self._definitions = ParserDefinitions()
         self._settings = ParserSettings(parser_settings, default_settings=DEFAULT_OPTIONS)
+        # An unknown backend is reported by an exit code once parsing starts, see ``_check_backends``.
+        self._backend_errors = []
+        for file_name, setting in [('vasprun.xml', 'vasprun_backend'), ('OUTCAR', 'outcar_backend')]:
+            try:
+                self._definitions.select_backend(file_name, self._settings.get(setting))
+            except ValueError as error:
+                self._backend_errors.append(str(error))
         self._parsable_quantities = ParsableQuantities(vasp_parser_logger=self.logger)
 
     def add_parser_definition(self, filename, parser_dict):
@@ -122,33 +208,153 @@ class VaspParser(BaseParser):
         if error_code is not None:
             return error_code
 
-        for file_name, value_dict in self._definitions.parser_definitions.items():
-            if file_name not in self._retrieved_content.keys() and value_dict['is_critical']:
-                return self.exit_codes.ERROR_CRITICAL_MISSING_FILE
+        for check in [
+                self._check_critical_files, self._check_backends, self._check_array_storage, self._check_trajectory_selection,
+                self._check_projector_selection
+        ]:
+            error_code = check()
+            if error_code is not None:
+                return error_code
 
         self._parsable_quantities.setup(retrieved_filenames=self._retrieved_content.keys(),
                                         parser_definitions=self._definitions.parser_definitions,
-                                        quantity_names_to_parse=self._settings.quantity_names_to_parse)
-
-        parsed_quantities = {}
-        for quantity_key in self._parsable_quantities.quantity_keys_to_parse:
-            file_name = self._parsable_quantities.quantity_keys_to_filenames[quantity_key]
-            file_parser_cls = self._definitions.parser_definitions[file_name]['parser_class']
-            parser = file_parser_cls(settings=self._settings, exit_codes=self.exit_codes, file_path=self._get_file(file_name))
-            parsed_quantity = parser.get_quantity(quantity_key)
-            if parsed_quantity is not None:
-                parsed_quantities[quantity_key] = parsed_quantity
-            exit_code = parser.exit_code
-
-        for _, node_dict in self._settings.output_nodes_dict.items():
-            equivalent_quantity_keys = self._parsable_quantities.equivalent_quantity_keys
-            inputs = get_node_composer_inputs(equivalent_quantity_keys, parsed_quantities, node_dict['quantities'])
-            aiida_node = NodeComposer.compose(node_dict['type'], inputs)
-            if aiida_node is None:
-                return self.exit_codes.ERROR_PARSING_FILE_FAILED
-            self.out(node_dict['link_name'], aiida_node)
+                                        quantity_names_to_parse=self._settings.quantity_names_to_parse,
+                                        file_sizes=self._get_file_sizes() if self._settings.get('choose_cheapest_file') else None,
+                                        quantity_files=self._settings.get('quantity_files', {}))
+
+        profile = ParserProfile(enabled=self._settings.get('profile', False))
+        incar = self._get_incar()
+        cache = self._get_cache(incar)
+
+        # The profile is also stored if parsing fails, which is when it is most needed.
+        try:
+            # Each file is handed to its file parser only once, regardless of how many quantities are parsed from it.
+            manager = ParserManager(parser_definitions=self._definitions.parser_definitions,
+                                    quantity_keys_to_filenames=self._parsable_quantities.quantity_keys_to_filenames,
+                                    get_file=self._get_file,
+                                    open_file=self._open_file,
+                                    settings=self._settings,
+                                    exit_codes=self.exit_codes,
+                                    profile=profile,
+                                    cache=cache,
+                                    incar=incar)
+            manager.setup(self._parsable_quantities.quantity_keys_to_parse)
+
+            parallel = self._settings.get('parallel', False)
+            if parallel:
+                max_workers = None if parallel is True else int(parallel)
+                parsed_quantities = manager.get_quantities_parallel(self._parsable_quantities.quantity_keys_to_parse,
+                                                                    max_workers=max_workers)
+            else:
+                parsed_quantities = manager.get_quantities(self._parsable_quantities.quantity_keys_to_parse)
+            parsed_quantities.update(manager.get_fallback_quantities(parsed_quantities, self._parsable_quantities.fallback_quantity_keys))
+            exit_code = manager.exit_code
+
+            array_storage = self._settings.get('array_storage', {})
+            for node_name, node_dict in self._settings.output_nodes_dict.items():
+                equivalent_quantity_keys = self._parsable_quantities.equivalent_quantity_keys
+                inputs = get_node_composer_inputs(equivalent_quantity_keys, parsed_quantities, node_dict['quantities'])
+                with profile.compose(node_dict['link_name']):
+                    aiida_node = NodeComposer.compose(node_dict['type'], inputs, storage=array_storage.get(node_name))
+                if aiida_node is None:
+                    return self.exit_codes.ERROR_PARSING_FILE_FAILED
+                self.out(node_dict['link_name'], aiida_node)
+        finally:
+            if profile.enabled:
+                self.node.set_extra('parser_profile', profile.get_dict())
+            if cache is not None:
+                cache.evict()
 
         if exit_code is not None:
             return exit_code
 
         return self.exit_codes.NO_ERROR
+
+    def _get_file_sizes(self):
+        """Return the sizes of the retrieved files that have a file parser, for compressed files their uncompressed sizes."""
+        file_sizes = {}
+        for file_name in self._definitions.parser_definitions:
+            opened_file = self._open_file(file_name)
+            if opened_file is None:
+                continue
+            _, suffix = split_compression_suffix(self._retrieved_content[file_name].get('name', file_name))
+            with opened_file as handler:
+                try:
+                    file_sizes[file_name] = get_uncompressed_size(handler, suffix)
+                except (OSError, ValueError, EOFError):
+                    # The size of a stream that is not seekable, or of a damaged file, is unknown.
+                    continue
+        return file_sizes
+
+    def _check_backends(self):
+        """Check that the backends selected for the files are available."""
+        if self._backend_errors:
+            return self._invalid_settings(' '.join(self._backend_errors))
+        return None
+
+    def _check_critical_files(self):
+        """Check that all critical files were retrieved."""
+        for file_name, value_dict in self._definitions.parser_definitions.items():
+            if file_name not in self._retrieved_content and value_dict['is_critical']:
+                return self.exit_codes.ERROR_CRITICAL_MISSING_FILE
+        return None
+
+    def _check_array_storage(self):
+        """Check the storage options of the arrays of the requested output nodes, see ``get_storage_options``."""
+        array_storage = self._settings.get('array_storage', {})
+        if not isinstance(array_storage, dict):
+            return self._invalid_settings('The array_storage has to be a dict of the storage options by the node names, '
+                                          'not {}.'.format(array_storage))
+        for node_name, node_dict in self._settings.output_nodes_dict.items():
+            if not array_storage.get(node_name):
+                continue
+            try:
+                get_storage_options(array_storage[node_name], node_dict['type'])
+            except ValueError as error:
+                return self._invalid_settings('The array_storage of the {} node is not valid: {}'.format(node_name, error))
+        return None
+
+    def _check_trajectory_selection(self):
+        """Check the settings selecting the steps and arrays of the trajectory, see ``get_trajectory_selection``."""
+        try:
+            get_trajectory_selection(self._settings)
+        except ValueError as error:
+            return self._invalid_settings(str(error))
+        return None
+
+    def _check_projector_selection(self):
+        """Check the settings selecting the ions and orbitals of the projections, see ``check_projector_selection``."""
+        try:
+            check_projector_selection(self._settings)
+        except ValueError as error:
+            return self._invalid_settings(str(error))
+        return None
+
+    def _invalid_settings(self, error):
+        """Log why the parser settings are not valid and return the exit code for it."""
+        self.logger.warning(error)
+        return self.exit_codes.ERROR_INVALID_PARSER_SETTINGS.format(error=error)
+
+    def _get_incar(self):
+        """Return the INCAR parameters of the calculation with lowercase tags, needed by some file parsers."""
+        try:
+            parameters = self.node.inputs.parameters
+        except NotExistent:
+            return None
+        return {key.lower(): value for key, value in parameters.get_dict().items()}
+
+    def _get_cache(self, incar=None):
+        """
+        Return the cache of parsed quantities, if it is enabled in the parser settings.
+
+        :param incar: The INCAR parameters given to the file parsers, which are part of the keys of the cache.
+        """
+        cache = self._settings.get('cache', False)
+        if not cache:
+            return None
+        directory = cache if isinstance(cache, str) else get_default_cache_dir()
+        try:
+            return QuantityCache(directory, max_size=self._settings.get('cache_max_size'), settings=self._settings, incar=incar)
+        except OSError as error:
+            self.logger.warning('The parser cache is disabled, the directory {} is not available: {}'.format(directory, error))
+            return None
@@ -0,0 +1,510 @@
+"""
+Synthetic VASP output.
+
+----------------------
+Writes consistent sets of VASP output files of arbitrary size, for benchmarking the parsers at production sizes.
+The content is random but reproducible, the layout follows the files written by VASP 5.4.
+"""
+import os
+
+import numpy as np
+
+DEFAULT_SIZES = {
+    'num_atoms': 8,
+    'num_kpoints': 10,
+    'num_bands': 16,
+    'nedos': 301,
+    'num_steps': 1,
+    'num_scsteps': 5,
+    'num_spins': 1,
+    'grid': (24, 24, 24),
+}
+
+ELEMENTS = ['In', 'As']
+ORBITALS = ['s', 'py', 'pz', 'px', 'dxy', 'dyz', 'dz2', 'dxz', 'dx2']
+FILE_NAMES = ['vasprun.xml', 'OUTCAR', 'DOSCAR', 'EIGENVAL', 'PROCAR', 'CHGCAR', 'XDATCAR', 'vasp_output']
+SEPARATOR = '-' * 104
+
+
+class SyntheticRun(object):  # pylint: disable=useless-object-inheritance,too-many-instance-attributes
+    """
+    A random VASP run of a given size, which can be written to the usual output files.
+
+    The sizes are given as keyword arguments, see ``DEFAULT_SIZES``. All files written for the same instance
+    describe the same run, e.g. the eigenvalues in vasprun.xml, EIGENVAL and OUTCAR agree.
+    """
+
+    def __init__(self, seed=0, **sizes):
+        unknown = set(sizes) - set(DEFAULT_SIZES)
+        if unknown:
+            raise ValueError('Unknown sizes: {}'.format(', '.join(sorted(unknown))))
+        self.sizes = dict(DEFAULT_SIZES, **sizes)
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        num_atoms = self.sizes['num_atoms']
+        num_steps = self.sizes['num_steps']
+        num_spins = self.sizes['num_spins']
+        num_kpoints = self.sizes['num_kpoints']
+        num_bands = self.sizes['num_bands']
+        nedos = self.sizes['nedos']
+
+        self.counts = [count for count in [num_atoms - num_atoms // 2, num_atoms // 2] if count]
+        self.symbols = [element for element, count in zip(ELEMENTS, self.counts) for _ in range(count)]
+        self.cell = np.eye(3) * 3.0 * num_atoms**(1. / 3)
+        self.positions = (rng.uniform(size=(num_atoms, 3)) + rng.normal(scale=1e-3, size=(num_steps, num_atoms, 3))) % 1.0
+        self.forces = rng.normal(scale=0.1, size=(num_steps, num_atoms, 3))
+        self.stress = rng.normal(size=(num_steps, 3, 3))
+        self.stress = (self.stress + self.stress.transpose(0, 2, 1)) / 2
+        self.energies = -5.0 * num_atoms - np.cumsum(rng.uniform(0, 1e-2, size=(num_steps, self.sizes['num_scsteps'])), axis=1)
+
+        self.kpoints = rng.uniform(0, 0.5, size=(num_kpoints, 3))
+        self.weights = rng.uniform(0.1, 1, size=num_kpoints)
+        self.weights /= self.weights.sum()
+        self.eigenvalues = np.sort(rng.uniform(-10, 10, size=(num_spins, num_kpoints, num_bands)), axis=-1)
+        self.efermi = float(np.median(self.eigenvalues))
+        self.occupations = (self.eigenvalues < self.efermi).astype(float)
+        self.nelect = 2 * (num_bands // 2)
+        self.projections = rng.uniform(0, 0.1, size=(num_spins, num_kpoints, num_bands, num_atoms, len(ORBITALS)))
+
+        self.dos_energies = np.linspace(-12, 12, nedos)
+        self.tdos = rng.uniform(0, 5, size=(num_spins, nedos))
+        self.integrated_dos = np.cumsum(self.tdos, axis=-1) * (self.dos_energies[1] - self.dos_energies[0])
+        self.pdos = rng.uniform(0, 0.5, size=(num_atoms, num_spins, nedos, len(ORBITALS)))
+        self.charge_density = rng.uniform(0, 10, size=tuple(self.sizes['grid'][::-1]))
+
+    @property
+    def num_atoms(self):
+        return self.sizes['num_atoms']
+
+    def write(self, folder, file_names=None):
+        """Write the given output files (all by default) to a folder and return their paths."""
+        writers = dict(
+            zip(FILE_NAMES, [
+                self.write_vasprun, self.write_outcar, self.write_doscar, self.write_eigenval, self.write_procar, self.write_chgcar,
+                self.write_xdatcar, self.write_vasp_output
+            ]))
+        paths = []
+        for file_name in file_names or FILE_NAMES:
+            path = os.path.join(folder, file_name)
+            writers[file_name](path)
+            paths.append(path)
+        return paths
+
+    def write_vasprun(self, path):
+        """Write a vasprun.xml file, with the eigenvalues, DOS and projections in the last ionic step."""
+        with open(path, 'w') as handler:
+            handler.write('<?xml version="1.0" encoding="ISO-8859-1"?>\n<modeling>\n')
+            handler.write(' <generator>\n  <i name="program" type="string">vasp </i>\n'
+                          '  <i name="version" type="string">5.4.4.18Apr17-6-g9f103f2a35  </i>\n </generator>\n')
+            self._write_xml_incar(handler)
+            handler.write(' <kpoints>\n  <varray name="kpointlist" >\n')
+            _write_rows(handler, self.kpoints, '   <v> %16.8f %16.8f %16.8f </v>')
+            handler.write('  </varray>\n  <varray name="weights" >\n')
+            _write_rows(handler, self.weights[:, np.newaxis], '   <v> %16.8f </v>')
+            handler.write('  </varray>\n </kpoints>\n')
+            self._write_xml_parameters(handler)
+            self._write_xml_atominfo(handler)
+            self._write_xml_structure(handler, 0, ' name="initialpos" ', indent=1)
+            for step in range(self.sizes['num_steps']):
+                self._write_xml_calculation(handler, step)
+            self._write_xml_structure(handler, -1, ' name="finalpos" ', indent=1)
+            handler.write('</modeling>\n')
+
+    def write_outcar(self, path):
+        """Write an OUTCAR file with the symmetry analysis, the electronic and ionic steps and the run statistics."""
+        num_spins = self.sizes['num_spins']
+        with open(path, 'w') as handler:
+            handler.write(' vasp.5.4.4.18Apr17-6-g9f103f2a35 (build Sep 10 2019 21:21:20) complex\n\n')
+            handler.write(' POSCAR = {}\n\n'.format(' '.join(ELEMENTS[:len(self.counts)])))
+            handler.write('   ions per type = {}\n'.format(''.join(['{:>6d}'.format(count) for count in self.counts])))
+            handler.write('   k-points           NKPTS = {:>6d}   number of bands    NBANDS= {:>6d}\n'.format(
+                self.sizes['num_kpoints'], self.sizes['num_bands']))
+            handler.write('   number of dos      NEDOS = {:>6d}   number of ions     NIONS = {:>6d}\n\n'.format(
+                self.sizes['nedos'], self.num_atoms))
+            for configuration, title in [('static', 'initial positions (statically)'),
+                                         ('dynamic', 'dynamics (positions and initial velocities)')]:
+                handler.write(OUTCAR_SYMMETRY.format(title=title, configuration=configuration))
+            handler.write(' Subroutine INISYM returns: Found  1 space group operations\n'
+                          ' (whereof  1 operations are pure point group operations),\n'
+                          " and found     1 'primitive' translations\n\n")
+            handler.write('   ISPIN  = {:>6d}    spin polarized calculation?\n'.format(num_spins))
+            handler.write('   NELECT = {:>12.4f}    total number of electrons\n'.format(self.nelect))
+            handler.write('   NSW    = {:>6d}    number of steps for IOM\n'.format(self.sizes['num_steps']))
+            handler.write('   IBRION = {:>6d}    ionic relax: 0-MD 1-quasi-New 2-CG\n'.format(self._ibrion))
+            handler.write('   LEPSILON=     F    determine dielectric tensor\n\n')
+            for step in range(self.sizes['num_steps']):
+                self._write_outcar_step(handler, step)
+            handler.write(OUTCAR_RUN_STATS)
+
+    def write_doscar(self, path):
+        """Write a DOSCAR file with the total and the lm-decomposed DOS of each ion."""
+        num_spins = self.sizes['num_spins']
+        nedos = self.sizes['nedos']
+        emax, emin = self.dos_energies[-1], self.dos_energies[0]
+        with open(path, 'w') as handler:
+            handler.write('{0:>4d}{0:>4d}   1   0\n'.format(self.num_atoms))
+            handler.write('  0.1648482E+02  0.4040000E-09  0.4040000E-09  0.4040000E-09  0.1000000E-15\n'
+                          '  1.000000000000000E-004\n  CAR\n unknown system\n')
+            energy_line = '{:16.8f}{:16.8f}{:>8d}{:16.8f}{:16.8f}\n'.format(emax, emin, nedos, self.efermi, 1.0)
+            handler.write(energy_line)
+            tdos = np.column_stack([self.dos_energies] + list(self.tdos) + list(self.integrated_dos))
+            _write_rows(handler, tdos, '%11.3f' + ' %11.4E' * 2 * num_spins)
+            for ion in range(self.num_atoms):
+                handler.write(energy_line)
+                # The columns are ordered by orbital first and then by spin.
+                pdos = self.pdos[ion].transpose(1, 2, 0).reshape(nedos, -1)
+                _write_rows(handler, np.column_stack([self.dos_energies, pdos]), '%11.3f' + ' %11.4E' * pdos.shape[1])
+
+    def write_eigenval(self, path):
+        """Write an EIGENVAL file with the eigenvalues and occupations of each k-point."""
+        num_spins = self.sizes['num_spins']
+        num_bands = self.sizes['num_bands']
+        band_index = np.arange(1, num_bands + 1)
+        with open(path, 'w') as handler:
+            handler.write('{0:>5d}{0:>5d}{1:>5d}{2:>5d}\n'.format(self.num_atoms, self.sizes['num_steps'], num_spins))
+            handler.write('  0.1648482E+02  0.4040000E-09  0.4040000E-09  0.4040000E-09  0.1000000E-15\n'
+                          '  1.000000000000000E-004\n  CAR\n unknown system\n')
+            handler.write('{:>7d}{:>7d}{:>7d}\n'.format(self.nelect, self.sizes['num_kpoints'], num_bands))
+            for kpoint in range(self.sizes['num_kpoints']):
+                handler.write('\n{:15.7E}{:15.7E}{:15.7E}{:15.7E}\n'.format(*self.kpoints[kpoint], self.weights[kpoint]))
+                rows = np.column_stack([band_index] + list(self.eigenvalues[:, kpoint]) + list(self.occupations[:, kpoint]))
+                _write_rows(handler, rows, '%5d' + ' %15.6f' * num_spins + ' %9.6f' * num_spins)
+
+    def write_procar(self, path, phase=False):
+        """Write a PROCAR file with the projections, and with the phase factors in the layout of VASP 5.4.4 if requested."""
+        ion_index = np.arange(1, self.num_atoms + 1)[:, np.newaxis]
+        orbitals = ORBITALS[:-1] + ['x2-y2']
+        with open(path, 'w') as handler:
+            handler.write('PROCAR lm decomposed{}\n'.format(' + phase' if phase else ''))
+            for spin in range(self.sizes['num_spins']):
+                handler.write('# of k-points:{:>5d}         # of bands:{:>5d}         # of ions:{:>5d}\n'.format(
+                    self.sizes['num_kpoints'], self.sizes['num_bands'], self.num_atoms))
+                for kpoint in range(self.sizes['num_kpoints']):
+                    handler.write('\n k-point {:>5d} :    {:.8f} {:.8f} {:.8f}     weight = {:.8f}\n\n'.format(
+                        kpoint + 1, *self.kpoints[kpoint], self.weights[kpoint]))
+                    for band in range(self.sizes['num_bands']):
+                        handler.write('band {:>5d} # energy {:>13.8f} # occ. {:>11.8f}\n\n'.format(
+                            band + 1, self.eigenvalues[spin, kpoint, band], self.occupations[spin, kpoint, band]))
+                        handler.write('ion ' + ''.join(['{:>7}'.format(orbital) for orbital in orbitals]) + '    tot\n')
+                        projections = self.projections[spin, kpoint, band]
+                        rows = np.column_stack([ion_index, projections, projections.sum(axis=-1)])
+                        _write_rows(handler, rows, '%5d' + ' %6.3f' * (len(orbitals) + 1))
+                        _write_rows(handler, rows[:, 1:].sum(axis=0)[np.newaxis], 'tot  ' + ' %6.3f' * (len(orbitals) + 1))
+                        if phase:
+                            handler.write('ion ' + ''.join(['{:>15}'.format(orbital) for orbital in orbitals]) + '\n')
+                            phase_factors = np.sqrt(projections) * (1 - 0.5j)
+                            values = np.stack([phase_factors.real, phase_factors.imag], axis=-1).reshape(self.num_atoms, -1)
+                            _write_rows(handler, np.column_stack([ion_index, values, projections.sum(axis=-1)]),
+                                        '%5d' + ' %6.3f' * 2 * len(orbitals) + '   charge %6.3f')
+                        handler.write('\n')
+
+    def write_chgcar(self, path):
+        """Write a CHGCAR file with the structure of the last ionic step and the charge density on the grid."""
+        with open(path, 'w') as handler:
+            handler.write('unknown system\n   1.00000000000000\n')
+            _write_rows(handler, self.cell, '  %12.6f %12.6f %12.6f')
+            handler.write('   {}\n   {}\nDirect\n'.format('   '.join(ELEMENTS[:len(self.counts)]),
+                                                          '   '.join([str(count) for count in self.counts])))
+            _write_rows(handler, self.positions[-1], '  %10.6f %10.6f %10.6f')
+            handler.write('\n{:>5d}{:>5d}{:>5d}\n'.format(*self.sizes['grid']))
+            # The density is written with x running fastest, five values per line.
+            values = self.charge_density.ravel()
+            num_full = values.size // 5 * 5
+            _write_rows(handler, values[:num_full].reshape(-1, 5), ' %17.11E' * 5)
+            if num_full < values.size:
+                _write_rows(handler, values[np.newaxis, num_full:], ' %17.11E' * (values.size - num_full))
+
+    def write_xdatcar(self, path, variable_cell=False):
+        """Write an XDATCAR file with the positions of each ionic step, repeating the header for a variable cell."""
+        with open(path, 'w') as handler:
+            for step, positions in enumerate(self.positions):
+                if step == 0 or variable_cell:
+                    handler.write('unknown system\n           1\n')
+                    _write_rows(handler, self.cell, '  %11.6f %11.6f %11.6f')
+                    handler.write('   {}\n   {}\n'.format('   '.join(ELEMENTS[:len(self.counts)]),
+                                                          '   '.join([str(count) for count in self.counts])))
+                handler.write('Direct configuration= {:>5d}\n'.format(step + 1))
+                _write_rows(handler, positions, '  %.8f  %.8f  %.8f')
+
+    def get_plane_wave_coefficients(self, num_plane_waves):
+        """Return random plane wave coefficients for WAVECAR, a list with an array for each k-point, with fewer at the later ones."""
+        rng = np.random.RandomState(self.seed)
+        shape = (self.sizes['num_spins'], self.sizes['num_bands'])
+        return [(rng.normal(size=shape + (num_plane_waves - kpoint % 3,)) +
+                 1j * rng.normal(size=shape + (num_plane_waves - kpoint % 3,))).astype(np.complex64)
+                for kpoint in range(self.sizes['num_kpoints'])]
+
+    def write_wavecar(self, path, num_plane_waves=20):
+        """Write a WAVECAR file in single precision, with the coefficients of ``get_plane_wave_coefficients``."""
+        num_bands = self.sizes['num_bands']
+        record_length = 8 * max(num_plane_waves, 4 + 3 * num_bands, 12)
+        coefficients = self.get_plane_wave_coefficients(num_plane_waves)
+        with open(path, 'wb') as handler:
+
+            def write_record(values):
+                handler.write(values.tobytes().ljust(record_length, b'\0'))
+
+            write_record(np.array([record_length, self.sizes['num_spins'], 45200], dtype=float))
+            write_record(np.concatenate([[self.sizes['num_kpoints'], num_bands, 400.0], self.cell.ravel()]))
+            for spin in range(self.sizes['num_spins']):
+                for kpoint, kpoint_coefficients in enumerate(coefficients):
+                    bands = np.column_stack([self.eigenvalues[spin, kpoint], np.zeros(num_bands), self.occupations[spin, kpoint]])
+                    write_record(np.concatenate([[kpoint_coefficients.shape[-1]], self.kpoints[kpoint], bands.ravel()]))
+                    for band_coefficients in kpoint_coefficients[spin]:
+                        write_record(band_coefficients)
+
+    def write_vasp_output(self, path):
+        """Write the standard output of VASP, with one line per electronic and per ionic step."""
+        with open(path, 'w') as handler:
+            handler.write(' running on    1 total cores\n using from now: INCAR\n vasp.5.4.4.18Apr17-6-g9f103f2a35 complex\n\n')
+            handler.write(' POSCAR found :  {} types and {:>7d} ions\n'.format(len(self.counts), self.num_atoms))
+            handler.write(' POSCAR, INCAR and KPOINTS ok, starting setup\n FFT: planning ...\n')
+            handler.write('       N       E                     dE             d eps       ncg     rms          rms(c)\n')
+            for step, energies in enumerate(self.energies):
+                previous = 0.0
+                for scstep, energy in enumerate(energies):
+                    handler.write('DAV: {:>3d}   {:20.12E}   {:12.5E}   {:12.5E}  {:>5d}   {:10.3E}\n'.format(
+                        scstep + 1, energy, energy - previous, (energy - previous) / 2, 2 * self.sizes['num_bands'], 1e-3))
+                    previous = energy
+                handler.write('{:>4d} F= {:.8E} E0= {:.8E}  d E ={:.6E}\n'.format(step + 1, energies[-1], energies[-1],
+                                                                                  energies[-1] - previous))
+
+    @property
+    def _ibrion(self):
+        return 2 if self.sizes['num_steps'] > 1 else -1
+
+    def _write_xml_incar(self, handler):
+        """Write the INCAR section, only with the tags that are read by the parsers."""
+        handler.write(' <incar>\n')
+        handler.write('  <i type="int" name="ISPIN">    {}</i>\n'.format(self.sizes['num_spins']))
+        handler.write('  <i type="int" name="NSW">    {}</i>\n'.format(self.sizes['num_steps']))
+        handler.write('  <i type="int" name="IBRION">    {}</i>\n'.format(self._ibrion))
+        handler.write('  <i type="int" name="LORBIT">    11</i>\n </incar>\n')
+
+    def _write_xml_parameters(self, handler):
+        """Write the parameters section, only with the parameters that are read by the parsers."""
+        sizes = self.sizes
+        handler.write(' <parameters>\n  <separator name="general" >\n   <i type="string" name="SYSTEM">unknown system</i>\n'
+                      '  </separator>\n  <separator name="electronic" >\n')
+        handler.write('   <i type="int" name="NBANDS">    {}</i>\n'.format(sizes['num_bands']))
+        handler.write('   <i name="NELECT">    {:16.8f}</i>\n'.format(self.nelect))
+        handler.write('   <separator name="electronic smearing" >\n    <i type="int" name="ISMEAR">     0</i>\n'
+                      '    <i name="SIGMA">      0.05000000</i>\n   </separator>\n')
+        handler.write('   <separator name="electronic spin" >\n')
+        handler.write('    <i type="int" name="ISPIN">     {}</i>\n'.format(sizes['num_spins']))
+        handler.write('    <i type="logical" name="LNONCOLLINEAR"> F  </i>\n   </separator>\n')
+        handler.write('   <separator name="electronic convergence" >\n')
+        handler.write('    <i type="int" name="NELM">    {}</i>\n   </separator>\n  </separator>\n'.format(max(
+            60, sizes['num_scsteps'] + 1)))
+        handler.write('  <separator name="ionic" >\n')
+        handler.write('   <i type="int" name="NSW">     {}</i>\n'.format(sizes['num_steps']))
+        handler.write('   <i type="int" name="IBRION">    {}</i>\n  </separator>\n'.format(self._ibrion))
+        handler.write('  <separator name="symmetry" >\n   <i name="SYMPREC">      0.00001000</i>\n  </separator>\n')
+        handler.write('  <separator name="dos" >\n   <i type="logical" name="LORBIT"> T  </i>\n')
+        handler.write('   <i type="int" name="NEDOS">   {}</i>\n  </separator>\n </parameters>\n'.format(sizes['nedos']))
+
+    def _write_xml_atominfo(self, handler):
+        """Write the atoms and atom types."""
+        handler.write(' <atominfo>\n  <atoms>{:>8d} </atoms>\n  <types>{:>8d} </types>\n'.format(self.num_atoms, len(self.counts)))
+        handler.write('  <array name="atoms" >\n   <dimension dim="1">ion</dimension>\n   <field type="string">element</field>\n'
+                      '   <field type="int">atomtype</field>\n   <set>\n')
+        for index, count in enumerate(self.counts):
+            handler.write('    <rc><c>{}</c><c>{:>4d}</c></rc>\n'.format(ELEMENTS[index], index + 1) * count)
+        handler.write('   </set>\n  </array>\n  <array name="atomtypes" >\n   <dimension dim="1">type</dimension>\n'
+                      '   <field type="int">atomspertype</field>\n   <field type="string">element</field>\n   <field>mass</field>\n'
+                      '   <field>valence</field>\n   <field type="string">pseudopotential</field>\n   <set>\n')
+        for index, count in enumerate(self.counts):
+            handler.write('    <rc><c>{:>4d}</c><c>{}</c><c>  100.00000000</c><c>    5.00000000</c><c>  PAW {} 01Jan2000</c></rc>\n'.format(
+                count, ELEMENTS[index], ELEMENTS[index]))
+        handler.write('   </set>\n  </array>\n </atominfo>\n')
+
+    def _write_xml_structure(self, handler, step, name='', indent=2):
+        """Write the cell and positions of an ionic step."""
+        space = ' ' * indent
+        handler.write('{0}<structure{1}>\n{0} <crystal>\n{0}  <varray name="basis" >\n'.format(space, name))
+        _write_rows(handler, self.cell, space + '   <v> %16.8f %16.8f %16.8f </v>')
+        handler.write('{0}  </varray>\n{0}  <i name="volume">  {1:16.8f} </i>\n{0}  <varray name="rec_basis" >\n'.format(
+            space, np.linalg.det(self.cell)))
+        _write_rows(handler, np.linalg.inv(self.cell).T, space + '   <v> %16.8f %16.8f %16.8f </v>')
+        handler.write('{0}  </varray>\n{0} </crystal>\n{0} <varray name="positions" >\n'.format(space))
+        _write_rows(handler, self.positions[step], space + '  <v> %16.8f %16.8f %16.8f </v>')
+        handler.write('{0} </varray>\n{0}</structure>\n'.format(space))
+
+    def _write_xml_calculation(self, handler, step):
+        """Write an ionic step, the last one with the eigenvalues, DOS and projections."""
+        handler.write(' <calculation>\n')
+        for energy in self.energies[step]:
+            handler.write('  <scstep>\n   <time name="dav">    0.10    0.10</time>\n   <time name="total">    0.10    0.10</time>\n'
+                          '   <energy>\n')
+            handler.write(XML_ENERGY.format(energy=energy, indent='    '))
+            handler.write('   </energy>\n  </scstep>\n')
+        self._write_xml_structure(handler, step)
+        handler.write('  <varray name="forces" >\n')
+        _write_rows(handler, self.forces[step], '   <v> %16.8f %16.8f %16.8f </v>')
+        handler.write('  </varray>\n  <varray name="stress" >\n')
+        _write_rows(handler, self.stress[step], '   <v> %16.8f %16.8f %16.8f </v>')
+        handler.write('  </varray>\n  <energy>\n')
+        handler.write(XML_ENERGY.format(energy=self.energies[step, -1], indent='   '))
+        handler.write('  </energy>\n  <time name="totalsc">    1.00    1.00</time>\n')
+        if step == self.sizes['num_steps'] - 1:
+            self._write_xml_eigenvalues(handler)
+            self._write_xml_dos(handler)
+            self._write_xml_projected(handler)
+        handler.write(' </calculation>\n')
+
+    def _write_xml_eigenvalues(self, handler, indent='  '):
+        """Write the eigenvalues and occupations of each spin and k-point."""
+        handler.write(('{0}<eigenvalues>\n{0} <array>\n{0}  <dimension dim="1">band</dimension>\n'
+                       '{0}  <dimension dim="2">kpoint</dimension>\n{0}  <dimension dim="3">spin</dimension>\n'
+                       '{0}  <field>eigene</field>\n{0}  <field>occ</field>\n{0}  <set>\n').format(indent))
+        for spin in range(self.sizes['num_spins']):
+            handler.write('{}   <set comment="spin {}">\n'.format(indent, spin + 1))
+            for kpoint in range(self.sizes['num_kpoints']):
+                handler.write('{}    <set comment="kpoint {}">\n'.format(indent, kpoint + 1))
+                rows = np.column_stack([self.eigenvalues[spin, kpoint], self.occupations[spin, kpoint]])
+                _write_rows(handler, rows, indent + '     <r> %10.4f %9.4f </r>')
+                handler.write('{}    </set>\n'.format(indent))
+            handler.write('{}   </set>\n'.format(indent))
+        handler.write('{0}  </set>\n{0} </array>\n{0}</eigenvalues>\n'.format(indent))
+
+    def _write_xml_dos(self, handler):
+        """Write the total and partial DOS."""
+        handler.write('  <dos>\n   <i name="efermi">  {:16.8f} </i>\n   <total>\n    <array>\n'.format(self.efermi))
+        handler.write('     <dimension dim="1">gridpoints</dimension>\n     <dimension dim="2">spin</dimension>\n'
+                      '     <field>energy</field>\n     <field>total</field>\n     <field>integrated</field>\n     <set>\n')
+        for spin in range(self.sizes['num_spins']):
+            handler.write('      <set comment="spin {}">\n'.format(spin + 1))
+            rows = np.column_stack([self.dos_energies, self.tdos[spin], self.integrated_dos[spin]])
+            _write_rows(handler, rows, '       <r> %10.4f %10.4f %10.4f </r>')
+            handler.write('      </set>\n')
+        handler.write('     </set>\n    </array>\n   </total>\n   <partial>\n    <array>\n')
+        handler.write('     <dimension dim="1">gridpoints</dimension>\n     <dimension dim="2">spin</dimension>\n'
+                      '     <dimension dim="3">ion</dimension>\n     <field>energy</field>\n')
+        handler.write(''.join(['     <field>{:>3}</field>\n'.format(orbital) for orbital in ORBITALS]) + '     <set>\n')
+        for ion in range(self.num_atoms):
+            handler.write('      <set comment="ion {}">\n'.format(ion + 1))
+            for spin in range(self.sizes['num_spins']):
+                handler.write('       <set comment="spin {}">\n'.format(spin + 1))
+                rows = np.column_stack([self.dos_energies, self.pdos[ion, spin]])
+                _write_rows(handler, rows, '        <r> %10.4f' + ' %10.4f' * len(ORBITALS) + ' </r>')
+                handler.write('       </set>\n')
+            handler.write('      </set>\n')
+        handler.write('     </set>\n    </array>\n   </partial>\n  </dos>\n')
+
+    def _write_xml_projected(self, handler):
+        """Write the eigenvalues again, followed by the projections on the orbitals of each ion."""
+        handler.write('  <projected>\n')
+        self._write_xml_eigenvalues(handler, indent='   ')
+        handler.write('   <array>\n    <dimension dim="1">ion</dimension>\n    <dimension dim="2">band</dimension>\n'
+                      '    <dimension dim="3">kpoint</dimension>\n    <dimension dim="4">spin</dimension>\n')
+        handler.write(''.join(['    <field>{:>3}</field>\n'.format(orbital) for orbital in ORBITALS]) + '    <set>\n')
+        for spin in range(self.sizes['num_spins']):
+            handler.write('     <set comment="spin{}">\n'.format(spin + 1))
+            for kpoint in range(self.sizes['num_kpoints']):
+                handler.write('      <set comment="kpoint {}">\n'.format(kpoint + 1))
+                for band in range(self.sizes['num_bands']):
+                    handler.write('       <set comment="band {}">\n'.format(band + 1))
+                    _write_rows(handler, self.projections[spin, kpoint, band], '        <r>' + ' %7.4f' * len(ORBITALS) + ' </r>')
+                    handler.write('       </set>\n')
+                handler.write('      </set>\n')
+            handler.write('     </set>\n')
+        handler.write('    </set>\n   </array>\n  </projected>\n')
+
+    def _write_outcar_step(self, handler, step):
+        """Write the electronic steps of an ionic step, followed by the forces and, for the last step, the eigenvalues."""
+        for scstep, energy in enumerate(self.energies[step]):
+            handler.write('{0} Iteration {1:>6d}({2:>4d})  {0}\n\n\n'.format('-' * 39, step + 1, scstep + 1))
+            handler.write('    POTLOK:  cpu time    0.0117: real time    0.0117\n    EDDIAG:  cpu time    1.6626: real time    1.6627\n')
+            handler.write(' number of electron {:>15.7f} magnetization {:>15.7f}\n\n'.format(self.nelect, 0.0))
+            handler.write(OUTCAR_ENERGY.format(energy=energy))
+        handler.write(' POSITION                                       TOTAL-FORCE (eV/Angst)\n')
+        handler.write(' ' + '-' * 83 + '\n')
+        positions = np.dot(self.positions[step], self.cell)
+        _write_rows(handler, np.column_stack([positions, self.forces[step]]), '  %12.5f %12.5f %12.5f   %14.6f %13.6f %13.6f')
+        handler.write(' ' + '-' * 83 + '\n    total drift:                               0.000000      0.000000      0.000000\n\n\n')
+        handler.write('{}\n\n\n\n  FREE ENERGIE OF THE ION-ELECTRON SYSTEM (eV)\n'.format(SEPARATOR))
+        handler.write('  ---------------------------------------------------\n')
+        energy = self.energies[step, -1]
+        handler.write(
+            '  free  energy   TOTEN  = {0:>18.8f} eV\n\n  energy  without entropy= {0:>18.8f}  energy(sigma->0) = {0:>18.8f}\n\n'.format(
+                energy))
+        if step < self.sizes['num_steps'] - 1:
+            return
+        handler.write(' E-fermi : {:>8.4f}     XC(G=0): -13.3683     alpha+bet :-12.8202\n\n'.format(self.efermi))
+        for spin in range(self.sizes['num_spins']):
+            handler.write('\n spin component {}\n\n'.format(spin + 1))
+            for kpoint in range(self.sizes['num_kpoints']):
+                handler.write(' k-point {:>5d} :    {:>10.4f}{:>10.4f}{:>10.4f}\n'.format(kpoint + 1, *self.kpoints[kpoint]))
+                handler.write('  band No.  band energies     occupation \n')
+                rows = np.column_stack(
+                    [np.arange(1, self.sizes['num_bands'] + 1), self.eigenvalues[spin, kpoint], self.occupations[spin, kpoint]])
+                _write_rows(handler, rows, '  %5d %12.4f %12.5f')
+                handler.write('\n')
+        handler.write('{}\n\n'.format(SEPARATOR))
+
+
+def _write_rows(handler, array, row_format):
+    """Write the rows of a 2D array with a format for the full row, which is much faster than formatting each number."""
+    np.savetxt(handler, array, fmt=row_format)
+
+
+XML_ENERGY = """{indent}<i name="e_fr_energy">  {energy:16.8f} </i>
+{indent}<i name="e_wo_entrp">  {energy:16.8f} </i>
+{indent}<i name="e_0_energy">  {energy:16.8f} </i>
+"""
+
+OUTCAR_SYMMETRY = """Analysis of symmetry for {title}:
+=====================================================================
+ Subroutine PRICEL returns:
+ Original cell was already a primitive cell.
+
+
+ Routine SETGRP: Setting up the symmetry group for a
+ triclinic supercell.
+
+
+ Subroutine GETGRP returns: Found  1 space group operations
+ (whereof  1 operations were pure point group operations)
+ out of a pool of  2 trial point group operations.
+
+
+The {configuration} configuration has the point symmetry C_1 .
+
+
+"""
+
+OUTCAR_ENERGY = """ Free energy of the ion-electron system (eV)
+  ---------------------------------------------------
+  alpha Z        PSCENC =       328.07335766
+  Ewald energy   TEWEN  =     -3036.86137731
+  ---------------------------------------------------
+  free energy    TOTEN  = {energy:>18.8f} eV
+
+  energy without entropy = {energy:>18.8f}  energy(sigma->0) = {energy:>18.8f}
+
+
+""" + SEPARATOR + '\n\n\n'
+
+OUTCAR_RUN_STATS = """
+ total amount of memory used by VASP MPI-rank0    59720. kBytes
+=======================================================================
+
+   base      :      30000. kBytes
+   nonl-proj :      18729. kBytes
+
+
+ General timing and accounting informations for this job:
+ ========================================================
+
+                  Total CPU time used (sec):       77.364
+                            User time (sec):       76.477
+                          System time (sec):        0.886
+                         Elapsed time (sec):       82.848
+
+                   Maximum memory used (kb):       94012.
+                   Average memory used (kb):           0.
+
+                          Minor page faults:        13478
+                          Major page faults:           72
+                 Voluntary context switches:         1441
+"""
@@ -0,0 +1,117 @@
+"""
+Projector utils.
+
+----------------
+Selection of ions and orbitals of the projections of the bands, and their thresholded sparse storage.
+"""
+import numbers
+
+import numpy as np
+
+# The orbitals of the projections for LORBIT >= 11, in the order VASP writes them.
+LM_ORBITALS = ['s', 'py', 'pz', 'px', 'dxy', 'dyz', 'dz2', 'dxz', 'x2-y2']
+# The f orbitals, which follow the d orbitals for LORBIT >= 11 if there are f electrons.
+F_ORBITALS = ['fy3x2', 'fxyz', 'fyz2', 'fz3', 'fxz2', 'fzx2', 'fx3']
+# All names of orbitals, including the ones of LORBIT = 10, which are only decomposed by the angular momentum.
+ORBITALS = ['s', 'p', 'd', 'f'] + LM_ORBITALS[1:] + F_ORBITALS
+# The names of orbitals in vasprun.xml that are written differently in PROCAR, the ones of PROCAR are used.
+ORBITAL_ALIASES = {'dx2': 'x2-y2'}
+
+
+def get_orbital_names(labels):
+    """Return the names of the orbitals, given their labels in vasprun.xml or PROCAR."""
+    return [ORBITAL_ALIASES.get(label.strip(), label.strip()) for label in labels]
+
+
+def check_projector_selection(settings=None):
+    """
+    Check the parser settings selecting the projections, see ``reduce_projectors``.
+
+    Whether the selected ions and orbitals are in the projections can only be checked once they are parsed.
+
+    :raises ValueError: If one of the settings is not valid.
+    """
+    settings = {} if settings is None else settings
+    ions = settings.get('projectors_ions', None)
+    orbitals = settings.get('projectors_orbitals', None)
+    threshold = settings.get('projectors_threshold', None)
+    if ions is not None and (not isinstance(ions, (list, tuple)) or
+                             not all(isinstance(ion, numbers.Integral) and not isinstance(ion, bool) and ion >= 1 for ion in ions)):
+        raise ValueError('The projectors_ions must be a list of the indices of the ions, starting at 1, not {}.'.format(ions))
+    if orbitals is not None and (not isinstance(orbitals, (list, tuple)) or not set(orbitals) <= set(ORBITALS)):
+        raise ValueError('The projectors_orbitals must be a list of names out of {}, not {}.'.format(ORBITALS, orbitals))
+    if threshold is not None and (isinstance(threshold, bool) or not isinstance(threshold, numbers.Real) or threshold < 0):
+        raise ValueError('The projectors_threshold must be a non-negative number, not {}.'.format(threshold))
+
+
+def reduce_projectors(projectors, orbitals, settings=None, phase_factors=None):
+    """
+    Reduce the projections according to the parser settings.
+
+    The projections have the layout of ``VasprunParser.projectors``, with the ions on the fourth and the orbitals
+    on the last axis, counted from the end. The following parser settings are used:
+
+    * ``projectors_ions``: the indices of the ions to keep, starting at 1 as in VASP.
+    * ``projectors_orbitals``: the names of the orbitals to keep, e.g. ``['s', 'px', 'py', 'pz']``.
+    * ``projectors_threshold``: store the projections as a sparse array, discarding the ones below the threshold.
+
+    :param projectors: The projections, a numpy array.
+    :param orbitals: The names of the orbitals, in the order of the last axis.
+    :param settings: The ``ParserSettings``, or None to keep everything.
+    :param phase_factors: Optionally the complex phase factors, with the same layout as the projections.
+    :return: A dict of the arrays to store. ``projectors`` for the dense projections, or ``projectors_indices``,
+        ``projectors_values`` and ``projectors_shape`` for the sparse ones, see ``get_projectors``. The selected
+        ``ions`` and ``orbitals`` are added if a selection is made, the ``phase_factors`` if they are given.
+    :raises ValueError: If the selected ions or orbitals are not in the projections.
+    """
+    settings = {} if settings is None else settings
+    ions = settings.get('projectors_ions', None)
+    selected_orbitals = settings.get('projectors_orbitals', None)
+    threshold = settings.get('projectors_threshold', None)
+    arrays = {}
+    arrays_to_reduce = {'projectors': projectors}
+    if phase_factors is not None:
+        arrays_to_reduce['phase_factors'] = phase_factors
+
+    if ions is not None:
+        indices = np.array(ions, dtype=int) - 1
+        num_ions = projectors.shape[-4]
+        if np.any((indices < 0) | (indices >= num_ions)):
+            raise ValueError('The ions {} are not all in the projections, which contain {} ions.'.format(list(ions), num_ions))
+        arrays_to_reduce = {key: np.take(array, indices, axis=-4) for key, array in arrays_to_reduce.items()}
+        arrays['ions'] = np.array(ions, dtype=int)
+    if selected_orbitals is not None:
+        unknown = set(selected_orbitals) - set(orbitals)
+        if unknown:
+            raise ValueError('The orbitals {} are not in the projections, which contain {}.'.format(sorted(unknown), orbitals))
+        indices = [orbitals.index(orbital) for orbital in selected_orbitals]
+        arrays_to_reduce = {key: np.take(array, indices, axis=-1) for key, array in arrays_to_reduce.items()}
+        arrays['orbitals'] = np.array(selected_orbitals)
+
+    if threshold is None:
+        arrays.update(arrays_to_reduce)
+        return arrays
+    projectors = arrays_to_reduce['projectors']
+    indices = np.flatnonzero(np.abs(projectors) >= threshold)
+    arrays['projectors_shape'] = np.array(projectors.shape)
+    arrays['projectors_indices'] = indices.astype(np.uint32 if projectors.size <= np.iinfo(np.uint32).max else np.uint64)
+    arrays['projectors_values'] = projectors.ravel()[indices]
+    if phase_factors is not None:
+        arrays['phase_factors_values'] = arrays_to_reduce['phase_factors'].ravel()[indices]
+    return arrays
+
+
+def get_projectors(node, name='projectors'):
+    """
+    Get the dense projections from an ``ArrayData`` node, also when they are stored as a sparse array.
+
+    :param node: The ``projectors`` output node.
+    :param name: ``projectors``, or ``phase_factors`` for the phase factors stored along with the projections.
+    :return: A numpy array, the discarded values of a sparse array are zero.
+    """
+    if name in node.get_arraynames():
+        return node.get_array(name)
+    values = node.get_array(name + '_values')
+    dense = np.zeros(np.prod(node.get_array('projectors_shape')), dtype=values.dtype)
+    dense[node.get_array('projectors_indices')] = values
+    return dense.reshape(node.get_array('projectors_shape'))
@@ -0,0 +1,67 @@
+"""Test the synthetic VASP output used for benchmarking the parsers."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import
+
+import pytest
+import numpy as np
+
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.fixtures.synthetic import SyntheticRun
+from aiida_vasp.parsers.settings import ParserSettings
+
+
+@pytest.fixture(params=[{}, {'num_spins': 2, 'num_steps': 3, 'num_atoms': 5}], ids=['default', 'spin-relax'])
+def synthetic_run(request, tmpdir):
+    """Write a synthetic run to a temporary folder."""
+    run = SyntheticRun(**request.param)
+    run.write(str(tmpdir))
+    return run, tmpdir
+
+
+def _parse(parser_cls, tmpdir, file_name, quantity_key):
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    parser = parser_cls(file_path=str(tmpdir.join(file_name)), settings=ParserSettings({}), exit_codes=VaspCalculation.exit_codes)
+    return parser.get_quantity(quantity_key)
+
+
+def test_vasprun(fresh_aiida_env, synthetic_run):
+    """Check that both vasprun.xml backends read the synthetic run."""
+    from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser
+    from aiida_vasp.parsers.file_parsers.vasprun_streaming import StreamingVasprunParser
+    run, tmpdir = synthetic_run
+    for parser_cls in (VasprunParser, StreamingVasprunParser):
+        assert np.allclose(np.stack(_parse(parser_cls, tmpdir, 'vasprun.xml', 'eigenvalues')), run.eigenvalues, atol=1e-4)
+        trajectory = _parse(parser_cls, tmpdir, 'vasprun.xml', 'trajectory')
+        assert np.allclose(trajectory['forces'], run.forces, atol=1e-8)
+        assert list(trajectory['symbols']) == run.symbols
+    assert _parse(VasprunParser, tmpdir, 'vasprun.xml', 'dos')['tdos'].shape[-1] == run.sizes['nedos']
+
+
+def test_doscar_eigenval(fresh_aiida_env, synthetic_run):
+    """Check that DOSCAR and EIGENVAL are read with the sizes of the synthetic run."""
+    from aiida_vasp.parsers.file_parsers.doscar import DosParser
+    from aiida_vasp.parsers.file_parsers.eigenval import EigParser
+    run, tmpdir = synthetic_run
+    dos = _parse(DosParser, tmpdir, 'DOSCAR', 'doscar-dos')
+    assert np.allclose(dos['tdos']['energy'], run.dos_energies, atol=1e-3)
+    assert dos['pdos'].shape == (run.num_atoms, run.sizes['nedos'])
+    assert np.allclose(dos['pdos']['s'].reshape(run.num_atoms, run.sizes['nedos'], -1), run.pdos[..., 0].transpose(0, 2, 1), rtol=1e-3)
+    assert np.allclose(_parse(EigParser, tmpdir, 'EIGENVAL', 'eigenval-eigenvalues'), run.eigenvalues, atol=1e-6)
+    assert np.array_equal(_parse(EigParser, tmpdir, 'EIGENVAL', 'eigenval-occupancies'), run.occupations)
+
+
+def test_outcar_stream(fresh_aiida_env, synthetic_run):
+    """Check that both OUTCAR backends and the stream parser read the synthetic run."""
+    from aiida_vasp.parsers.file_parsers.outcar import OutcarParser
+    from aiida_vasp.parsers.file_parsers.outcar_streaming import StreamingOutcarParser
+    from aiida_vasp.parsers.file_parsers.stream import StreamParser
+    _, tmpdir = synthetic_run
+    for parser_cls in (OutcarParser, StreamingOutcarParser):
+        symmetries = _parse(parser_cls, tmpdir, 'OUTCAR', 'symmetries')
+        assert symmetries['num_space_group_operations'] == {'static': [1], 'dynamic': [1]}
+        assert _parse(parser_cls, tmpdir, 'OUTCAR', 'run_stats')['total_cpu_time_used'] == pytest.approx(77.364)
+    assert not _parse(StreamParser, tmpdir, 'vasp_output', 'notifications')
+
+
+def test_unknown_size():
+    with pytest.raises(ValueError):
+        SyntheticRun(num_ions=8)
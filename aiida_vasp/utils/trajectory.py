@@ -0,0 +1,58 @@
+"""
+Trajectory utils.
+
+-----------------
+Selection of the ionic steps and the arrays of a trajectory that are kept.
+"""
+import numpy as np
+
+# The arrays of a trajectory with an entry for each ionic step, the positions are always kept.
+TRAJECTORY_ARRAYS = ['cells', 'positions', 'forces', 'stress']
+
+
+def get_trajectory_selection(settings=None):
+    """
+    Return the ionic steps and the arrays of the trajectory to keep, according to the parser settings.
+
+    * ``trajectory_stride``: keep every ``stride`` th ionic step, starting with the first.
+    * ``trajectory_tail``: also keep the last ``tail`` ionic steps.
+    * ``trajectory_arrays``: the arrays to keep, out of ``TRAJECTORY_ARRAYS``. The positions are always kept.
+
+    :param settings: The ``ParserSettings``, or None to keep everything.
+    :return: The stride, the tail and the list of the names of the arrays to keep.
+    :raises ValueError: If one of the settings is not valid.
+    """
+    settings = {} if settings is None else settings
+    stride = settings.get('trajectory_stride', 1)
+    tail = settings.get('trajectory_tail', 0)
+    arrays = settings.get('trajectory_arrays', TRAJECTORY_ARRAYS)
+    if not _is_integer(stride, minimum=1):
+        raise ValueError('The trajectory_stride must be a positive integer, not {}.'.format(stride))
+    if not _is_integer(tail, minimum=0):
+        raise ValueError('The trajectory_tail must be a non-negative integer, not {}.'.format(tail))
+    if not isinstance(arrays, (list, tuple)):
+        raise ValueError('The trajectory_arrays must be a list of array names, not {}.'.format(arrays))
+    unknown = set(arrays) - set(TRAJECTORY_ARRAYS)
+    if unknown:
+        raise ValueError('Unknown trajectory_arrays {}, use some of {}.'.format(sorted(unknown), TRAJECTORY_ARRAYS))
+    return int(stride), int(tail), [name for name in TRAJECTORY_ARRAYS if name in arrays or name == 'positions']
+
+
+def select_steps(num_steps, stride=1, tail=0):
+    """
+    Return the indices of the ionic steps to keep.
+
+    :param num_steps: The number of ionic steps.
+    :param stride: Keep every ``stride`` th step, starting with the first.
+    :param tail: Also keep the last ``tail`` steps.
+    :return: The sorted indices of the steps to keep, starting at 0.
+    """
+    return np.union1d(np.arange(0, num_steps, stride), np.arange(max(num_steps - tail, 0), num_steps))
+
+
+def _is_integer(value, minimum):
+    """Whether value is an integer, possibly given as a float, which is at least minimum."""
+    try:
+        return minimum <= value == int(value)
+    except (TypeError, ValueError, OverflowError):
+        return False
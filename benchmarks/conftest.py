@@ -0,0 +1,113 @@
+"""
+Configuration of the parser benchmarks.
+
+The benchmarks use ``pytest-benchmark`` and are run on synthetic VASP output, written once per size and session.
+Besides the timings, the peak memory of a single parse is stored in the ``extra_info`` of each benchmark.
+"""
+# pylint: disable=redefined-outer-name
+import json
+import tracemalloc
+
+import pytest
+
+from aiida_vasp.parsers.profile import get_peak_rss
+from aiida_vasp.utils.fixtures.synthetic import SyntheticRun
+
+SIZES = {
+    'small': {
+        'num_atoms': 8,
+        'num_kpoints': 10,
+        'num_bands': 16,
+        'nedos': 301,
+        'num_steps': 5,
+        'grid': (24, 24, 24),
+    },
+    'medium': {
+        'num_atoms': 32,
+        'num_kpoints': 40,
+        'num_bands': 128,
+        'nedos': 2001,
+        'num_steps': 100,
+        'grid': (48, 48, 48),
+    },
+    'large': {
+        'num_atoms': 128,
+        'num_kpoints': 50,
+        'num_bands': 512,
+        'nedos': 3001,
+        'num_steps': 500,
+        'grid': (96, 96, 96),
+    },
+}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('aiida-vasp benchmarks')
+    group.addoption('--benchmark-sizes',
+                    default='small,medium',
+                    help='Comma separated sizes of the synthetic runs, out of {} (default: small,medium).'.format(', '.join(SIZES)))
+    group.addoption('--memory-compare',
+                    metavar='PATH',
+                    help='Fail if the peak memory exceeds the one stored in a saved pytest-benchmark run (json file).')
+    group.addoption('--memory-compare-fail',
+                    type=float,
+                    default=20.,
+                    metavar='PERCENT',
+                    help='Allowed increase of the peak memory with respect to --memory-compare, in percent (default: 20).')
+
+
+def pytest_generate_tests(metafunc):
+    if 'size' in metafunc.fixturenames:
+        sizes = metafunc.config.getoption('benchmark_sizes').split(',')
+        unknown = set(sizes) - set(SIZES)
+        if unknown:
+            raise pytest.UsageError('Unknown benchmark sizes: {}'.format(', '.join(sorted(unknown))))
+        metafunc.parametrize('size', sizes, scope='session')
+
+
+@pytest.fixture(scope='session')
+def synthetic_folder(size, tmp_path_factory):
+    """Write the synthetic run of the given size and return the folder."""
+    folder = tmp_path_factory.mktemp(size)
+    SyntheticRun(**SIZES[size]).write(str(folder))
+    return folder
+
+
+@pytest.fixture(scope='session')
+def memory_baseline(request):
+    """Return the peak memory of each benchmark in the run given with --memory-compare."""
+    path = request.config.getoption('memory_compare')
+    if not path:
+        return {}
+    with open(path) as handler:
+        benchmarks = json.load(handler)['benchmarks']
+    return {entry['fullname']: entry['extra_info'].get('peak_memory') for entry in benchmarks}
+
+
+@pytest.fixture
+def measure_memory(request, benchmark, memory_baseline):
+    """
+    Return a function that measures the peak memory of a single call.
+
+    The peak of the memory traced by ``tracemalloc`` (Python objects and numpy arrays, but not the internal
+    allocations of C libraries like lxml) and the increase of the peak RSS of the process are stored in the
+    ``extra_info`` of the benchmark. The first is compared to the baseline if one is given.
+    """
+
+    def _measure(function):
+        start_rss = get_peak_rss()
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info['peak_memory'] = peak
+        if start_rss is not None:
+            benchmark.extra_info['peak_rss_delta'] = get_peak_rss() - start_rss
+        reference = memory_baseline.get(request.node.nodeid)
+        if reference:
+            tolerance = request.config.getoption('memory_compare_fail')
+            assert peak <= reference * (1 + tolerance / 100.), 'Peak memory increased from {} to {} bytes'.format(reference, peak)
+
+    return _measure
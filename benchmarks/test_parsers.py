@@ -0,0 +1,163 @@
+"""Benchmark the file parsers and the VaspParser on synthetic runs of increasing size."""
+# pylint: disable=unused-import,redefined-outer-name,unused-argument,unused-wildcard-import,wildcard-import,import-outside-toplevel
+# pylint: disable=too-many-arguments
+
+import os
+
+import pytest
+
+from aiida.plugins import ParserFactory
+from aiida_vasp.utils.fixtures import *
+from aiida_vasp.utils.fixtures.calcs import calc_with_retrieved
+from aiida_vasp.parsers.file_parsers.doscar import DosParser
+from aiida_vasp.parsers.file_parsers.eigenval import EigParser
+from aiida_vasp.parsers.file_parsers.outcar import OutcarParser
+from aiida_vasp.parsers.file_parsers.outcar_streaming import StreamingOutcarParser
+from aiida_vasp.parsers.file_parsers.procar import ProcarParser
+from aiida_vasp.parsers.file_parsers.stream import StreamParser
+from aiida_vasp.parsers.file_parsers.vasprun import VasprunParser
+from aiida_vasp.parsers.file_parsers.vasprun_streaming import StreamingVasprunParser
+from aiida_vasp.parsers.file_parsers.xdatcar import XdatcarParser
+from aiida_vasp.parsers.settings import ParserSettings
+
+VASPRUN_QUANTITIES = ['trajectory', 'energies', 'kpoints', 'eigenvalues', 'occupancies']
+OUTCAR_QUANTITIES = list(OutcarParser.PARSABLE_ITEMS)
+
+FILE_PARSERS = {
+    'vasprun-parsevasp': (VasprunParser, 'vasprun.xml', VASPRUN_QUANTITIES + ['dos', 'projectors']),
+    'vasprun-streaming': (StreamingVasprunParser, 'vasprun.xml', VASPRUN_QUANTITIES),
+    'outcar-parsevasp': (OutcarParser, 'OUTCAR', OUTCAR_QUANTITIES),
+    'outcar-streaming': (StreamingOutcarParser, 'OUTCAR', OUTCAR_QUANTITIES),
+    'doscar': (DosParser, 'DOSCAR', ['doscar-dos']),
+    'eigenval': (EigParser, 'EIGENVAL', ['eigenval-eigenvalues', 'eigenval-kpoints', 'eigenval-occupancies']),
+    'procar': (ProcarParser, 'PROCAR', ['procar-projectors']),
+    'xdatcar': (XdatcarParser, 'XDATCAR', ['xdatcar-trajectory']),
+    'stream': (StreamParser, 'vasp_output', ['notifications']),
+}
+
+PARSER_SETTINGS = {
+    'add_trajectory': True,
+    'add_energies': True,
+    'add_structure': True,
+    'add_kpoints': True,
+    'add_bands': True,
+    'add_dos': True,
+    'add_projectors': True,
+}
+
+
+@pytest.mark.parametrize('name', list(FILE_PARSERS))
+def test_file_parser(benchmark, measure_memory, fresh_aiida_env, synthetic_folder, name):
+    """Parse all quantities of interest from a single file, including the instantiation of the file parser."""
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    parser_cls, file_name, quantity_keys = FILE_PARSERS[name]
+    path = str(synthetic_folder / file_name)
+
+    def parse():
+        parser = parser_cls(file_path=path, settings=ParserSettings({}), exit_codes=VaspCalculation.exit_codes)
+        return [parser.get_quantity(quantity_key) for quantity_key in quantity_keys]
+
+    benchmark.group = name
+    benchmark.extra_info['file_size'] = (synthetic_folder / file_name).stat().st_size
+    measure_memory(parse)
+    assert all(quantity is not None for quantity in benchmark(parse))
+
+
+@pytest.mark.parametrize('suffix', ['', '.gz', '.xz'])
+@pytest.mark.parametrize('name', ['vasprun-parsevasp', 'vasprun-streaming', 'outcar-parsevasp', 'outcar-streaming', 'doscar', 'eigenval'])
+def test_compressed_file_parser(benchmark, measure_memory, fresh_aiida_env, synthetic_folder, tmp_path, name, suffix):
+    """Parse a file retrieved compressed, the file size is the one read from the repository."""
+    import shutil
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    from aiida_vasp.parsers.file_parsers.parser import DECOMPRESSORS
+    parser_cls, file_name, quantity_keys = FILE_PARSERS[name]
+    path = synthetic_folder / file_name
+    if suffix:
+        with path.open('rb') as source, DECOMPRESSORS[suffix](str(tmp_path / (file_name + suffix)), 'wb') as destination:
+            shutil.copyfileobj(source, destination)
+        path = tmp_path / (file_name + suffix)
+
+    def parse():
+        parser = parser_cls(file_path=str(path), settings=ParserSettings({}), exit_codes=VaspCalculation.exit_codes)
+        return [parser.get_quantity(quantity_key) for quantity_key in quantity_keys]
+
+    benchmark.group = 'compressed-{}'.format(name)
+    benchmark.extra_info['file_size'] = path.stat().st_size
+    benchmark.extra_info['uncompressed_size'] = (synthetic_folder / file_name).stat().st_size
+    measure_memory(parse)
+    assert all(quantity is not None for quantity in benchmark(parse))
+
+
+@pytest.mark.parametrize('num_atoms', [500, 5000])
+def test_compose_structure(benchmark, fresh_aiida_env, num_atoms):
+    """Compose the structure node of a large cell from the positions and symbols parsed from a file."""
+    import numpy as np
+    from aiida_vasp.parsers.node_composer import NodeComposer
+    symbols = np.array(['Si', 'Ge', 'O'])[np.arange(num_atoms) % 3]
+    structure = {
+        'unitcell': np.eye(3) * 50,
+        'positions': np.random.RandomState(0).uniform(0, 50, (num_atoms, 3)),
+        'symbols': symbols,
+        'kind_names': symbols,
+    }
+
+    benchmark.group = 'compose-structure'
+    assert len(benchmark(NodeComposer.compose, 'structure', {'structure': structure}).sites) == num_atoms
+
+
+STORAGES = {
+    'float64': None,
+    'float32': {
+        'dtype': 'float32'
+    },
+    'float32-compressed': {
+        'dtype': 'float32',
+        'compress': True
+    },
+    'float32-rounded-compressed': {
+        'dtype': 'float32',
+        'tolerance': 1e-4,
+        'compress': True
+    },
+}
+
+
+@pytest.mark.parametrize('storage', list(STORAGES))
+@pytest.mark.parametrize('quantity', ['dos', 'projectors'])
+def test_array_storage(benchmark, fresh_aiida_env, quantity, storage):
+    """Read the arrays of a stored node from the partial test case, the stored size is in the extra info."""
+    from aiida.orm import load_node
+    from aiida_vasp.calcs.vasp import VaspCalculation
+    from aiida_vasp.parsers.node_composer import NodeComposer
+    from aiida_vasp.utils.fixtures.testdata import data_path
+    parser = VasprunParser(file_path=data_path('partial', 'vasprun.xml'),
+                           settings=ParserSettings({}),
+                           exit_codes=VaspCalculation.exit_codes)
+    node = NodeComposer.compose('array', {quantity: parser.get_quantity(quantity)}, storage=STORAGES[storage]).store()
+    repository = node._repository._get_base_folder().abspath  # pylint: disable=protected-access
+
+    def read():
+        loaded = load_node(node.pk)
+        return [loaded.get_array(name) for name in loaded.get_arraynames()]
+
+    benchmark.group = 'storage-{}'.format(quantity)
+    benchmark.extra_info['stored_size'] = sum(os.path.getsize(os.path.join(repository, name)) for name in node.list_object_names())
+    assert all(array.size for array in benchmark(read))
+
+
+@pytest.mark.parametrize('backend', ['parsevasp', 'streaming'])
+def test_vasp_parser(benchmark, measure_memory, calc_with_retrieved, synthetic_folder, backend):
+    """Parse a retrieved calculation into output nodes, as done after each calculation."""
+    settings = dict(PARSER_SETTINGS, vasprun_backend=backend, outcar_backend=backend)
+    node = calc_with_retrieved(str(synthetic_folder), {'parser_settings': settings})
+    parser_cls = ParserFactory('vasp.vasp')
+
+    def parse():
+        parser = parser_cls(node)
+        exit_code = parser.parse(retrieved_temporary_folder=str(synthetic_folder))
+        assert exit_code is None or not exit_code.status, exit_code
+        return parser
+
+    benchmark.group = 'vasp-{}'.format(backend)
+    measure_memory(parse)
+    benchmark(parse)